@@ -1,7 +1,7 @@
 import math
 from typing import Dict, List, Optional, Any, Literal
 
-from fastapi import APIRouter, Depends, Request, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, Request, HTTPException
 from pydantic import BaseModel
 
 from db import crud, schemas
@@ -154,7 +154,6 @@ async def get_download_info(
     catalog_type: Literal["movie", "series"],
     video_id: str,
     user_data: schemas.UserData = Depends(get_user_data),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
     season: int = None,
     episode: int = None,
 ):
@@ -182,12 +181,10 @@ async def get_download_info(
     user_ip = await get_user_public_ip(request, user_data)
 
     if catalog_type == "movie":
-        streams = await crud.get_movie_streams(
-            user_data, secret_str, video_id, user_ip, background_tasks
-        )
+        streams = await crud.get_movie_streams(user_data, secret_str, video_id, user_ip)
     else:
         streams = await crud.get_series_streams(
-            user_data, secret_str, video_id, season, episode, user_ip, background_tasks
+            user_data, secret_str, video_id, season, episode, user_ip
         )
 
     streaming_provider_path = f"{settings.host_url}/streaming_provider/"
@@ -18,31 +18,50 @@ from fastapi import (
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import ValidationError
 from starlette.responses import HTMLResponse
 
 from api import middleware
 from api.scheduler import setup_scheduler
 from db import crud, database, schemas
+from db.cache_tags import set_tagged_cache, tag_cache_key
 from db.config import settings
 from db.redis_database import REDIS_ASYNC_CLIENT
 from db.schemas import SortingOption
+from db.catalog_stats import run_catalog_stats_flusher
+from db.stream_cache import listen_for_torrent_streams_invalidation
+from db.title_search import run_title_search_index
 from kodi.routes import kodi_router
 from metrics.routes import metrics_router
 from api.frontend_api import router as frontend_api_router
 from scrapers.routes import router as scrapers_router
 from scrapers.rpdb import update_rpdb_posters, update_rpdb_poster
 from streaming_providers import mapper
+from streaming_providers.cache_helpers import (
+    listen_for_debrid_cache_filter_updates,
+    mediafusion_client,
+)
+from streaming_providers.debrid_client import debrid_session_pool
 from streaming_providers.routes import router as streaming_provider_router
 from streaming_providers.validator import validate_provider_credentials
 from utils import const, poster, torrent, wrappers
+from utils.cache_codec import (
+    decode_cache_value,
+    dump_cached_model,
+    encode_cache_value,
+    load_cached_model,
+)
 from utils.crypto import crypto_utils
 from utils.lock import (
     acquire_scheduler_lock,
     maintain_heartbeat,
     release_scheduler_lock,
 )
-from utils.network import get_request_namespace, get_user_public_ip, get_user_data, get_secret_str
+from utils.network import (
+    get_request_namespace,
+    get_user_public_ip,
+    get_user_data,
+    get_secret_str,
+)
 from utils.parser import generate_manifest
 from utils.runtime_const import (
     DELETE_ALL_META,
@@ -50,6 +69,7 @@ from utils.runtime_const import (
     TEMPLATES,
 )
 from utils.validation_helper import (
+    get_parental_profile,
     validate_mediaflow_proxy_credentials,
     validate_rpdb_token,
     validate_mdblist_token,
@@ -67,6 +87,18 @@ async def lifespan(_: FastAPI):
     # Startup logic
     await database.init()
     await torrent.init_best_trackers()
+    invalidation_listener = asyncio.create_task(
+        listen_for_torrent_streams_invalidation()
+    )
+    catalog_stats_flusher = asyncio.create_task(run_catalog_stats_flusher())
+    debrid_cache_filter_listener = None
+    if settings.enable_debrid_cache_filter:
+        debrid_cache_filter_listener = asyncio.create_task(
+            listen_for_debrid_cache_filter_updates()
+        )
+    title_search_indexer = None
+    if settings.enable_title_search_index:
+        title_search_indexer = asyncio.create_task(run_title_search_index())
     scheduler = None
     scheduler_lock = None
 
@@ -93,6 +125,14 @@ async def lifespan(_: FastAPI):
         finally:
             await release_scheduler_lock(scheduler_lock)
 
+    invalidation_listener.cancel()
+    catalog_stats_flusher.cancel()
+    if debrid_cache_filter_listener:
+        debrid_cache_filter_listener.cancel()
+    if title_search_indexer:
+        title_search_indexer.cancel()
+    await mediafusion_client.aclose()
+    await debrid_session_pool.close_all()
     await REDIS_ASYNC_CLIENT.aclose()
 
 
@@ -358,12 +398,9 @@ async def get_catalog(
 
     if cache_key:
         response.headers.update(const.CACHE_HEADERS)
-        if cached_data := await REDIS_ASYNC_CLIENT.get(cache_key):
-            try:
-                metas = schemas.Metas.model_validate_json(cached_data)
-                return await update_rpdb_posters(metas, user_data, catalog_type)
-            except ValidationError:
-                pass
+        if metas := await get_cached_catalog(cache_key, catalog_type):
+            schedule_catalog_prefetch(background_tasks, catalog_type, metas)
+            return await update_rpdb_posters(metas, user_data, catalog_type)
     else:
         response.headers.update(const.NO_CACHE_HEADERS)
 
@@ -380,13 +417,121 @@ async def get_catalog(
     )
 
     if cache_key:
-        await REDIS_ASYNC_CLIENT.set(
+        await cache_catalog(cache_key, catalog_type, metas)
+
+    schedule_catalog_prefetch(background_tasks, catalog_type, metas)
+    return await update_rpdb_posters(metas, user_data, catalog_type)
+
+
+def get_catalog_meta_cache_key(catalog_type: str, meta_id: str) -> str:
+    return f"catalog_meta:{catalog_type}:{meta_id}"
+
+
+async def get_cached_catalog(cache_key: str, catalog_type: str) -> schemas.Metas | None:
+    """
+    Catalog pages are cached in two levels: each page stores only its meta ids,
+    and the metas are stored once per title, shared by every page, genre and
+    parental profile listing them. A page is a miss if any of its metas expired.
+    """
+    cached_ids = await REDIS_ASYNC_CLIENT.get(cache_key)
+    if not cached_ids:
+        return None
+    try:
+        meta_ids = json.loads(decode_cache_value(cached_ids))
+    except ValueError:
+        return None
+    if not isinstance(meta_ids, list):
+        # Entry written before pages were split into two levels
+        return None
+    if not meta_ids:
+        return schemas.Metas()
+
+    cached_metas = await REDIS_ASYNC_CLIENT.mget(
+        [get_catalog_meta_cache_key(catalog_type, meta_id) for meta_id in meta_ids]
+    )
+    if not all(cached_metas):
+        return None
+    try:
+        return schemas.Metas(
+            metas=[
+                load_cached_model(schemas.Meta, cached_meta)
+                for cached_meta in cached_metas
+            ]
+        )
+    except ValueError:
+        return None
+
+
+async def cache_catalog(cache_key: str, catalog_type: str, metas: schemas.Metas):
+    async with REDIS_ASYNC_CLIENT.pipeline(transaction=False) as pipe:
+        for meta in metas.metas:
+            # Metas outlive the pages so that a cached page finds all of them
+            meta_cache_key = get_catalog_meta_cache_key(catalog_type, meta.id)
+            pipe.set(
+                meta_cache_key,
+                dump_cached_model(meta, exclude_none=True, by_alias=True),
+                ex=settings.meta_cache_ttl * 2,
+            )
+            await tag_cache_key(
+                pipe, meta.id, meta_cache_key, settings.meta_cache_ttl * 2
+            )
+        pipe.set(
             cache_key,
-            metas.model_dump_json(exclude_none=True, by_alias=True),
+            encode_cache_value(json.dumps([meta.id for meta in metas.metas])),
             ex=settings.meta_cache_ttl,
         )
+        await pipe.execute()
 
-    return await update_rpdb_posters(metas, user_data, catalog_type)
+
+async def prefetch_catalog_page(
+    catalog_type: Literal["movie", "series"], meta_ids: list[str]
+):
+    """
+    Warm the metadata and poster caches for the titles of a served catalog
+    page, which Stremio requests right after it.
+    """
+    async with REDIS_ASYNC_CLIENT.pipeline(transaction=False) as pipe:
+        for meta_id in meta_ids:
+            pipe.exists(f"{catalog_type}_data:{meta_id}")
+            pipe.exists(poster.get_poster_cache_key(catalog_type, meta_id))
+        is_cached = await pipe.execute()
+
+    uncached_data_ids = {
+        meta_id for meta_id, cached in zip(meta_ids, is_cached[::2]) if not cached
+    }
+    # Posters already queued by an earlier request of this worker are skipped
+    uncached_poster_ids = {
+        meta_id
+        for meta_id, cached in zip(meta_ids, is_cached[1::2])
+        if not cached and not poster.is_poster_prefetch_scheduled(catalog_type, meta_id)
+    }
+    if not uncached_data_ids and not uncached_poster_ids:
+        return
+
+    media_data_list = await crud.load_media_data_by_ids(
+        list(uncached_data_ids | uncached_poster_ids), catalog_type, uncached_data_ids
+    )
+    poster.schedule_poster_prefetch(
+        catalog_type,
+        [
+            media_data
+            for media_data in media_data_list
+            if media_data.id in uncached_poster_ids
+        ],
+    )
+
+
+def schedule_catalog_prefetch(
+    background_tasks: BackgroundTasks, catalog_type: str, metas: schemas.Metas
+):
+    if (
+        settings.enable_catalog_prefetch
+        and catalog_type in ["movie", "series"]
+        and metas.metas
+    ):
+        background_tasks.add_task(
+            prefetch_catalog_page, catalog_type, [meta.id for meta in metas.metas]
+        )
 
 
 def get_cache_key(
@@ -407,9 +552,7 @@ def get_cache_key(
     elif catalog_type == "events":
         cache_key = None
     elif catalog_type in ["movie", "series"]:
-        cache_key += "_" + "_".join(
-            user_data.nudity_filter + user_data.certification_filter
-        )
+        cache_key += "_" + get_parental_profile(user_data)
 
     return cache_key, is_watchlist_catalog
 
@@ -541,9 +684,10 @@ async def get_meta(
         cached_data = await REDIS_ASYNC_CLIENT.get(cache_key)
         if cached_data:
             try:
-                meta_data = schemas.MetaItem.model_validate_json(cached_data)
+                meta_data = load_cached_model(schemas.MetaItem, cached_data)
                 return await update_rpdb_poster(meta_data, user_data, catalog_type)
-            except ValidationError:
+            except ValueError:
+                # Unreadable entries are treated as a miss and overwritten
                 pass
     else:
         response.headers.update(const.NO_CACHE_HEADERS)
@@ -565,7 +709,12 @@ async def get_meta(
     # Cache the data with a TTL of 30 minutes
     # If the data is not found, cached the empty data to avoid db query.
     if cache_key:
-        await REDIS_ASYNC_CLIENT.set(cache_key, json.dumps(data, default=str), ex=1800)
+        await set_tagged_cache(
+            meta_id,
+            cache_key,
+            encode_cache_value(json.dumps(data, default=str)),
+            ttl=1800,
+        )
 
     if not data:
         raise HTTPException(status_code=404, detail="Meta ID not found.")
@@ -610,7 +759,6 @@ async def get_streams(
     season: int = None,
     episode: int = None,
     user_data: schemas.UserData = Depends(get_user_data),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
 ):
     if "p2p" in settings.disabled_providers and not user_data.streaming_provider:
         return {"streams": []}
@@ -658,7 +806,7 @@ async def get_streams(
                 raise HTTPException(status_code=404, detail="Meta ID not found.")
         else:
             fetched_streams = await crud.get_movie_streams(
-                user_data, secret_str, video_id, user_ip, background_tasks
+                user_data, secret_str, video_id, user_ip
             )
             fetched_streams.extend(user_feeds)
     elif catalog_type == "series":
@@ -669,7 +817,6 @@ async def get_streams(
             season,
             episode,
             user_ip,
-            background_tasks,
         )
         fetched_streams.extend(user_feeds)
     elif catalog_type == "events":
@@ -801,7 +948,7 @@ async def get_poster(
     catalog_type: Literal["movie", "series", "tv", "events"],
     mediafusion_id: str,
 ):
-    cache_key = f"{catalog_type}_{mediafusion_id}.jpg"
+    cache_key = poster.get_poster_cache_key(catalog_type, mediafusion_id)
 
     # Check if the poster is cached in Redis
     cached_image = await REDIS_ASYNC_CLIENT.get(cache_key)
@@ -826,14 +973,8 @@ async def get_poster(
         return raise_poster_error(mediafusion_id, "Poster not found.")
 
     try:
-        image_byte_io = await poster.create_poster(mediafusion_data)
-        # Convert BytesIO to bytes for Redis
-        image_bytes = image_byte_io.getvalue()
-        # Save the generated image to Redis. expire in 7 days
-        await REDIS_ASYNC_CLIENT.set(cache_key, image_bytes, ex=604800)
-        image_byte_io.seek(0)
-
-        return StreamingResponse(image_byte_io, media_type="image/jpeg")
+        image_bytes = await poster.render_poster(catalog_type, mediafusion_data)
+        return StreamingResponse(BytesIO(image_bytes), media_type="image/jpeg")
     except asyncio.TimeoutError:
         return raise_poster_error(mediafusion_id, "Poster generation timeout.")
     except aiohttp.ClientResponseError as e:
@@ -872,7 +1013,6 @@ async def download_info(
     catalog_type: Literal["movie", "series"],
     video_id: str,
     user_data: Annotated[schemas.UserData, Depends(get_user_data)],
-    background_tasks: BackgroundTasks,
     season: int = None,
     episode: int = None,
 ):
@@ -896,12 +1036,10 @@ async def download_info(
     user_ip = await get_user_public_ip(request, user_data)
 
     if catalog_type == "movie":
-        streams = await crud.get_movie_streams(
-            user_data, secret_str, video_id, user_ip, background_tasks
-        )
+        streams = await crud.get_movie_streams(user_data, secret_str, video_id, user_ip)
     else:
         streams = await crud.get_series_streams(
-            user_data, secret_str, video_id, season, episode, user_ip, background_tasks
+            user_data, secret_str, video_id, season, episode, user_ip
         )
 
     streaming_provider_path = f"{settings.host_url}/streaming_provider/"
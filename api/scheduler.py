@@ -1,6 +1,7 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
+from db.catalog_stats import reconcile_catalog_stats_task
 from db.config import settings
 from mediafusion_scrapy.task import run_spider
 from scrapers.background_scraper import run_background_search
@@ -236,3 +237,13 @@ def setup_scheduler(scheduler: AsyncIOScheduler):
         name="background_search",
         kwargs={"crontab_expression": settings.background_search_crontab},
     )
+
+    if not settings.disable_reconcile_catalog_stats:
+        scheduler.add_job(
+            reconcile_catalog_stats_task.send,
+            CronTrigger.from_crontab(settings.reconcile_catalog_stats_crontab),
+            name="reconcile_catalog_stats",
+            kwargs={
+                "crontab_expression": settings.reconcile_catalog_stats_crontab,
+            },
+        )
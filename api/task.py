@@ -6,6 +6,7 @@ from utils import torrent
 
 # import background actors
 # noqa: F401
+from db import catalog_stats
 from mediafusion_scrapy import task
 from scrapers import (
     tv,
@@ -17,6 +18,7 @@ from scrapers import (
     scraper_tasks,
 )
 from streaming_providers import cache_helpers
+from streaming_providers.realdebrid import utils as realdebrid_utils
 from utils import validation_helper
 
 
@@ -0,0 +1,50 @@
+from db.redis_database import REDIS_ASYNC_CLIENT
+
+CACHE_TAG_PREFIX = "cache_tag:"
+
+# Adds a key to a tag and extends the tag's expiry to the key's TTL, never
+# shortening it, so the tag outlives every key recorded in it
+_add_to_tag = REDIS_ASYNC_CLIENT.register_script(
+    "redis.call('SADD', KEYS[1], ARGV[1]) "
+    "if redis.call('TTL', KEYS[1]) < tonumber(ARGV[2]) then "
+    "redis.call('EXPIRE', KEYS[1], ARGV[2]) end"
+)
+
+
+def get_cache_tag_key(meta_id: str) -> str:
+    """Set of the cache keys derived from the metadata of `meta_id`."""
+    return f"{CACHE_TAG_PREFIX}{meta_id}"
+
+
+async def tag_cache_key(pipe, meta_id: str, cache_key: str, ttl: int):
+    """
+    Queue on `pipe` the recording of `cache_key` in the tag of `meta_id`. The
+    tag lives as long as the longest lived key recorded in it.
+    """
+    await _add_to_tag(
+        keys=[get_cache_tag_key(meta_id)], args=[cache_key, ttl], client=pipe
+    )
+
+
+async def set_tagged_cache(meta_id: str, cache_key: str, value, ttl: int):
+    """Cache `value` under `cache_key` and record the key in the tag of `meta_id`."""
+    async with REDIS_ASYNC_CLIENT.pipeline(transaction=False) as pipe:
+        pipe.set(cache_key, value, ex=ttl)
+        await tag_cache_key(pipe, meta_id, cache_key, ttl)
+        await pipe.execute()
+
+
+async def invalidate_meta_cache(meta_id: str, *cache_keys: str):
+    """
+    Drop every cache key recorded in the tag of `meta_id` along with the
+    given fixed keys. Only the dropped members are removed from the tag, so
+    a key tagged meanwhile is left to the next invalidation.
+    """
+    tag_key = get_cache_tag_key(meta_id)
+    tagged_keys = await REDIS_ASYNC_CLIENT.smembers(tag_key)
+    async with REDIS_ASYNC_CLIENT.pipeline(transaction=False) as pipe:
+        if tagged_keys or cache_keys:
+            pipe.unlink(*tagged_keys, *cache_keys)
+        if tagged_keys:
+            pipe.srem(tag_key, *tagged_keys)
+        await pipe.execute()
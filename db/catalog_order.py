@@ -0,0 +1,197 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+from db.config import settings
+from db.redis_database import REDIS_ASYNC_CLIENT
+from utils.crypto import get_text_hash
+from utils.singleflight import RedisSingleFlight, SingleFlight
+
+CATALOG_ORDER_PREFIX = "catalog_order:"
+# Members can't be stored in an empty sorted set, an empty ordering holds
+# only this placeholder so that it is not rebuilt on every request.
+EMPTY_ORDER_MEMBER = ""
+
+_order_builds = SingleFlight(name="catalog_order")
+# A build scans every title of the catalog, the lease covers the longest scan
+_order_build_flight = RedisSingleFlight(
+    name="catalog_order", lease_ttl=600, result_ttl=60
+)
+_build_tasks: set[asyncio.Task] = set()
+# Adds to an ordering only while it exists, so an expired one isn't recreated
+# without its expiry and with a single member
+_add_if_exists = REDIS_ASYNC_CLIENT.register_script(
+    "if redis.call('EXISTS', KEYS[1]) == 1 then "
+    "return redis.call('ZADD', KEYS[1], 'GT', unpack(ARGV)) end return 0"
+)
+
+
+def get_variants_key(catalog: str) -> str:
+    """Hash of the live orderings of a catalog and the filter of each one."""
+    return f"{CATALOG_ORDER_PREFIX}{catalog}:variants"
+
+
+def get_catalog_order_key(catalog_type: str, catalog: str, match_filter: dict) -> str:
+    """
+    Key of the ordering of a catalog restricted to `match_filter`. Every
+    genre and parental filter combination gets its own ordering.
+    """
+    filter_hash = get_text_hash(
+        json.dumps(match_filter, sort_keys=True, default=str), full_hash=True
+    )
+    return f"{CATALOG_ORDER_PREFIX}{catalog_type}:{catalog}:{filter_hash}"
+
+
+def get_building_key(order_key: str) -> str:
+    return f"{order_key}:building"
+
+
+def _catalog_score(document: dict) -> float:
+    catalog_stats = document.get("catalog_stats") or [{}]
+    last_stream_added = catalog_stats[0].get("last_stream_added")
+    return last_stream_added.timestamp() if last_stream_added else 0
+
+
+async def _build_catalog_order(order_key: str, catalog: str, match_filter: dict) -> int:
+    from db.models import MediaFusionMetaData
+
+    # The variant is registered and the building ordering created before the
+    # scan, so that the stream count changes flushed during the scan are
+    # applied to the building ordering instead of being dropped
+    building_key = get_building_key(order_key)
+    async with REDIS_ASYNC_CLIENT.pipeline(transaction=True) as pipe:
+        pipe.delete(building_key)
+        pipe.zadd(building_key, {EMPTY_ORDER_MEMBER: float("-inf")})
+        pipe.expire(building_key, settings.catalog_order_ttl)
+        pipe.hset(
+            get_variants_key(catalog),
+            order_key,
+            json.dumps(match_filter, default=str),
+        )
+        pipe.expire(get_variants_key(catalog), settings.catalog_order_ttl)
+        await pipe.execute()
+
+    # Only the stats of this catalog are projected to score the titles
+    cursor = MediaFusionMetaData.get_motor_collection().find(
+        match_filter, {"catalog_stats": {"$elemMatch": {"catalog": catalog}}}
+    )
+    scores = {EMPTY_ORDER_MEMBER: float("-inf")}
+    async for document in cursor:
+        scores[document["_id"]] = _catalog_score(document)
+
+    async with REDIS_ASYNC_CLIENT.pipeline(transaction=True) as pipe:
+        # GT keeps the newer scores applied during the scan
+        pipe.zadd(building_key, scores, gt=True)
+        pipe.expire(building_key, settings.catalog_order_ttl)
+        pipe.rename(building_key, order_key)
+        await pipe.execute()
+    logging.debug(f"Built catalog order {order_key} with {len(scores) - 1} titles")
+    return len(scores) - 1
+
+
+async def _build_in_background(order_key: str, catalog: str, match_filter: dict):
+    try:
+        await _order_builds.do(
+            order_key,
+            lambda: _order_build_flight.lead_if_idle(
+                order_key,
+                lambda: _build_catalog_order(order_key, catalog, match_filter),
+                encode=str,
+            ),
+        )
+    except Exception as error:
+        logging.error(f"Failed to build catalog order {order_key}: {error}")
+
+
+async def get_catalog_page(
+    catalog_type: str, catalog: str, match_filter: dict, skip: int, limit: int
+) -> list[str] | None:
+    """
+    Meta ids of a catalog page, most recently updated first, read by rank from
+    the materialized ordering of the catalog and filter combination. Returns
+    None while the ordering is being built, one pod builds it in the background.
+    """
+    order_key = get_catalog_order_key(catalog_type, catalog, match_filter)
+    if not await REDIS_ASYNC_CLIENT.exists(order_key):
+        if order_key not in _order_builds:
+            task = asyncio.create_task(
+                _build_in_background(order_key, catalog, match_filter)
+            )
+            _build_tasks.add(task)
+            task.add_done_callback(_build_tasks.discard)
+        return None
+    meta_ids = await REDIS_ASYNC_CLIENT.zrevrange(order_key, skip, skip + limit - 1)
+    return [
+        meta_id.decode("utf-8")
+        for meta_id in meta_ids
+        if meta_id.decode("utf-8") != EMPTY_ORDER_MEMBER
+    ]
+
+
+async def update_catalog_orders(coalesced: dict[str, dict]):
+    """
+    Apply flushed stream count changes to the live orderings: titles that
+    gained streams are re-ranked (or added when they match the ordering's
+    filter) and titles left without streams in a catalog are removed.
+    """
+    from db.models import MediaFusionMetaData
+
+    added = defaultdict(dict)
+    removed = defaultdict(list)
+    for meta_id, stats in coalesced.items():
+        for catalog, catalog_stats in stats["catalogs"].items():
+            if catalog_stats["total_streams"] > 0:
+                added[catalog][meta_id] = catalog_stats["last_stream_added"]
+            elif catalog_stats["total_streams"] < 0:
+                removed[catalog].append(meta_id)
+
+    collection = MediaFusionMetaData.get_motor_collection()
+    for catalog in added.keys() | removed.keys():
+        variants = await REDIS_ASYNC_CLIENT.hgetall(get_variants_key(catalog))
+        if not variants:
+            continue
+
+        emptied = set()
+        if removed[catalog]:
+            still_listed = await collection.distinct(
+                "_id",
+                {
+                    "_id": {"$in": removed[catalog]},
+                    "catalog_stats": {
+                        "$elemMatch": {"catalog": catalog, "total_streams": {"$gt": 0}}
+                    },
+                },
+            )
+            emptied = set(removed[catalog]).difference(still_listed)
+
+        for order_key, match_filter in variants.items():
+            order_key = order_key.decode("utf-8")
+            # Orderings being built get the changes too
+            live_keys = [
+                key
+                for key in (order_key, get_building_key(order_key))
+                if await REDIS_ASYNC_CLIENT.exists(key)
+            ]
+            if not live_keys:
+                await REDIS_ASYNC_CLIENT.hdel(get_variants_key(catalog), order_key)
+                continue
+            if added[catalog]:
+                matching = await collection.distinct(
+                    "_id",
+                    {
+                        "$and": [
+                            json.loads(match_filter),
+                            {"_id": {"$in": list(added[catalog])}},
+                        ]
+                    },
+                )
+                members = []
+                for meta_id in matching:
+                    members.extend([added[catalog][meta_id], meta_id])
+                if members:
+                    for key in live_keys:
+                        await _add_if_exists(keys=[key], args=members)
+            if emptied:
+                for key in live_keys:
+                    await REDIS_ASYNC_CLIENT.zrem(key, *emptied)
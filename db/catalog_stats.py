@@ -0,0 +1,345 @@
+import asyncio
+import logging
+from datetime import datetime
+
+import dramatiq
+from pymongo import UpdateOne
+from redis.exceptions import LockNotOwnedError
+
+from db.config import settings
+from db.redis_database import REDIS_ASYNC_CLIENT
+from utils.lock import acquire_redis_lock, release_redis_lock
+
+CATALOG_STATS_EVENTS_KEY = "catalog_stats:events"
+CATALOG_STATS_LOCK_KEY = "catalog_stats:lock"
+# Renewed after every flushed batch and held by one reconcile batch at a time
+CATALOG_STATS_LOCK_TIMEOUT = 300
+
+
+async def record_catalog_stats_event(
+    meta_id: str, catalogs: list[str], delta: int, timestamp: datetime | None = None
+):
+    """
+    Queue a stream count change of a title for the write-behind flusher.
+    `delta` is the number of streams added (positive) or removed (negative)
+    and `timestamp` the newest created_at among the added streams.
+    """
+    if not meta_id or not delta:
+        return
+    await REDIS_ASYNC_CLIENT.xadd(
+        CATALOG_STATS_EVENTS_KEY,
+        {
+            "meta_id": meta_id,
+            "catalogs": ",".join(catalogs),
+            "delta": delta,
+            "timestamp": timestamp.timestamp() if timestamp else 0,
+        },
+        maxlen=settings.catalog_stats_max_pending_events,
+        approximate=True,
+    )
+
+
+def get_sortable_event_id(event_id: bytes | str) -> str:
+    """Stream entry id padded so that ids compare in stream order as strings."""
+    if isinstance(event_id, bytes):
+        event_id = event_id.decode()
+    milliseconds, sequence = event_id.split("-")
+    return f"{int(milliseconds):015d}-{int(sequence):010d}"
+
+
+def coalesce_catalog_stats_events(
+    events: list[tuple[bytes, dict]], applied_event_ids: dict[str, str] | None = None
+) -> dict[str, dict]:
+    """
+    Merge raw stream entries into one delta per meta_id and catalog, skipping
+    the entries up to the last event id already applied to each title.
+    """
+    applied_event_ids = applied_event_ids or {}
+    coalesced = {}
+    for event_id, fields in events:
+        meta_id = fields[b"meta_id"].decode()
+        event_id = get_sortable_event_id(event_id)
+        applied_event_id = applied_event_ids.get(meta_id)
+        if applied_event_id and event_id <= applied_event_id:
+            continue
+        delta = int(fields[b"delta"])
+        timestamp = float(fields[b"timestamp"])
+        catalogs = [cat for cat in fields[b"catalogs"].decode().split(",") if cat]
+
+        stats = coalesced.setdefault(
+            meta_id,
+            {
+                "total_streams": 0,
+                "last_stream_added": 0.0,
+                "catalogs": {},
+                "applied_event_id": applied_event_id,
+            },
+        )
+        stats["event_id"] = max(stats.get("event_id", event_id), event_id)
+        stats["total_streams"] += delta
+        if delta > 0:
+            stats["last_stream_added"] = max(stats["last_stream_added"], timestamp)
+        for cat in catalogs:
+            catalog_stats = stats["catalogs"].setdefault(
+                cat, {"total_streams": 0, "last_stream_added": 0.0}
+            )
+            catalog_stats["total_streams"] += delta
+            if delta > 0:
+                catalog_stats["last_stream_added"] = max(
+                    catalog_stats["last_stream_added"], timestamp
+                )
+    return coalesced
+
+
+def build_catalog_stats_operations(meta_id: str, stats: dict) -> list[UpdateOne]:
+    """
+    Translate the coalesced deltas of a title into ordered update operations:
+    push missing catalog entries, then $inc/$max every counter in one update,
+    then pull the catalogs left without streams.
+
+    The counter update also records the last applied event id and only
+    matches while the previously recorded one is unchanged, so a batch that
+    is retried or flushed twice is applied once. The other operations are
+    idempotent.
+    """
+    operations = []
+    update_ops = {
+        "$inc": {},
+        "$max": {},
+        "$set": {"catalog_stats_event_id": stats["event_id"]},
+    }
+    array_filters = []
+
+    if stats["total_streams"]:
+        update_ops["$inc"]["total_streams"] = stats["total_streams"]
+    if stats["last_stream_added"]:
+        update_ops["$max"]["last_stream_added"] = datetime.fromtimestamp(
+            stats["last_stream_added"]
+        )
+
+    has_removals = False
+    for index, (cat, catalog_stats) in enumerate(stats["catalogs"].items()):
+        if catalog_stats["total_streams"] > 0:
+            operations.append(
+                UpdateOne(
+                    {"_id": meta_id, "catalog_stats.catalog": {"$ne": cat}},
+                    {
+                        "$push": {
+                            "catalog_stats": {
+                                "catalog": cat,
+                                "total_streams": 0,
+                                "last_stream_added": None,
+                            }
+                        }
+                    },
+                )
+            )
+        elif catalog_stats["total_streams"] < 0:
+            has_removals = True
+        else:
+            continue
+
+        update_ops["$inc"][f"catalog_stats.$[c{index}].total_streams"] = catalog_stats[
+            "total_streams"
+        ]
+        if catalog_stats["last_stream_added"]:
+            update_ops["$max"][f"catalog_stats.$[c{index}].last_stream_added"] = (
+                datetime.fromtimestamp(catalog_stats["last_stream_added"])
+            )
+        array_filters.append({f"c{index}.catalog": cat})
+
+    update_ops = {operator: fields for operator, fields in update_ops.items() if fields}
+    operations.append(
+        UpdateOne(
+            {
+                "_id": meta_id,
+                "catalog_stats_event_id": stats["applied_event_id"],
+            },
+            update_ops,
+            array_filters=array_filters or None,
+        )
+    )
+    if has_removals:
+        operations.append(
+            UpdateOne(
+                {"_id": meta_id},
+                {"$pull": {"catalog_stats": {"total_streams": {"$lte": 0}}}},
+            )
+        )
+    return operations
+
+
+async def _flush_pending_events(lock) -> int:
+    from db.catalog_order import update_catalog_orders
+    from db.models import MediaFusionMetaData
+
+    collection = MediaFusionMetaData.get_motor_collection()
+    flushed = 0
+    while True:
+        events = await REDIS_ASYNC_CLIENT.xrange(
+            CATALOG_STATS_EVENTS_KEY, count=settings.catalog_stats_flush_batch_size
+        )
+        if not events:
+            return flushed
+
+        meta_ids = list({fields[b"meta_id"].decode() for _, fields in events})
+        applied_event_ids = {
+            document["_id"]: document.get("catalog_stats_event_id")
+            async for document in collection.find(
+                {"_id": {"$in": meta_ids}}, {"catalog_stats_event_id": 1}
+            )
+        }
+        coalesced = coalesce_catalog_stats_events(events, applied_event_ids)
+        operations = []
+        for meta_id, stats in coalesced.items():
+            operations.extend(build_catalog_stats_operations(meta_id, stats))
+        if operations:
+            await collection.bulk_write(operations, ordered=True)
+            if settings.enable_catalog_order_index:
+                try:
+                    await update_catalog_orders(coalesced)
+                except Exception as error:
+                    # The orderings are rebuilt from MongoDB once they expire
+                    logging.error(f"Failed to update catalog orders: {error}")
+
+        await REDIS_ASYNC_CLIENT.xdel(
+            CATALOG_STATS_EVENTS_KEY, *[event_id for event_id, _ in events]
+        )
+        flushed += len(events)
+        # Renew the lock for the next batch, a long backlog is drained by a
+        # single flusher
+        try:
+            await lock.reacquire()
+        except LockNotOwnedError:
+            logging.warning("Lost the catalog stats lock, stopping the flush")
+            return flushed
+
+
+async def flush_catalog_stats() -> int:
+    """
+    Apply every queued stream count change to the metadata documents.
+    Only one process flushes at a time; returns the number of events applied.
+    """
+    acquired, lock = await acquire_redis_lock(
+        CATALOG_STATS_LOCK_KEY, timeout=CATALOG_STATS_LOCK_TIMEOUT, block=False
+    )
+    if not acquired:
+        return 0
+    try:
+        flushed = await _flush_pending_events(lock)
+        if flushed:
+            logging.info(f"Flushed {flushed} catalog stats events")
+        return flushed
+    finally:
+        await release_redis_lock(lock)
+
+
+async def run_catalog_stats_flusher():
+    """Long-running task that flushes the catalog stats events periodically."""
+    while True:
+        await asyncio.sleep(settings.catalog_stats_flush_interval)
+        try:
+            await flush_catalog_stats()
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            logging.error(f"Error flushing catalog stats: {error}")
+
+
+async def _get_last_event_id() -> str | None:
+    last_events = await REDIS_ASYNC_CLIENT.xrevrange(CATALOG_STATS_EVENTS_KEY, count=1)
+    return get_sortable_event_id(last_events[0][0]) if last_events else None
+
+
+async def reconcile_catalog_stats(batch_size: int = 500):
+    """
+    Recompute total_streams, last_stream_added and catalog_stats of every
+    movie and series from their streams to correct any drift.
+
+    Each batch takes the flusher lock only while it aggregates and writes, and
+    records as applied the queued events up to the last one read after its
+    aggregation, since their streams were counted.
+    """
+    from db.models import MediaFusionMetaData, TorrentStreams
+
+    metadata_collection = MediaFusionMetaData.get_motor_collection()
+    streams_collection = TorrentStreams.get_motor_collection()
+    reconciled = 0
+    cursor = metadata_collection.find(
+        {"type": {"$in": ["movie", "series"]}}, {"_id": 1}
+    )
+    while meta_ids := [doc["_id"] for doc in await cursor.to_list(batch_size)]:
+        acquired, lock = await acquire_redis_lock(
+            CATALOG_STATS_LOCK_KEY, timeout=CATALOG_STATS_LOCK_TIMEOUT, block=True
+        )
+        if not acquired:
+            return
+        try:
+            await _reconcile_batch(meta_ids, metadata_collection, streams_collection)
+        finally:
+            await release_redis_lock(lock)
+        reconciled += len(meta_ids)
+    logging.info(f"Reconciled catalog stats of {reconciled} metadata")
+
+
+async def _reconcile_batch(
+    meta_ids: list[str], metadata_collection, streams_collection
+):
+    pipeline = [
+        {"$match": {"meta_id": {"$in": meta_ids}, "is_blocked": {"$ne": True}}},
+        {"$unwind": "$catalog"},
+        {
+            "$group": {
+                "_id": {"meta_id": "$meta_id", "catalog": "$catalog"},
+                "total_streams": {"$sum": 1},
+                "last_stream_added": {"$max": "$created_at"},
+            }
+        },
+    ]
+    totals_pipeline = [
+        {"$match": {"meta_id": {"$in": meta_ids}, "is_blocked": {"$ne": True}}},
+        {
+            "$group": {
+                "_id": "$meta_id",
+                "total_streams": {"$sum": 1},
+                "last_stream_added": {"$max": "$created_at"},
+            }
+        },
+    ]
+    catalog_stats = {meta_id: [] for meta_id in meta_ids}
+    async for group in streams_collection.aggregate(pipeline):
+        catalog_stats[group["_id"]["meta_id"]].append(
+            {
+                "catalog": group["_id"]["catalog"],
+                "total_streams": group["total_streams"],
+                "last_stream_added": group["last_stream_added"],
+            }
+        )
+    totals = {
+        group["_id"]: group
+        async for group in streams_collection.aggregate(totals_pipeline)
+    }
+    # Events are recorded after their stream is written, so every event
+    # queued by now belongs to a stream the aggregation has seen
+    last_event_id = await _get_last_event_id()
+
+    operations = []
+    for meta_id in meta_ids:
+        update = {
+            "catalog_stats": catalog_stats[meta_id],
+            "total_streams": totals.get(meta_id, {}).get("total_streams", 0),
+            "last_stream_added": totals.get(meta_id, {}).get("last_stream_added"),
+        }
+        if last_event_id:
+            update["catalog_stats_event_id"] = last_event_id
+        operations.append(UpdateOne({"_id": meta_id}, {"$set": update}))
+    await metadata_collection.bulk_write(operations, ordered=False)
+
+
+@dramatiq.actor(
+    time_limit=60 * 60 * 1000,  # 1 hour
+    priority=20,
+)
+async def reconcile_catalog_stats_task(**kwargs):
+    """Scheduled task to recompute catalog stats from the streams"""
+    await reconcile_catalog_stats()
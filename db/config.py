@@ -48,6 +48,31 @@ class Settings(BaseSettings):
     db_max_connections: int = 50
     redis_url: str = "redis://redis-service:6379"
     redis_max_connections: int = 100
+    torrent_streams_local_cache_size: int = 512
+    torrent_streams_local_cache_ttl: int = 60
+    rendered_streams_cache_ttl: int = 1800
+    cache_codec: Literal["json", "zlib"] = "zlib"
+    cache_compression_level: int = 1
+    cache_compression_min_size: int = 1024
+    downloaded_snapshot_ttl: int = 60
+    downloaded_snapshot_max_age: int = 900
+    debrid_connection_pool_size: int = 50
+    debrid_default_rate_limit: int = 250
+    playback_prefetch_count: int = 0
+    playback_prefetch_max_concurrency: int = 10
+    debrid_cache_backend: Literal["hash", "bucketed"] = "hash"
+    debrid_cache_shards: int = 16
+    enable_debrid_cache_filter: bool = True
+    debrid_cache_filter_capacity: int = 1_000_000
+    debrid_cache_filter_error_rate: float = 0.01
+    debrid_cache_filter_rebuild_interval: int = 21600
+    enable_title_search_index: bool = True
+    title_search_index_rebuild_interval: int = 3600
+    catalog_stats_flush_interval: int = 30
+    catalog_stats_flush_batch_size: int = 1000
+    catalog_stats_max_pending_events: int = 1000000
+    enable_catalog_order_index: bool = True
+    catalog_order_ttl: int = 86400
 
     # External Service URLs
     requests_proxy_url: str | None = None
@@ -80,6 +105,10 @@ class Settings(BaseSettings):
     mediafusion_url: str = "https://mediafusion.elfhosted.com"
     mediafusion_api_password: str | None = None
     sync_debrid_cache_streams: bool = False
+    mediafusion_submit_batch_interval: int = 500  # milliseconds
+    mediafusion_submit_batch_size: int = 500
+    mediafusion_negative_cache_ttl: int = 300
+    mediafusion_negative_cache_size: int = 100000
 
     # Zilean Settings
     is_scrap_from_zilean: bool = False
@@ -106,6 +135,12 @@ class Settings(BaseSettings):
     jackett_background_title_search: bool = True
     jackett_feed_scrape_interval_hour: int = 3
 
+    live_search_wait_timeout: int = 60
+    live_search_time_budget: int = 15
+    live_search_background_refresh: bool = False
+    live_search_max_staleness: int = 86400  # 24 hours
+    live_search_refresh_interval: int = 1800  # 30 minutes
+
     background_search_interval_hours: int = 72
     background_search_crontab: str = "*/3 * * * *"
 
@@ -141,6 +176,8 @@ class Settings(BaseSettings):
 
     # Time-related Settings
     meta_cache_ttl: int = 1800  # 30 minutes in seconds
+    enable_catalog_prefetch: bool = True
+    poster_prefetch_max_concurrency: int = 4
     worker_max_tasks_per_child: int = 20
 
     # Global Scheduler Settings
@@ -183,6 +220,8 @@ class Settings(BaseSettings):
     disable_jackett_feed_scraper: bool = False
     cleanup_expired_scraper_task_crontab: str = "0 * * * *"
     cleanup_expired_cache_task_crontab: str = "0 0 * * *"
+    reconcile_catalog_stats_crontab: str = "0 4 * * *"
+    disable_reconcile_catalog_stats: bool = False
 
     @model_validator(mode="after")
     def default_poster_host_url(self) -> "Settings":
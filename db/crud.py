@@ -10,11 +10,15 @@ import humanize
 from apscheduler.triggers.cron import CronTrigger
 from beanie import BulkWriter
 from beanie.exceptions import RevisionIdWasChanged
+from beanie.odm.utils.dump import get_dict
 from beanie.operators import Set
 from fastapi import BackgroundTasks
-from pymongo.errors import DuplicateKeyError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 from db import schemas
+from db.cache_tags import invalidate_meta_cache
+from db.catalog_order import get_catalog_page
 from db.config import settings
 from db.enums import NudityStatus
 from db.models import (
@@ -30,11 +34,26 @@ from db.models import (
 )
 from db.redis_database import REDIS_ASYNC_CLIENT
 from db.schemas import Stream, TorrentStreamsList
+from db.stream_cache import (
+    get_local_torrent_streams,
+    get_torrent_streams_cache_key,
+    invalidate_torrent_streams_cache,
+    set_local_torrent_streams,
+)
+from db.title_search import publish_title_search_updates, title_search_index
 from scrapers.dlhd import dlhd_schedule_service
 from scrapers.mdblist import initialize_mdblist_scraper
-from scrapers.scraper_tasks import run_scrapers, meta_fetcher
+from scrapers.scraper_tasks import (
+    get_live_search_age,
+    mark_live_search_refreshed,
+    meta_fetcher,
+    run_scrapers,
+    schedule_live_search_refresh,
+    schedule_stream_store,
+)
 from streaming_providers.cache_helpers import store_cached_info_hashes
 from utils import crypto
+from utils.cache_codec import dump_cached_model, load_cached_model
 from utils.const import (
     USER_UPLOAD_SUPPORTED_MOVIE_CATALOG_IDS,
     USER_UPLOAD_SUPPORTED_SERIES_CATALOG_IDS,
@@ -49,12 +68,18 @@ from utils.parser import (
     create_exception_stream,
     create_content_warning_message,
 )
+from utils.singleflight import SingleFlight, RedisSingleFlight
 from utils.validation_helper import (
     validate_parent_guide_nudity,
     get_filter_certification_values,
     is_video_file,
 )
 
+STREAMS_SINGLE_FLIGHT = SingleFlight(name="streams")
+STREAMS_REDIS_SINGLE_FLIGHT = RedisSingleFlight(
+    name="streams", lease_ttl=60, result_ttl=30
+)
+
 
 def apply_parental_guide_filters(
     user_data: schemas.UserData, match_filter: dict
@@ -68,7 +93,7 @@ def apply_parental_guide_filters(
             match_filter["parent_guide_nudity_status"] = {"$exists": True}
         elif user_data.nudity_filter:
             match_filter["parent_guide_nudity_status"] = {
-                "$nin": user_data.nudity_filter
+                "$nin": sorted(set(user_data.nudity_filter))
             }
 
     # Handle certification filter
@@ -144,6 +169,32 @@ async def get_meta_list(
 
     apply_parental_guide_filters(user_data, match_filter)
 
+    if not is_watchlist_catalog and settings.enable_catalog_order_index:
+        # Read the page by rank from the materialized catalog ordering, the
+        # sort below serves the page while the ordering is being built
+        meta_ids = await get_catalog_page(
+            catalog_type, catalog, match_filter, skip, limit
+        )
+    else:
+        meta_ids = None
+
+    if meta_ids is not None:
+        if not meta_ids:
+            return []
+        meta_list_raw = (
+            await MediaFusionMetaData.get_motor_collection()
+            .aggregate(
+                [
+                    {"$match": {"_id": {"$in": meta_ids}}},
+                    {"$set": {"poster": {"$concat": [poster_path, "$_id", ".jpg"]}}},
+                ]
+            )
+            .to_list(None)
+        )
+        rank = {meta_id: index for index, meta_id in enumerate(meta_ids)}
+        meta_list_raw.sort(key=lambda doc: rank[doc["_id"]])
+        return [schemas.Meta.model_validate(doc) for doc in meta_list_raw]
+
     # Define the pipeline
     pipeline = [
         {"$match": match_filter},
@@ -313,7 +364,10 @@ async def get_media_data_by_id(
     # Check cache first
     cached_data = await REDIS_ASYNC_CLIENT.get(f"{media_type}_data:{meta_id}")
     if cached_data:
-        return model_class.model_validate_json(cached_data)
+        try:
+            return load_cached_model(model_class, cached_data)
+        except ValueError as error:
+            logging.warning(f"Ignoring unreadable cached data of {meta_id}: {error}")
 
     lock_key = f"meta_id_lock:{meta_id}"
     _, redis_lock = await acquire_redis_lock(lock_key, timeout=30, block=True)
@@ -402,13 +456,40 @@ async def get_media_data_by_id(
     if media_data:
         await REDIS_ASYNC_CLIENT.set(
             f"{media_type}_data:{meta_id}",
-            media_data.model_dump_json(exclude_none=True),
+            dump_cached_model(media_data, exclude_none=True),
             ex=86400,  # 1 day
         )
     await release_redis_lock(redis_lock)
     return media_data
 
 
+async def load_media_data_by_ids(
+    meta_ids: list[str],
+    media_type: Literal["movie", "series"],
+    uncached_ids: set[str],
+) -> list[MediaFusionMovieMetaData | MediaFusionSeriesMetaData]:
+    """
+    Load the metadata of several titles with one query and fill the
+    `{media_type}_data` cache of those in `uncached_ids`. Titles missing from
+    the database are skipped.
+    """
+    model_class = (
+        MediaFusionMovieMetaData if media_type == "movie" else MediaFusionSeriesMetaData
+    )
+    media_data_list = await model_class.find({"_id": {"$in": meta_ids}}).to_list()
+
+    async with REDIS_ASYNC_CLIENT.pipeline(transaction=False) as pipe:
+        for media_data in media_data_list:
+            if media_data.id in uncached_ids:
+                pipe.set(
+                    f"{media_type}_data:{media_data.id}",
+                    dump_cached_model(media_data, exclude_none=True),
+                    ex=86400,  # 1 day
+                )
+        await pipe.execute()
+    return media_data_list
+
+
 async def get_movie_data_by_id(movie_id: str) -> Optional[MediaFusionMovieMetaData]:
     return await get_media_data_by_id(
         movie_id, "movie", MediaFusionMovieMetaData, MediaFusionSeriesMetaData
@@ -432,14 +513,22 @@ async def get_cached_torrent_streams(
     season: Optional[int] = None,
     episode: Optional[int] = None,
 ) -> list[TorrentStreams]:
-    # Create a unique key for Redis
+    # Hot titles are served from the per-worker cache without touching Redis
+    local_streams = get_local_torrent_streams(cache_key)
+    if local_streams is not None:
+        return local_streams
+
     # Try to get the data from the Redis cache
     cached_data = await REDIS_ASYNC_CLIENT.get(cache_key)
-
+    streams = None
     if cached_data is not None:
         # If the data is in the cache, deserialize it and return it
-        streams = TorrentStreamsList.model_validate_json(cached_data).streams
-    else:
+        try:
+            streams = load_cached_model(TorrentStreamsList, cached_data).streams
+        except ValueError as error:
+            logging.warning(f"Ignoring unreadable cached streams {cache_key}: {error}")
+
+    if streams is None:
         # If the data is not in the cache, query it from the database
         if season is not None and episode is not None:
             streams = await TorrentStreams.find(
@@ -464,15 +553,30 @@ async def get_cached_torrent_streams(
         # Serialize the data and store it in the Redis cache for 30 minutes
         await REDIS_ASYNC_CLIENT.set(
             cache_key,
-            torrent_streams.model_dump_json(
-                exclude_none=True, exclude={"streams": {"__all__": {"torrent_file"}}}
+            dump_cached_model(
+                torrent_streams,
+                exclude_none=True,
+                exclude={"streams": {"__all__": {"torrent_file"}}},
             ),
             ex=1800,
         )
 
+    set_local_torrent_streams(cache_key, streams)
     return streams
 
 
+def encode_torrent_streams(streams: list[TorrentStreams]) -> bytes:
+    return dump_cached_model(
+        TorrentStreamsList(streams=streams),
+        exclude_none=True,
+        exclude={"streams": {"__all__": {"torrent_file"}}},
+    )
+
+
+def decode_torrent_streams(data: bytes) -> list[TorrentStreams]:
+    return load_cached_model(TorrentStreamsList, data).streams
+
+
 async def get_streams_base(
     user_data,
     secret_str: str,
@@ -481,7 +585,6 @@ async def get_streams_base(
     content_type: str,
     content_catalogs: list[str],
     user_ip: str | None,
-    background_tasks: BackgroundTasks,
     season: int | None = None,
     episode: int | None = None,
 ) -> list[Stream]:
@@ -496,7 +599,6 @@ async def get_streams_base(
         content_type: Type of content ("movie" or "series")
         content_catalogs: List of supported catalogs for the content
         user_ip: User's IP address
-        background_tasks: Background tasks manager
         season: Season number (for series only)
         episode: Episode number (for series only)
     """
@@ -541,45 +643,63 @@ async def get_streams_base(
 
     # Handle stream caching and live search
     live_search_streams = user_data.live_search_streams and video_id.startswith("tt")
-    cache_key_parts = [video_id]
     if content_type == "series":
-        cache_key_parts.extend([str(season), str(episode)])
-
-    cache_key = f"torrent_streams:{':'.join(cache_key_parts)}"
-    lock_key = f"{cache_key}_lock" if live_search_streams else None
-    redis_lock = None
-
-    if lock_key:
-        _, redis_lock = await acquire_redis_lock(lock_key, timeout=60, block=True)
+        cache_key = get_torrent_streams_cache_key(video_id, season, episode)
+    else:
+        cache_key = get_torrent_streams_cache_key(video_id)
 
-    # Get cached streams
-    cached_streams = await get_cached_torrent_streams(
-        cache_key,
-        video_id,
-        season,
-        episode,
-    )
+    async def fetch_cached_streams() -> list[TorrentStreams]:
+        return await get_cached_torrent_streams(cache_key, video_id, season, episode)
 
-    # Handle live search and stream updates
-    if live_search_streams:
+    async def fetch_live_search_streams() -> list[TorrentStreams]:
+        cached_streams = await fetch_cached_streams()
         new_streams = await run_scrapers(
             user_data=user_data,
             metadata=metadata,
             catalog_type=content_type,
             season=season,
             episode=episode,
+            time_budget=settings.live_search_time_budget,
         )
-        all_streams = list(set(cached_streams).union(new_streams))
-
+        await mark_live_search_refreshed(cache_key)
         if new_streams:
-            await REDIS_ASYNC_CLIENT.delete(cache_key)
-            background_tasks.add_task(
-                store_new_torrent_streams, new_streams, redis_lock=redis_lock
-            )
-        else:
-            await release_redis_lock(redis_lock)
+            # Stored outside the request, the caches are dropped once stored
+            schedule_stream_store(new_streams, video_id, season, episode)
+        return list(set(cached_streams).union(new_streams))
+
+    # Stale-while-revalidate: serve the stored streams right away while the
+    # scrapers refresh them in a worker, unless the last live search for this
+    # title is older than the allowed staleness.
+    if live_search_streams and settings.live_search_background_refresh:
+        live_search_age = await get_live_search_age(cache_key)
+        if live_search_age is not None:
+            live_search_streams = False
+            if live_search_age >= settings.live_search_refresh_interval:
+                await schedule_live_search_refresh(
+                    user_data,
+                    video_id,
+                    content_type,
+                    cache_key,
+                    season=season,
+                    episode=episode,
+                )
+
+    # Concurrent requests for the same title share one DB fetch / scraper run,
+    # locally through SingleFlight and across pods through RedisSingleFlight.
+    if live_search_streams:
+        all_streams = await STREAMS_SINGLE_FLIGHT.do(
+            f"{cache_key}:live_search",
+            lambda: STREAMS_REDIS_SINGLE_FLIGHT.do(
+                cache_key,
+                fetch_live_search_streams,
+                encode=encode_torrent_streams,
+                decode=decode_torrent_streams,
+                wait_timeout=settings.live_search_wait_timeout,
+                on_timeout=fetch_cached_streams,
+            ),
+        )
     else:
-        all_streams = cached_streams
+        all_streams = await STREAMS_SINGLE_FLIGHT.do(cache_key, fetch_cached_streams)
 
     # Parse and return results
     parsed_results = await parse_stream_data(
@@ -599,7 +719,6 @@ async def get_movie_streams(
     secret_str: str,
     video_id: str,
     user_ip: str | None,
-    background_tasks: BackgroundTasks,
 ) -> list[Stream]:
     """Get streams for a movie."""
     movie_metadata = await get_movie_data_by_id(video_id)
@@ -611,7 +730,6 @@ async def get_movie_streams(
         content_type="movie",
         content_catalogs=USER_UPLOAD_SUPPORTED_MOVIE_CATALOG_IDS,
         user_ip=user_ip,
-        background_tasks=background_tasks,
     )
 
 
@@ -622,7 +740,6 @@ async def get_series_streams(
     season: int,
     episode: int,
     user_ip: str | None,
-    background_tasks: BackgroundTasks,
 ) -> list[Stream]:
     """Get streams for a series episode."""
     series_metadata = await get_series_data_by_id(video_id)
@@ -634,36 +751,85 @@ async def get_series_streams(
         content_type="series",
         content_catalogs=USER_UPLOAD_SUPPORTED_SERIES_CATALOG_IDS,
         user_ip=user_ip,
-        background_tasks=background_tasks,
         season=season,
         episode=episode,
     )
 
 
 async def store_new_torrent_streams(
-    streams: list[TorrentStreams] | set[TorrentStreams], redis_lock=None
+    streams: list[TorrentStreams] | set[TorrentStreams],
 ):
+    """
+    Bulk ingest scraped streams. Existing streams only get their seeders
+    refreshed and new ones are upserted, all in one bulk_write. The metadata
+    of every affected title is then updated once per meta_id, bypassing the
+    per-document Insert hooks.
+    """
     if not streams:
         return
-    bulk_writer = BulkWriter()
 
-    for stream in streams:
-        try:
-            existing_stream = await TorrentStreams.get(stream.id)
-            if existing_stream:
-                update_data = {"seeders": stream.seeders, "updated_at": datetime.now()}
-                await existing_stream.update(Set(update_data), bulk_writer=bulk_writer)
-                logging.info("Updated stream %s for %s", stream.id, stream.meta_id)
-            else:
-                await TorrentStreams.insert(stream)
-        except DuplicateKeyError:
-            logging.warning(
-                "Duplicate stream found: %s for %s", stream.id, stream.meta_id
+    streams_by_id = {stream.id: stream for stream in streams}
+    collection = TorrentStreams.get_motor_collection()
+    existing_ids = {
+        doc["_id"]
+        async for doc in collection.find(
+            {"_id": {"$in": list(streams_by_id)}}, {"_id": 1}
+        )
+    }
+
+    now = datetime.now()
+    operations = []
+    for info_hash, stream in streams_by_id.items():
+        if info_hash in existing_ids:
+            operations.append(
+                UpdateOne(
+                    {"_id": info_hash},
+                    {"$set": {"seeders": stream.seeders, "updated_at": now}},
+                )
+            )
+        else:
+            # The bulk path bypasses the document hooks
+            stream.refresh_display_fields()
+            document = get_dict(stream, to_db=True)
+            document.pop("_id", None)
+            operations.append(
+                UpdateOne({"_id": info_hash}, {"$setOnInsert": document}, upsert=True)
             )
 
-    await bulk_writer.commit()
-    if redis_lock:
-        await release_redis_lock(redis_lock)
+    try:
+        result = await collection.bulk_write(operations, ordered=False)
+        upserted_ids = set(result.upserted_ids.values())
+    except BulkWriteError as error:
+        # Concurrent ingestion of the same stream ends up as a duplicate key
+        logging.warning(
+            "Bulk write of %s streams had %s errors",
+            len(operations),
+            len(error.details.get("writeErrors", [])),
+        )
+        upserted_ids = {item["_id"] for item in error.details.get("upserted", [])}
+
+    new_streams_by_meta_id: dict[str, list[TorrentStreams]] = {}
+    for info_hash in upserted_ids:
+        stream = streams_by_id[info_hash]
+        new_streams_by_meta_id.setdefault(stream.meta_id, []).append(stream)
+
+    for meta_id, new_streams in new_streams_by_meta_id.items():
+        await TorrentStreams.apply_new_streams_to_metadata(meta_id, new_streams)
+        logging.info("Added %s new streams to %s", len(new_streams), meta_id)
+
+    logging.info(
+        "Stored %s streams: %s new, %s updated",
+        len(streams_by_id),
+        len(upserted_ids),
+        len(existing_ids),
+    )
+    await invalidate_torrent_streams_cache(
+        *{
+            stream.meta_id
+            for stream in streams_by_id.values()
+            if stream.meta_id not in new_streams_by_meta_id
+        }
+    )
 
 
 async def get_tv_streams(video_id: str, namespace: str, user_data) -> list[Stream]:
@@ -926,6 +1092,7 @@ async def get_or_create_metadata(
             new_data = create_metadata_object(metadata, imdb_data, metadata_class)
             try:
                 await new_data.create()
+                await publish_title_search_updates([new_data.id])
             except DuplicateKeyError:
                 logging.warning("Duplicate %s found: %s", media_type, new_data.title)
     else:
@@ -1049,9 +1216,7 @@ async def save_metadata(
             logging.warning("No episodes found for series %s", metadata["title"])
             return
         new_stream.episode_files = episodes
-        cache_keys = await REDIS_ASYNC_CLIENT.keys(f"series_{metadata['id']}_meta*")
-        cache_keys.append(f"series_data:{metadata['id']}")
-        await REDIS_ASYNC_CLIENT.delete(*cache_keys)
+        await invalidate_meta_cache(metadata["id"], f"series_data:{metadata['id']}")
 
     await new_stream.create()
     if should_organize_episodes:
@@ -1076,6 +1241,9 @@ async def save_series_metadata(metadata: dict, is_search_imdb_title: bool = True
 async def process_search_query(
     search_query: str, catalog_type: str, user_data: schemas.UserData
 ) -> dict:
+    if settings.enable_title_search_index and title_search_index.ready:
+        return await process_indexed_search_query(search_query, catalog_type, user_data)
+
     # Create regex pattern for partial matching
     regex_pattern = f".*{search_query}.*"
 
@@ -1090,7 +1258,11 @@ async def process_search_query(
         nudity_conditions = []
         if user_data.nudity_filter:
             nudity_conditions.append(
-                {"parent_guide_nudity_status": {"$nin": user_data.nudity_filter}}
+                {
+                    "parent_guide_nudity_status": {
+                        "$nin": sorted(set(user_data.nudity_filter))
+                    }
+                }
             )
         if "Unknown" in user_data.nudity_filter:
             nudity_conditions.append({"parent_guide_nudity_status": {"$exists": True}})
@@ -1249,6 +1421,39 @@ async def process_search_query(
     return {"metas": search_results}
 
 
+async def process_indexed_search_query(
+    search_query: str, catalog_type: str, user_data: schemas.UserData
+) -> dict:
+    """Search titles in the in-process index and load the matches by id."""
+    meta_ids = title_search_index.search(search_query, catalog_type, user_data)
+    if not meta_ids:
+        return {"metas": []}
+
+    search_results = (
+        await MediaFusionMetaData.get_motor_collection()
+        .aggregate(
+            [
+                {"$match": {"_id": {"$in": meta_ids}}},
+                {
+                    "$set": {
+                        "poster": {
+                            "$concat": [
+                                f"{settings.poster_host_url}/poster/{catalog_type}/",
+                                "$_id",
+                                ".jpg",
+                            ]
+                        }
+                    }
+                },
+            ]
+        )
+        .to_list(len(meta_ids))
+    )
+    rank = {meta_id: index for index, meta_id in enumerate(meta_ids)}
+    search_results.sort(key=lambda doc: rank[doc["_id"]])
+    return {"metas": search_results}
+
+
 async def process_tv_search_query(search_query: str, namespace: str) -> dict:
     pipeline = [
         {
@@ -1720,10 +1925,9 @@ async def update_metadata(imdb_ids: list[str], metadata_type: str):
             {"$set": update_data},
         )
         logging.info(f"Updated metadata for {metadata_type} {meta_id}")
+        await publish_title_search_updates([meta_id])
 
-        cache_keys = await REDIS_ASYNC_CLIENT.keys(f"{metadata_type}_{meta_id}_meta*")
-        cache_keys.append(f"{metadata_type}_data:{meta_id}")
-        await REDIS_ASYNC_CLIENT.delete(*cache_keys)
+        await invalidate_meta_cache(meta_id, f"{metadata_type}_data:{meta_id}")
 
 
 async def fetch_metadata(imdb_ids: list[str], metadata_type: str):
@@ -1817,8 +2021,6 @@ async def update_meta_stream(
             },
         )
 
-    cache_keys = await REDIS_ASYNC_CLIENT.keys(f"{meta_type}_{meta_id}_meta*")
-    cache_keys.append(f"{meta_type}_data:{meta_id}")
-    await REDIS_ASYNC_CLIENT.delete(*cache_keys)
+    await invalidate_meta_cache(meta_id, f"{meta_type}_data:{meta_id}")
     logging.info(f"Updated stream metadata for {meta_id}")
     return update_data
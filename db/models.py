@@ -11,12 +11,16 @@ from beanie import (
     before_event,
     Update,
     Replace,
+    SaveChanges,
 )
 from pydantic import BaseModel, Field, ConfigDict, field_validator, model_validator
 from pymongo import IndexModel, ASCENDING, DESCENDING, TEXT
 
+from db.cache_tags import invalidate_meta_cache
+from db.catalog_stats import record_catalog_stats_event
 from db.enums import TorrentType, NudityStatus
-from db.redis_database import REDIS_ASYNC_CLIENT
+from db.stream_cache import invalidate_torrent_streams_cache
+from utils.stream_display import build_stream_display_fields
 
 
 class EpisodeFile(BaseModel):
@@ -57,6 +61,8 @@ class MediaFusionMetaData(Document):
     catalog_stats: list[CatalogStats] = Field(default_factory=list)
     last_stream_added: datetime | None = Field(default_factory=datetime.now)
     total_streams: int | None = 0
+    # Last catalog stats event applied to the counters, see db.catalog_stats
+    catalog_stats_event_id: str | None = None
 
     class Settings:
         is_root = True
@@ -98,6 +104,16 @@ class KnownFile(BaseModel):
     filename: str
 
 
+class StreamDisplayFields(BaseModel):
+    torrent_title: str
+    quality_detail: str
+    resolution: str
+    size: str
+    languages: str | None = None
+    language_flags: str | None = None
+    source: str
+
+
 class TorrentStreams(Document):
     model_config = ConfigDict(extra="allow")
 
@@ -126,165 +142,127 @@ class TorrentStreams(Document):
     is_blocked: Optional[bool] = False
     torrent_file: bytes | None = None
     known_file_details: Optional[list[KnownFile]] = None
+    display_fields: Optional[StreamDisplayFields] = None
+
+    @before_event([Insert, Replace, SaveChanges])
+    async def update_display_fields(self):
+        """Pre-format the description segments whenever the document is written"""
+        self.refresh_display_fields()
+
+    @after_event(Update)
+    async def sync_display_fields(self):
+        """
+        Partial updates only write their own operators, store the display
+        fields again when the updated stream changed them.
+        """
+        display_fields = StreamDisplayFields(**build_stream_display_fields(self))
+        if display_fields == self.display_fields:
+            return
+        self.display_fields = display_fields
+        await TorrentStreams.get_motor_collection().update_one(
+            {"_id": self.id}, {"$set": {"display_fields": display_fields.model_dump()}}
+        )
 
     @after_event(Insert)
     async def update_metadata_on_create(self):
         """Update metadata when a new stream is created"""
-        # Initialize update operations for total stream count
-        update_ops = {
-            "$inc": {"total_streams": 1},
-            "$set": {"last_stream_added": self.created_at},
-        }
+        await self.apply_new_streams_to_metadata(self.meta_id, [self])
+        logging.info(f"Added stream {self.id} to metadata {self.meta_id}")
 
-        # Update catalog_stats array
-        for cat in self.catalog:
-            # Try to update existing catalog stats first
-            result = await MediaFusionMetaData.get_motor_collection().update_one(
-                {"_id": self.meta_id, "catalog_stats.catalog": cat},
-                {
-                    "$inc": {"catalog_stats.$.total_streams": 1},
-                    "$set": {
-                        "catalog_stats.$.last_stream_added": self.created_at,
-                        **update_ops["$set"],
-                    },
-                },
-            )
+    @classmethod
+    async def apply_new_streams_to_metadata(
+        cls, meta_id: str, streams: list["TorrentStreams"]
+    ):
+        """
+        Queue the stream count changes of a title for newly inserted streams
+        and add any new series episodes to its metadata.
+        """
+        if not streams:
+            return
 
-            # If no existing catalog stats found, add new one
-            if result.modified_count == 0:
-                # Initialize $push.catalog_stats.$each if it doesn't exist yet
-                if "$push" not in update_ops:
-                    update_ops["$push"] = {}
-                if "catalog_stats" not in update_ops["$push"]:
-                    update_ops["$push"]["catalog_stats"] = {"$each": []}
-
-                # Add this catalog to the $each array
-                update_ops["$push"]["catalog_stats"]["$each"].append(
-                    {
-                        "catalog": cat,
-                        "total_streams": 1,
-                        "last_stream_added": self.created_at,
-                    }
-                )
+        # total_streams, last_stream_added and catalog_stats are applied by
+        # the write-behind flusher in db.catalog_stats
+        created_at_by_catalogs: dict[tuple[str, ...], list[datetime]] = {}
+        for stream in streams:
+            created_at_by_catalogs.setdefault(tuple(stream.catalog), []).append(
+                stream.created_at
+            )
+        for catalogs, created_at in created_at_by_catalogs.items():
+            await record_catalog_stats_event(
+                meta_id, list(catalogs), len(created_at), max(created_at)
+            )
 
         # Handle episode metadata updates for series
-        if self.episode_files:
-            series_data = await MediaFusionSeriesMetaData.get(self.meta_id)
+        if any(stream.episode_files for stream in streams):
+            collection = MediaFusionMetaData.get_motor_collection()
+            series_data = await collection.find_one(
+                {"_id": meta_id, "type": "series"},
+                {"episodes.season_number": 1, "episodes.episode_number": 1},
+            )
             if series_data:
                 existing_episodes = {
-                    (ep.season_number, ep.episode_number): ep
-                    for ep in series_data.episodes
+                    (ep["season_number"], ep["episode_number"])
+                    for ep in series_data.get("episodes") or []
                 }
-
                 new_episodes = []
-                for ep in self.episode_files:
-                    key = (ep.season_number, ep.episode_number)
-                    if key not in existing_episodes:
+                for stream in streams:
+                    for ep in stream.episode_files or []:
+                        key = (ep.season_number, ep.episode_number)
+                        if key in existing_episodes:
+                            continue
+                        existing_episodes.add(key)
                         new_episodes.append(
                             SeriesEpisode(
                                 season_number=ep.season_number,
                                 episode_number=ep.episode_number,
                                 title=ep.title or f"Episode {ep.episode_number}",
-                                released=ep.released or self.created_at,
+                                released=ep.released or stream.created_at,
                                 overview=ep.overview,
                                 thumbnail=ep.thumbnail,
                             )
                         )
 
                 if new_episodes:
-                    update_ops["$push"] = update_ops.get("$push", {})
-                    update_ops["$push"]["episodes"] = {
-                        "$each": [ep.model_dump() for ep in new_episodes]
-                    }
-                    cache_keys = await REDIS_ASYNC_CLIENT.keys(
-                        f"series_{self.meta_id}_meta*"
+                    await collection.update_one(
+                        {"_id": meta_id},
+                        {
+                            "$push": {
+                                "episodes": {
+                                    "$each": [ep.model_dump() for ep in new_episodes]
+                                }
+                            }
+                        },
                     )
-                    cache_keys.append(f"series_data:{self.meta_id}")
-                    await REDIS_ASYNC_CLIENT.delete(*cache_keys)
+                    await invalidate_meta_cache(meta_id, f"series_data:{meta_id}")
 
-        await MediaFusionMetaData.get_motor_collection().update_one(
-            {"_id": self.meta_id}, update_ops
-        )
-        logging.info(f"Added stream {self.id} to metadata {self.meta_id}")
+        await invalidate_torrent_streams_cache(meta_id)
 
     @after_event(Delete)
     async def update_metadata_on_delete(self):
         """Update metadata when a stream is deleted"""
-        # Get all remaining streams for this meta_id grouped by catalog
-        pipeline = [
-            {
-                "$match": {
-                    "meta_id": self.meta_id,
-                    "_id": {"$ne": self.id},
-                    "is_blocked": {"$ne": True},
-                }
-            },
-            {"$unwind": "$catalog"},
-            {
-                "$group": {
-                    "_id": "$catalog",
-                    "total_streams": {"$sum": 1},
-                    "last_stream_added": {"$max": "$created_at"},
-                }
-            },
-        ]
-
-        remaining_streams = (
-            await TorrentStreams.get_motor_collection()
-            .aggregate(pipeline)
-            .to_list(None)
-        )
-        remaining_catalogs = {stream["_id"] for stream in remaining_streams}
-
-        # Build update operations
-        update_ops = {
-            "$inc": {"total_streams": -1},
-            "$pull": {
-                "catalog_stats": {
-                    "catalog": {
-                        "$in": [
-                            cat for cat in self.catalog if cat not in remaining_catalogs
-                        ]
-                    }
-                }
-            },
-        }
-
-        # Update remaining catalog stats
-        for stream in remaining_streams:
-            await MediaFusionMetaData.get_motor_collection().update_one(
-                {"_id": self.meta_id, "catalog_stats.catalog": stream["_id"]},
-                {
-                    "$set": {
-                        "catalog_stats.$.total_streams": stream["total_streams"],
-                        "catalog_stats.$.last_stream_added": stream[
-                            "last_stream_added"
-                        ],
-                    }
-                },
-            )
-
-        # Update last_stream_added
-        if remaining_streams:
-            update_ops["$set"] = {
-                "last_stream_added": max(
-                    stream["last_stream_added"] for stream in remaining_streams
-                )
-            }
-        else:
-            update_ops["$set"] = {"last_stream_added": None}
-
-        await MediaFusionMetaData.get_motor_collection().update_one(
-            {"_id": self.meta_id}, update_ops
-        )
+        # A blocked stream was already taken out of the counters when blocked
+        if not self.is_blocked:
+            await self.remove_from_metadata_stats()
+        await invalidate_torrent_streams_cache(self.meta_id)
         logging.info(f"Removed stream {self.id} from metadata {self.meta_id}")
 
+    async def remove_from_metadata_stats(self):
+        # Counters are decremented by the catalog stats flusher; the periodic
+        # reconciliation recomputes last_stream_added from the remaining streams.
+        await record_catalog_stats_event(self.meta_id, self.catalog, -1)
+
     @before_event(Update)
     async def update_metadata_on_block(self):
         """Update metadata when a stream is blocked"""
-        if hasattr(self, "is_blocked") and self.is_blocked:
-            logging.info(f"Stream {self.id} is blocked")
-            await self.update_metadata_on_delete()
+        if not getattr(self, "is_blocked", False):
+            return
+        # Only count the transition, later saves of a blocked stream don't
+        old_stream = await TorrentStreams.get(self.id)
+        if not old_stream or old_stream.is_blocked:
+            return
+        logging.info(f"Stream {self.id} is blocked")
+        await self.remove_from_metadata_stats()
+        await invalidate_torrent_streams_cache(self.meta_id)
 
     @before_event(Update)
     async def update_metadata_on_change(self):
@@ -297,6 +275,8 @@ class TorrentStreams(Document):
         if not old_stream or old_stream.episode_files == self.episode_files:
             return
 
+        await invalidate_torrent_streams_cache(self.meta_id)
+
         series_data = await MediaFusionSeriesMetaData.get(self.meta_id)
         if not series_data:
             return
@@ -327,9 +307,7 @@ class TorrentStreams(Document):
                     }
                 },
             )
-            cache_keys = await REDIS_ASYNC_CLIENT.keys(f"series_{self.meta_id}_meta*")
-            cache_keys.append(f"series_data:{self.meta_id}")
-            await REDIS_ASYNC_CLIENT.delete(*cache_keys)
+            await invalidate_meta_cache(self.meta_id, f"series_data:{self.meta_id}")
             logging.info(f"Updated episodes for series {self.meta_id}")
 
     def __eq__(self, other):
@@ -380,6 +358,16 @@ class TorrentStreams(Document):
         ]
         return sorted(episodes, key=lambda ep: ep.size or 0, reverse=True)
 
+    def refresh_display_fields(self) -> StreamDisplayFields:
+        self.display_fields = StreamDisplayFields(**build_stream_display_fields(self))
+        return self.display_fields
+
+    def get_display_fields(self) -> StreamDisplayFields:
+        """Stored display fields, computed on the fly for older documents"""
+        if self.display_fields is None:
+            return StreamDisplayFields(**build_stream_display_fields(self))
+        return self.display_fields
+
 
 class TVStreams(Document):
     meta_id: str
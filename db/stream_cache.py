@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from db.config import settings
+from db.redis_database import REDIS_ASYNC_CLIENT
+from utils.cache_codec import decode_cache_value, encode_cache_value
+from utils.local_cache import LocalTTLCache
+
+TORRENT_STREAMS_CACHE_PREFIX = "torrent_streams:"
+TORRENT_STREAMS_INVALIDATION_CHANNEL = "torrent_streams_invalidation"
+RENDERED_STREAMS_CACHE_PREFIX = "rendered_streams:"
+
+# Per-worker cache of already validated TorrentStreams lists keyed by the
+# same `torrent_streams:{meta_id}[:{season}:{episode}]` key used in Redis.
+TORRENT_STREAMS_LOCAL_CACHE = LocalTTLCache(
+    maxsize=settings.torrent_streams_local_cache_size,
+    ttl=settings.torrent_streams_local_cache_ttl,
+)
+
+
+def get_torrent_streams_cache_key(
+    meta_id: str, season: Optional[int] = None, episode: Optional[int] = None
+) -> str:
+    cache_key_parts = [meta_id]
+    if season is not None and episode is not None:
+        cache_key_parts.extend([str(season), str(episode)])
+    return f"{TORRENT_STREAMS_CACHE_PREFIX}{':'.join(cache_key_parts)}"
+
+
+def get_local_torrent_streams(cache_key: str) -> Optional[list]:
+    streams = TORRENT_STREAMS_LOCAL_CACHE.get(cache_key)
+    # Hand out a shallow copy so callers can't reorder the cached list
+    return list(streams) if streams is not None else None
+
+
+def set_local_torrent_streams(cache_key: str, streams: list) -> None:
+    TORRENT_STREAMS_LOCAL_CACHE.set(cache_key, list(streams))
+
+
+def drop_local_torrent_streams(meta_id: str) -> int:
+    """Remove all locally cached stream lists (movie or any episode) for a meta_id."""
+    base_key = f"{TORRENT_STREAMS_CACHE_PREFIX}{meta_id}"
+    return TORRENT_STREAMS_LOCAL_CACHE.invalidate_where(
+        lambda key: key == base_key or key.startswith(f"{base_key}:")
+    )
+
+
+def get_rendered_streams_cache_key(meta_id: str) -> str:
+    return f"{RENDERED_STREAMS_CACHE_PREFIX}{meta_id}"
+
+
+def get_rendered_streams_field(
+    fingerprint: str, season: Optional[int] = None, episode: Optional[int] = None
+) -> str:
+    return f"{season}:{episode}:{fingerprint}"
+
+
+async def get_rendered_streams(meta_id: str, field: str) -> dict[str, list[dict]]:
+    """
+    Return the cached rendered stream templates of a title for one render
+    profile, keyed by info_hash. Missing or unreadable entries yield {}.
+    """
+    try:
+        cached = await REDIS_ASYNC_CLIENT.hget(
+            get_rendered_streams_cache_key(meta_id), field
+        )
+        return json.loads(decode_cache_value(cached)) if cached else {}
+    except Exception as error:
+        logging.error(f"Failed to load rendered streams for {meta_id}: {error}")
+        return {}
+
+
+async def set_rendered_streams(
+    meta_id: str, field: str, rendered_streams: dict[str, list[dict]]
+) -> None:
+    cache_key = get_rendered_streams_cache_key(meta_id)
+    try:
+        await REDIS_ASYNC_CLIENT.hset(
+            cache_key,
+            field,
+            encode_cache_value(json.dumps(rendered_streams, separators=(",", ":"))),
+        )
+        await REDIS_ASYNC_CLIENT.expire(cache_key, settings.rendered_streams_cache_ttl)
+    except Exception as error:
+        logging.error(f"Failed to store rendered streams for {meta_id}: {error}")
+
+
+async def invalidate_torrent_streams_cache(*meta_ids: str) -> None:
+    """
+    Invalidate the local stream cache for the given meta_ids on this worker
+    and broadcast the invalidation to every other worker through Redis pub/sub.
+    The rendered stream templates of these titles are dropped as well.
+    """
+    meta_ids = {meta_id for meta_id in meta_ids if meta_id}
+    if not meta_ids:
+        return
+
+    for meta_id in meta_ids:
+        drop_local_torrent_streams(meta_id)
+
+    try:
+        await REDIS_ASYNC_CLIENT.delete(
+            *[get_rendered_streams_cache_key(meta_id) for meta_id in meta_ids]
+        )
+    except Exception as error:
+        logging.error(f"Failed to drop rendered streams cache: {error}")
+
+    try:
+        await REDIS_ASYNC_CLIENT.publish(
+            TORRENT_STREAMS_INVALIDATION_CHANNEL, ",".join(meta_ids)
+        )
+    except Exception as error:
+        logging.error(f"Failed to publish torrent streams invalidation: {error}")
+
+
+async def listen_for_torrent_streams_invalidation():
+    """
+    Long-running task that drops local cache entries whenever another worker
+    publishes a meta_id invalidation. Reconnects with a short delay on errors.
+    """
+    while True:
+        pubsub = REDIS_ASYNC_CLIENT.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(TORRENT_STREAMS_INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                data = message["data"]
+                if isinstance(data, bytes):
+                    data = data.decode("utf-8")
+                for meta_id in data.split(","):
+                    drop_local_torrent_streams(meta_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            # Entries may be stale until we resubscribe; clear to stay correct.
+            TORRENT_STREAMS_LOCAL_CACHE.clear()
+            logging.error(f"Torrent streams invalidation listener error: {error}")
+            await asyncio.sleep(5)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
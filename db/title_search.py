@@ -0,0 +1,437 @@
+import asyncio
+import logging
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Iterable
+
+from db import schemas
+from db.config import settings
+from db.models import MediaFusionMetaData
+from db.redis_database import REDIS_ASYNC_CLIENT
+from utils.validation_helper import get_filter_certification_values
+
+TITLE_SEARCH_CHANNEL = "title_search_index_updates"
+SEARCHABLE_TYPES = ("movie", "series")
+# Share of the query trigrams a title must contain to be a match, low enough
+# to tolerate a typo or two in longer queries
+MIN_QUERY_COVERAGE = 0.6
+# Trigrams shared by more entries than this don't produce candidates, they
+# only add to the score of the candidates found through rarer trigrams
+MAX_SCANNED_POSTINGS = 10000
+
+_NON_ALNUM = re.compile(r"[^\w]+")
+_INDEX_PROJECTION = {
+    "title": 1,
+    "aka_titles": 1,
+    "type": 1,
+    "parent_guide_nudity_status": 1,
+    "parent_guide_certificates": 1,
+}
+
+
+def normalize_title(title: str) -> str:
+    """Casefold, strip accents and collapse punctuation to single spaces."""
+    title = unicodedata.normalize("NFKD", title.casefold())
+    title = "".join(char for char in title if not unicodedata.combining(char))
+    return _NON_ALNUM.sub(" ", title).replace("_", " ").strip()
+
+
+def get_trigrams(text: str, is_prefix: bool = False) -> set[str]:
+    """
+    Word trigrams padded at the word boundaries. With `is_prefix` the last word
+    is left open ended so that it also matches longer words.
+    """
+    words = text.split()
+    trigrams = set()
+    for index, word in enumerate(words):
+        is_open = is_prefix and index == len(words) - 1
+        padded = f"  {word}" if is_open else f"  {word} "
+        trigrams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def bitmap_from_slots(slots: Iterable[int]) -> bytearray:
+    bits = bytearray()
+    for slot in slots:
+        set_bit(bits, slot)
+    return bits
+
+
+def set_bit(bits: bytearray, slot: int):
+    byte = slot >> 3
+    if byte >= len(bits):
+        bits.extend(bytes(byte - len(bits) + 1))
+    bits[byte] |= 1 << (slot & 7)
+
+
+def clear_bit(bits: bytearray, slot: int):
+    byte = slot >> 3
+    if byte < len(bits):
+        bits[byte] &= ~(1 << (slot & 7))
+
+
+def has_bit(bits: bytes | bytearray, slot: int) -> bool:
+    byte = slot >> 3
+    return byte < len(bits) and bool(bits[byte] & (1 << (slot & 7)))
+
+
+class TitleSearchIndex:
+    """
+    In-process trigram index over the titles and aka titles of movies and
+    series.
+
+    Every title variant is an entry with its own postings, each metadata
+    document owns a slot. Type, nudity status and certificates are kept as
+    bitmaps over slots so that the user's parental filters become a single
+    mask per filter profile. Masks are built once per profile and then kept
+    current slot by slot as documents change.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._reset()
+
+    def _reset(self):
+        self.meta_ids: list[str | None] = []
+        self.slots: dict[str, int] = {}
+        self.slot_attributes: dict[int, tuple] = {}
+        self.entries: dict[int, tuple[int, str, int]] = {}
+        self.slot_entries: dict[int, list[int]] = {}
+        self.postings: dict[str, set[int]] = defaultdict(set)
+        self.type_bitmaps: dict[str, bytearray] = defaultdict(bytearray)
+        self.nudity_bitmaps: dict[str | None, bytearray] = defaultdict(bytearray)
+        self.certificate_bitmaps: dict[str, bytearray] = defaultdict(bytearray)
+        self.certified_bitmap = bytearray()
+        self._next_entry = 0
+        self._mask_cache: dict[tuple, bytearray] = {}
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def replace_with(self, other: "TitleSearchIndex"):
+        """Swap in the content of an index built elsewhere."""
+        self.__dict__.update(other.__dict__)
+
+    def _add_entries(self, slot: int, document: dict):
+        titles = {document.get("title") or ""}
+        titles.update(document.get("aka_titles") or [])
+        entry_ids = []
+        for title in titles:
+            normalized = normalize_title(title)
+            trigrams = get_trigrams(normalized)
+            if not trigrams:
+                continue
+            entry_id = self._next_entry
+            self._next_entry += 1
+            self.entries[entry_id] = (slot, normalized, len(trigrams))
+            for trigram in trigrams:
+                self.postings[trigram].add(entry_id)
+            entry_ids.append(entry_id)
+        self.slot_entries[slot] = entry_ids
+
+    def _remove_entries(self, slot: int):
+        for entry_id in self.slot_entries.pop(slot, []):
+            _, normalized, _ = self.entries.pop(entry_id)
+            for trigram in get_trigrams(normalized):
+                postings = self.postings.get(trigram)
+                if postings is not None:
+                    postings.discard(entry_id)
+                    if not postings:
+                        del self.postings[trigram]
+
+    @staticmethod
+    def _attributes(document: dict) -> tuple[str, str | None, frozenset[str]]:
+        return (
+            document.get("type"),
+            document.get("parent_guide_nudity_status"),
+            frozenset(document.get("parent_guide_certificates") or []),
+        )
+
+    def build(self, documents: list[dict]):
+        """Replace the index content with `documents`."""
+        self._reset()
+        type_slots = defaultdict(list)
+        nudity_slots = defaultdict(list)
+        certificate_slots = defaultdict(list)
+        certified_slots = []
+        for document in documents:
+            slot = len(self.meta_ids)
+            self.meta_ids.append(document["_id"])
+            self.slots[document["_id"]] = slot
+            self._add_entries(slot, document)
+            attributes = self._attributes(document)
+            self.slot_attributes[slot] = attributes
+            meta_type, nudity_status, certificates = attributes
+            type_slots[meta_type].append(slot)
+            nudity_slots[nudity_status].append(slot)
+            for certificate in certificates:
+                certificate_slots[certificate].append(slot)
+            if certificates:
+                certified_slots.append(slot)
+
+        for bitmaps, slots_by_value in (
+            (self.type_bitmaps, type_slots),
+            (self.nudity_bitmaps, nudity_slots),
+            (self.certificate_bitmaps, certificate_slots),
+        ):
+            for value, slots in slots_by_value.items():
+                bitmaps[value] = bitmap_from_slots(slots)
+        self.certified_bitmap = bitmap_from_slots(certified_slots)
+        self.ready = True
+
+    def _set_attribute_bits(self, slot: int, attributes: tuple, is_set: bool):
+        update_bit = set_bit if is_set else clear_bit
+        meta_type, nudity_status, certificates = attributes
+        update_bit(self.type_bitmaps[meta_type], slot)
+        update_bit(self.nudity_bitmaps[nudity_status], slot)
+        for certificate in certificates:
+            update_bit(self.certificate_bitmaps[certificate], slot)
+        if certificates:
+            update_bit(self.certified_bitmap, slot)
+
+    def _update_masks(self, slot: int, attributes: tuple | None):
+        for profile, mask in self._mask_cache.items():
+            if attributes is not None and self._is_allowed(profile, attributes):
+                set_bit(mask, slot)
+            else:
+                clear_bit(mask, slot)
+
+    def upsert(self, document: dict):
+        """Index a new or changed metadata document."""
+        meta_id = document["_id"]
+        slot = self.slots.get(meta_id)
+        if slot is None:
+            slot = len(self.meta_ids)
+            self.meta_ids.append(meta_id)
+            self.slots[meta_id] = slot
+        else:
+            self._remove_entries(slot)
+        self._add_entries(slot, document)
+
+        # Bitmaps and masks are only touched when the filtered attributes change
+        attributes = self._attributes(document)
+        old_attributes = self.slot_attributes.get(slot)
+        if attributes == old_attributes:
+            return
+        if old_attributes is not None:
+            self._set_attribute_bits(slot, old_attributes, is_set=False)
+        self._set_attribute_bits(slot, attributes, is_set=True)
+        self.slot_attributes[slot] = attributes
+        self._update_masks(slot, attributes)
+
+    def remove(self, meta_id: str):
+        slot = self.slots.pop(meta_id, None)
+        if slot is None:
+            return
+        self._remove_entries(slot)
+        if (attributes := self.slot_attributes.pop(slot, None)) is not None:
+            self._set_attribute_bits(slot, attributes, is_set=False)
+        self._update_masks(slot, None)
+        self.meta_ids[slot] = None
+
+    @staticmethod
+    def _get_profile(catalog_type: str, user_data: schemas.UserData) -> tuple:
+        """
+        The catalog type and the attribute values the user's parental filters
+        exclude, with the same semantics as the Mongo filters of the search.
+        """
+        excluded_nudity = set()
+        if "Disable" not in user_data.nudity_filter:
+            excluded_nudity.update(user_data.nudity_filter)
+            if "Unknown" in user_data.nudity_filter:
+                excluded_nudity.add(None)
+        excluded_certificates = set()
+        require_certified = False
+        if "Disable" not in user_data.certification_filter:
+            excluded_certificates.update(get_filter_certification_values(user_data))
+            require_certified = "Unknown" in user_data.certification_filter
+        return (
+            catalog_type,
+            frozenset(excluded_nudity),
+            frozenset(excluded_certificates),
+            require_certified,
+        )
+
+    @staticmethod
+    def _is_allowed(profile: tuple, attributes: tuple) -> bool:
+        catalog_type, excluded_nudity, excluded_certificates, require_certified = (
+            profile
+        )
+        meta_type, nudity_status, certificates = attributes
+        return (
+            meta_type == catalog_type
+            and nudity_status not in excluded_nudity
+            and not certificates & excluded_certificates
+            and (bool(certificates) or not require_certified)
+        )
+
+    def _get_mask(self, catalog_type: str, user_data: schemas.UserData) -> bytearray:
+        """Slots allowed for the catalog type and the user's parental filters."""
+        profile = self._get_profile(catalog_type, user_data)
+        if (mask := self._mask_cache.get(profile)) is not None:
+            return mask
+
+        _, excluded_nudity, excluded_certificates, require_certified = profile
+        mask = int.from_bytes(self.type_bitmaps.get(catalog_type, b""), "little")
+        for nudity_status in excluded_nudity:
+            bitmap = self.nudity_bitmaps.get(nudity_status, b"")
+            mask &= ~int.from_bytes(bitmap, "little")
+        for certificate in excluded_certificates:
+            bitmap = self.certificate_bitmaps.get(certificate, b"")
+            mask &= ~int.from_bytes(bitmap, "little")
+        if require_certified:
+            mask &= int.from_bytes(self.certified_bitmap, "little")
+
+        mask = bytearray(mask.to_bytes((len(self.meta_ids) + 7) // 8 or 1, "little"))
+        self._mask_cache[profile] = mask
+        return mask
+
+    def search(
+        self,
+        search_query: str,
+        catalog_type: str,
+        user_data: schemas.UserData,
+        limit: int = 50,
+    ) -> list[str]:
+        """
+        Meta ids best matching `search_query`, best first. Scores favour query
+        coverage, then exact and prefix title matches, then titles close in
+        length to the query.
+        """
+        query = normalize_title(search_query)
+        query_trigrams = get_trigrams(query, is_prefix=True)
+        if not query_trigrams:
+            return []
+
+        # Candidates come from the selective trigrams only. Common ones, like
+        # the start of "the", are checked per candidate instead of scanned.
+        posting_lists = sorted(
+            (self.postings.get(trigram) or set() for trigram in query_trigrams),
+            key=len,
+        )
+        scanned = [
+            postings
+            for postings in posting_lists
+            if len(postings) <= MAX_SCANNED_POSTINGS
+        ] or posting_lists[:1]
+        probed = posting_lists[len(scanned) :]
+
+        matches = Counter()
+        for postings in scanned:
+            matches.update(postings)
+
+        min_matches = max(1, int(len(query_trigrams) * MIN_QUERY_COVERAGE))
+        mask = self._get_mask(catalog_type, user_data)
+        scores: dict[int, float] = {}
+        for entry_id, matched in matches.items():
+            slot, title, trigram_count = self.entries[entry_id]
+            if not has_bit(mask, slot):
+                continue
+            matched += sum(entry_id in postings for postings in probed)
+            if matched < min_matches:
+                continue
+            score = matched / len(query_trigrams)
+            score += matched / (len(query_trigrams) + trigram_count - matched)
+            if title == query:
+                score += 2
+            elif title.startswith(query):
+                score += 1
+            elif query in title:
+                score += 0.5
+            if score > scores.get(slot, 0):
+                scores[slot] = score
+
+        best_slots = sorted(scores, key=scores.get, reverse=True)[:limit]
+        return [self.meta_ids[slot] for slot in best_slots]
+
+
+title_search_index = TitleSearchIndex()
+
+
+async def load_title_search_documents() -> list[dict]:
+    return (
+        await MediaFusionMetaData.get_motor_collection()
+        .find({"type": {"$in": list(SEARCHABLE_TYPES)}}, _INDEX_PROJECTION)
+        .to_list(None)
+    )
+
+
+async def rebuild_title_search_index():
+    documents = await load_title_search_documents()
+    # Built in a thread and swapped in, searches keep using the old content.
+    # The build is pure Python and holds the GIL, so requests are only served
+    # in between its thread switches and slow down while it runs.
+    index = TitleSearchIndex()
+    await asyncio.to_thread(index.build, documents)
+    title_search_index.replace_with(index)
+    logging.info("Title search index built with %s titles", len(documents))
+
+
+async def apply_title_search_updates(meta_ids: list[str]):
+    """Re-read the given metadata documents into the local index."""
+    documents = (
+        await MediaFusionMetaData.get_motor_collection()
+        .find(
+            {"_id": {"$in": meta_ids}, "type": {"$in": list(SEARCHABLE_TYPES)}},
+            _INDEX_PROJECTION,
+        )
+        .to_list(None)
+    )
+    for document in documents:
+        title_search_index.upsert(document)
+    for meta_id in set(meta_ids).difference(doc["_id"] for doc in documents):
+        title_search_index.remove(meta_id)
+
+
+async def publish_title_search_updates(meta_ids: Iterable[str]):
+    """Announce created, changed or deleted metadata to every worker's index."""
+    if not settings.enable_title_search_index:
+        return
+    meta_ids = [meta_id for meta_id in meta_ids if meta_id]
+    if not meta_ids:
+        return
+    try:
+        await REDIS_ASYNC_CLIENT.publish(TITLE_SEARCH_CHANNEL, ",".join(meta_ids))
+    except Exception as error:
+        logging.error(f"Failed to publish title search updates: {error}")
+
+
+async def run_title_search_index():
+    """
+    Long-running task that builds the local index, applies the updates
+    published by any worker and rebuilds it periodically to pick up writes
+    that bypass the update channel. Search falls back to MongoDB while the
+    index is not ready.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        pubsub = REDIS_ASYNC_CLIENT.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(TITLE_SEARCH_CHANNEL)
+            while True:
+                # Subscribed first, so updates made during a build are applied
+                # right after it
+                await rebuild_title_search_index()
+                rebuild_at = loop.time() + settings.title_search_index_rebuild_interval
+                while (remaining := rebuild_at - loop.time()) > 0:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=remaining
+                    )
+                    if message is None or message.get("type") != "message":
+                        continue
+                    data = message["data"]
+                    if isinstance(data, bytes):
+                        data = data.decode("utf-8")
+                    await apply_title_search_updates(data.split(","))
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            logging.error(f"Title search index listener error: {error}")
+            title_search_index.ready = False
+            await asyncio.sleep(5)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
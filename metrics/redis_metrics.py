@@ -4,6 +4,10 @@ from typing import Dict, Any
 
 import humanize
 from db.redis_database import REDIS_ASYNC_CLIENT, REDIS_SYNC_CLIENT
+from streaming_providers.cache_helpers import (
+    count_cached_info_hashes,
+    debrid_cache_filters,
+)
 
 
 async def get_redis_metrics() -> Dict[str, Any]:
@@ -129,11 +133,13 @@ async def get_debrid_cache_metrics() -> Dict[str, Any]:
 
     try:
         for service in debrid_services:
-            cache_key = f"debrid_cache:{service}"
-            cache_size = await REDIS_ASYNC_CLIENT.hlen(cache_key)
+            cache_size = await count_cached_info_hashes(service)
 
             if cache_size > 0:  # Only include services with cached torrents
                 metrics["services"][service] = {"cached_torrents": cache_size}
+                # Filter stats are local to the worker serving this request
+                if filter_stats := debrid_cache_filters.get_stats(service):
+                    metrics["services"][service]["bloom_filter"] = filter_stats
 
         # Sort services by cache size
         metrics["services"] = dict(
@@ -14,6 +14,7 @@ from db.models import (
 )
 from db.redis_database import REDIS_ASYNC_CLIENT
 from metrics.redis_metrics import get_redis_metrics, get_debrid_cache_metrics
+from streaming_providers.debrid_client import debrid_session_pool
 from utils import const
 from utils.runtime_const import TEMPLATES
 
@@ -167,6 +168,17 @@ async def debrid_cache_metrics():
     return await get_debrid_cache_metrics()
 
 
+@metrics_router.get("/debrid-connections")
+async def debrid_connection_metrics():
+    """
+    Get the connection pool stats of the debrid provider clients of this worker.
+    """
+    return {
+        "timestamp": datetime.now(tz=timezone.utc).isoformat(),
+        "providers": debrid_session_pool.stats(),
+    }
+
+
 @metrics_router.get("/torrents/uploaders", tags=["metrics"])
 async def get_torrents_by_uploaders(response: Response):
     response.headers.update(const.NO_CACHE_HEADERS)
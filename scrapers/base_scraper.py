@@ -52,6 +52,7 @@ class ScraperMetrics:
     quality_stats: Counter = field(default_factory=Counter)
     source_stats: Counter = field(default_factory=Counter)
     skip_scraping: bool = False
+    detached: bool = False
     indexer_stats: Dict[str, Dict[str, Any]] = field(default_factory=dict)
 
     def start(self):
@@ -99,6 +100,14 @@ class ScraperMetrics:
         """Skip scraping the item"""
         self.skip_scraping = True
 
+    def mark_detached(self):
+        """Record that the scraper outlived the request's time budget"""
+        self.detached = True
+
+    def get_duration(self) -> float:
+        """Seconds spent scraping so far, or in total once stopped"""
+        return ((self.end_time or datetime.now()) - self.start_time).total_seconds()
+
     def record_indexer_success(self, indexer_name: str, results_count: int):
         """Record successful results from an indexer"""
         if indexer_name not in self.indexer_stats:
@@ -127,11 +136,10 @@ class ScraperMetrics:
 
     def get_summary(self) -> Dict:
         """Generate a summary of the metrics"""
-        duration = (self.end_time or datetime.now()) - self.start_time
-
         return {
             "scraper_name": self.scraper_name,
-            "duration_seconds": duration.total_seconds(),
+            "duration_seconds": self.get_duration(),
+            "detached": self.detached,
             "total_items": {
                 "found": self.total_items_found,
                 "processed": self.total_items_processed,
@@ -174,6 +182,8 @@ class ScraperMetrics:
 
         # Duration
         lines.append(f"Duration: {summary['duration_seconds']:.2f} seconds")
+        if self.detached:
+            lines.append("Finished after the request time budget, results stored")
         lines.append("")
 
         # Items Summary
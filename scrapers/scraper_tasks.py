@@ -4,13 +4,18 @@ import logging
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, AsyncGenerator
 
 import dramatiq
 
 from db.config import settings
 from db.models import TorrentStreams, MediaFusionMetaData
+from db.redis_database import REDIS_ASYNC_CLIENT
 from db.schemas import UserData
+from db.stream_cache import (
+    get_torrent_streams_cache_key,
+    invalidate_torrent_streams_cache,
+)
 from scrapers.base_scraper import BaseScraper
 from scrapers.bt4g import BT4GScraper
 from scrapers.imdb_data import get_imdb_title_data, search_imdb, search_multiple_imdb
@@ -28,6 +33,7 @@ from scrapers.torrentio import TorrentioScraper
 from scrapers.yts import YTSScraper
 from scrapers.zilean import ZileanScraper
 from utils import runtime_const
+from utils.crypto import crypto_utils
 
 logger = logging.getLogger(__name__)
 
@@ -51,56 +57,260 @@ CACHED_DATA = [
     (JackettScraper.cache_key_prefix, runtime_const.JACKETT_SEARCH_TTL),
 ]
 
+# Scrapers that outlived a request's time budget, kept referenced until done
+DETACHED_SCRAPER_TASKS: set[asyncio.Task] = set()
 
-async def run_scrapers(
+LIVE_SEARCH_REFRESHED_PREFIX = "live_search_refreshed:"
+LIVE_SEARCH_PENDING_PREFIX = "live_search_pending:"
+
+
+async def stream_scrapers(
     user_data: UserData,
     metadata: MediaFusionMetaData,
     catalog_type: str,
     season: int = None,
     episode: int = None,
-) -> set[TorrentStreams]:
-    """Run all enabled scrapers and return unique streams"""
-    all_streams = []
+    time_budget: float = None,
+) -> AsyncGenerator[TorrentStreams, None]:
+    """
+    Run all enabled scrapers concurrently and yield unique streams as soon as
+    each scraper finishes. Once `time_budget` seconds have passed, the
+    scrapers still running are detached: they keep going in the background
+    and their streams are stored for the next request.
+    """
+    scrapers = [scraper_cls() for is_enabled, scraper_cls in SCRAPERS if is_enabled]
+    pending = {
+        asyncio.create_task(
+            scraper.scrape_and_parse(
+                user_data, metadata, catalog_type, season, episode
+            ),
+            name=scraper.__class__.__name__,
+        ): scraper
+        for scraper in scrapers
+    }
+    loop = asyncio.get_running_loop()
+    deadline = None if time_budget is None else loop.time() + time_budget
+    yielded_info_hashes = set()
     failed_scrapers = []
 
-    async with asyncio.TaskGroup() as tg:
-        # Create tasks for enabled scrapers
-        tasks = [
-            tg.create_task(
-                scraper_cls().scrape_and_parse(
-                    user_data, metadata, catalog_type, season, episode
-                ),
-                name=f"{scraper_cls.__name__}",
+    try:
+        while pending:
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            done, _ = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
             )
-            for is_enabled, scraper_cls in SCRAPERS
-            if is_enabled
-        ]
-
-    # Process results after all tasks complete
-    for task in tasks:
-        try:
-            streams = task.result()
-            all_streams.extend(streams)
-            logging.info(
-                f"Successfully scraped {len(streams)} streams from {task.get_name()}"
+            if not done:
+                break
+
+            for task in done:
+                scraper = pending.pop(task)
+                try:
+                    streams = task.result()
+                except Exception as exc:
+                    failed_scrapers.append(task.get_name())
+                    logging.error(f"Error in scraper {task.get_name()}: {str(exc)}")
+                    continue
+
+                logging.info(
+                    f"Successfully scraped {len(streams)} streams from {task.get_name()} "
+                    f"in {scraper.metrics.get_duration():.2f}s"
+                )
+                for stream in streams:
+                    if stream.id not in yielded_info_hashes:
+                        yielded_info_hashes.add(stream.id)
+                        yield stream
+    finally:
+        for task, scraper in pending.items():
+            scraper.metrics.mark_detached()
+            detach_scraper_task(task, metadata.id, season, episode)
+
+        if failed_scrapers:
+            logging.error(f"Failed scrapers: {', '.join(failed_scrapers)}")
+        timings = ", ".join(
+            f"{scraper.__class__.__name__}="
+            + (
+                "detached"
+                if scraper.metrics.detached
+                else f"{scraper.metrics.get_duration():.2f}s"
             )
-        except Exception as exc:
-            # Log the error and keep track of failed scrapers
-            failed_scrapers.append(task.get_name())
-            logging.error(f"Error in scraper {task.get_name()}: {str(exc)}")
+            for scraper in scrapers
+        )
+        logging.info(f"Scraper timings for {metadata.title}: {timings}")
+
+
+def detach_scraper_task(
+    task: asyncio.Task, meta_id: str, season: int = None, episode: int = None
+):
+    """Let a scraper finish after the request and store whatever it finds."""
+    DETACHED_SCRAPER_TASKS.add(task)
+
+    def on_done(finished_task: asyncio.Task):
+        DETACHED_SCRAPER_TASKS.discard(finished_task)
+        if finished_task.cancelled() or finished_task.exception():
+            return
+        streams = finished_task.result()
+        if streams:
+            schedule_stream_store(streams, meta_id, season, episode)
+
+    task.add_done_callback(on_done)
+
+
+def schedule_stream_store(
+    streams: list[TorrentStreams], meta_id: str, season: int = None, episode: int = None
+):
+    """
+    Store scraped streams in a task that outlives the request, then drop the
+    cached streams of the title so that they are read back with the new ones.
+    """
+    store_task = asyncio.create_task(
+        store_detached_streams(streams, meta_id, season, episode)
+    )
+    DETACHED_SCRAPER_TASKS.add(store_task)
+    store_task.add_done_callback(DETACHED_SCRAPER_TASKS.discard)
 
-    # Log summary of failures if any occurred
-    if failed_scrapers:
-        logging.error(f"Failed scrapers: {', '.join(failed_scrapers)}")
 
-    unique_streams = set(all_streams)
+async def store_detached_streams(
+    streams: list[TorrentStreams], meta_id: str, season: int = None, episode: int = None
+):
+    from db.crud import store_new_torrent_streams
+
+    try:
+        await store_new_torrent_streams(streams)
+        await REDIS_ASYNC_CLIENT.delete(
+            get_torrent_streams_cache_key(meta_id, season, episode)
+        )
+        await invalidate_torrent_streams_cache(meta_id)
+        logging.info(f"Stored {len(streams)} scraped streams for {meta_id}")
+    except Exception as exc:
+        logging.exception(f"Failed to store scraped streams: {exc}")
+
+
+async def run_scrapers(
+    user_data: UserData,
+    metadata: MediaFusionMetaData,
+    catalog_type: str,
+    season: int = None,
+    episode: int = None,
+    time_budget: float = None,
+) -> set[TorrentStreams]:
+    """Run all enabled scrapers and return unique streams"""
+    unique_streams = set()
+    async for stream in stream_scrapers(
+        user_data, metadata, catalog_type, season, episode, time_budget
+    ):
+        unique_streams.add(stream)
+
     logging.info(
-        f"Successfully scraped {len(all_streams)} total streams "
-        f"({len(unique_streams)} unique) for {metadata.title}"
+        f"Successfully scraped {len(unique_streams)} unique streams for {metadata.title}"
     )
     return unique_streams
 
 
+async def get_live_search_age(cache_key: str) -> Optional[float]:
+    """
+    Seconds since the scrapers last ran for a stream cache key, or None when
+    they haven't run within `live_search_max_staleness`.
+    """
+    refreshed_at = await REDIS_ASYNC_CLIENT.get(
+        f"{LIVE_SEARCH_REFRESHED_PREFIX}{cache_key}"
+    )
+    if refreshed_at is None:
+        return None
+    return max(0.0, datetime.now().timestamp() - float(refreshed_at))
+
+
+async def mark_live_search_refreshed(cache_key: str):
+    await REDIS_ASYNC_CLIENT.set(
+        f"{LIVE_SEARCH_REFRESHED_PREFIX}{cache_key}",
+        datetime.now().timestamp(),
+        ex=settings.live_search_max_staleness,
+    )
+
+
+async def schedule_live_search_refresh(
+    user_data: UserData,
+    meta_id: str,
+    catalog_type: str,
+    cache_key: str,
+    season: int = None,
+    episode: int = None,
+) -> bool:
+    """
+    Enqueue a background scraper run for a title unless one is already
+    pending. Returns True when a new refresh was scheduled.
+    """
+    is_scheduled = await REDIS_ASYNC_CLIENT.set(
+        f"{LIVE_SEARCH_PENDING_PREFIX}{cache_key}",
+        "1",
+        nx=True,
+        ex=settings.live_search_refresh_interval,
+    )
+    if not is_scheduled:
+        return False
+
+    # Only the fields the scrapers read are sent to the worker
+    scraper_user_data = UserData(
+        streaming_provider=user_data.streaming_provider,
+        nudity_filter=user_data.nudity_filter,
+        certification_filter=user_data.certification_filter,
+    )
+    run_live_search_refresh.send(
+        meta_id=meta_id,
+        catalog_type=catalog_type,
+        cache_key=cache_key,
+        season=season,
+        episode=episode,
+        encoded_user_data=crypto_utils.encode_user_data(scraper_user_data),
+    )
+    return True
+
+
+@dramatiq.actor(
+    time_limit=5 * 60 * 1000,  # 5 minutes
+    priority=1,
+    max_retries=0,
+)
+async def run_live_search_refresh(
+    meta_id: str,
+    catalog_type: str,
+    cache_key: str,
+    encoded_user_data: str,
+    season: int = None,
+    episode: int = None,
+    **kwargs,
+):
+    """Run the live search scrapers for a title and store the new streams"""
+    from db.crud import (
+        get_movie_data_by_id,
+        get_series_data_by_id,
+        store_new_torrent_streams,
+    )
+
+    if catalog_type == "series":
+        metadata = await get_series_data_by_id(meta_id)
+    else:
+        metadata = await get_movie_data_by_id(meta_id)
+    if not metadata:
+        return
+
+    user_data = crypto_utils.decode_user_data(encoded_user_data)
+    new_streams = await run_scrapers(
+        user_data=user_data,
+        metadata=metadata,
+        catalog_type=catalog_type,
+        season=season,
+        episode=episode,
+    )
+    if new_streams:
+        await store_new_torrent_streams(new_streams)
+        await REDIS_ASYNC_CLIENT.delete(cache_key)
+        await invalidate_torrent_streams_cache(meta_id)
+    await mark_live_search_refreshed(cache_key)
+    logging.info(
+        f"Background live search stored {len(new_streams)} streams for {cache_key}"
+    )
+
+
 @dramatiq.actor(
     time_limit=5 * 60 * 1000,  # 5 minutes
     priority=20,
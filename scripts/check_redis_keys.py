@@ -0,0 +1,69 @@
+"""
+Fail when the Redis KEYS command is used in the codebase.
+
+KEYS walks the whole keyspace and blocks Redis for every other client while
+it runs. Cache invalidation goes through the cache tags of db/cache_tags.py
+and other lookups should use known keys or SCAN.
+
+Usage: python scripts/check_redis_keys.py [paths...]
+"""
+
+import ast
+import sys
+from pathlib import Path
+
+EXCLUDED_DIRS = {".git", ".venv", "venv", "__pycache__", "node_modules"}
+
+
+def get_receiver_name(node: ast.expr) -> str | None:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def find_keys_calls(path: Path) -> list[int]:
+    """Line numbers of the `.keys()` calls made on a Redis client or pipeline."""
+    try:
+        tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    except (SyntaxError, UnicodeDecodeError):
+        return []
+
+    lines = []
+    for node in ast.walk(tree):
+        if not (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr == "keys"
+        ):
+            continue
+        receiver = get_receiver_name(node.func.value) or ""
+        # dict.keys() takes no arguments, Redis keys() takes a pattern
+        if receiver.upper().startswith("REDIS") or receiver == "pipe" or node.args:
+            lines.append(node.lineno)
+    return lines
+
+
+def iter_python_files(paths: list[Path]):
+    for path in paths:
+        if path.is_file():
+            yield path
+            continue
+        for file_path in path.rglob("*.py"):
+            if not EXCLUDED_DIRS.intersection(file_path.parts):
+                yield file_path
+
+
+def main(argv: list[str]) -> int:
+    paths = [Path(arg) for arg in argv] or [Path(".")]
+    violations = 0
+    for file_path in iter_python_files(paths):
+        for lineno in find_keys_calls(file_path):
+            print(f"{file_path}:{lineno}: Redis KEYS is not allowed, use a cache tag")
+            violations += 1
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
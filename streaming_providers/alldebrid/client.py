@@ -8,6 +8,7 @@ from streaming_providers.exceptions import ProviderException
 
 class AllDebrid(DebridClient):
     BASE_URL = "https://api.alldebrid.com/v4.1"
+    RATE_LIMIT = (600, 60)
     AGENT = "mediafusion"
 
     def __init__(self, token: str, user_ip: Optional[str] = None):
@@ -3,6 +3,7 @@ from typing import Optional
 from db.models import TorrentStreams
 from db.schemas import UserData
 from streaming_providers.alldebrid.client import AllDebrid
+from streaming_providers.downloaded_snapshot import filter_downloaded_info_hashes
 from streaming_providers.exceptions import ProviderException
 from streaming_providers.parser import (
     select_file_index_from_torrent,
@@ -142,8 +143,12 @@ async def update_ad_cache_status(
     """Updates the cache status of streams based on AllDebrid's instant availability."""
 
     try:
-        downloaded_hashes = set(
-            await fetch_downloaded_info_hashes_from_ad(user_data, user_ip, **kwargs)
+        downloaded_hashes = await filter_downloaded_info_hashes(
+            user_data,
+            user_ip,
+            [stream.id for stream in streams],
+            fetch_downloaded_info_hashes_from_ad,
+            **kwargs,
         )
         if not downloaded_hashes:
             return
@@ -157,7 +162,7 @@ async def update_ad_cache_status(
 
 async def fetch_downloaded_info_hashes_from_ad(
     user_data: UserData, user_ip: str, **kwargs
-) -> list[str]:
+) -> list[str] | None:
     """Fetches the info_hashes of all torrents downloaded in the AllDebrid account."""
     try:
         async with AllDebrid(
@@ -165,14 +170,14 @@ async def fetch_downloaded_info_hashes_from_ad(
         ) as ad_client:
             available_torrents = await ad_client.get_user_torrent_list(status="ready")
             if not available_torrents.get("data"):
-                return []
+                return None
             magnets = available_torrents["data"]["magnets"]
             if isinstance(magnets, dict):
                 return [magnet["hash"] for magnet in magnets.values()]
             return [magnet["hash"] for magnet in magnets]
 
     except ProviderException:
-        return []
+        return None
 
 
 async def delete_all_torrents_from_ad(user_data: UserData, user_ip: str, **kwargs):
@@ -1,7 +1,11 @@
+import asyncio
+import importlib.util
 import logging
-from datetime import datetime, timedelta, timezone
-from typing import List, Dict
-from urllib.parse import urljoin
+import time
+import zlib
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Dict, get_args
 
 import dramatiq
 import httpx
@@ -9,10 +13,13 @@ import httpx
 from db.config import settings
 from db.redis_database import REDIS_ASYNC_CLIENT
 from db.schemas import StreamingProvider
+from utils.bloom_filter import BloomFilter
+from utils.local_cache import LocalTTLCache
 
 # Constants
 CACHE_KEY_PREFIX = "debrid_cache:"
 EXPIRY_DAYS = 7
+CACHE_FILTER_CHANNEL = "debrid_cache_filter_updates"
 
 
 def get_cache_service_name(streaming_provider: StreamingProvider):
@@ -27,10 +34,124 @@ def get_cache_service_name(streaming_provider: StreamingProvider):
     return streaming_provider.service
 
 
+def get_cache_service_names() -> list[str]:
+    """Every service name info hashes can be cached under."""
+    return list(get_args(StreamingProvider.model_fields["service"].annotation))
+
+
+def get_bucket_cache_key(service: str, expiry_day: date, shard: int) -> str:
+    """
+    Key of the set holding the info hashes of a service that expire on
+    `expiry_day`. Each day is split in shards so the lookups of a busy
+    service are spread over several keys.
+    """
+    return f"{CACHE_KEY_PREFIX}{service}:{expiry_day:%Y%m%d}:{shard}"
+
+
+def get_info_hash_shard(info_hash: str) -> int:
+    return zlib.crc32(info_hash.lower().encode()) % settings.debrid_cache_shards
+
+
+def get_live_expiry_days() -> list[date]:
+    """Expiry days of the buckets that may still hold unexpired entries."""
+    today = datetime.now(tz=timezone.utc).date()
+    return [today + timedelta(days=offset) for offset in range(EXPIRY_DAYS + 1)]
+
+
+def _group_by_shard(info_hashes: List[str]) -> dict[int, list[str]]:
+    shards = defaultdict(list)
+    for info_hash in info_hashes:
+        shards[get_info_hash_shard(info_hash)].append(info_hash)
+    return shards
+
+
+async def _store_in_hash(service: str, info_hashes: List[str]) -> None:
+    cache_key = f"{CACHE_KEY_PREFIX}{service}"
+    timestamp = int(
+        (datetime.now(tz=timezone.utc) + timedelta(days=EXPIRY_DAYS)).timestamp()
+    )
+
+    # Create mapping of info_hash to expiry timestamp
+    cache_data = {hash_: timestamp for hash_ in info_hashes}
+
+    # Store all hashes with their expiry timestamps in one operation
+    await REDIS_ASYNC_CLIENT.hset(cache_key, mapping=cache_data)
+
+
+async def _store_in_buckets(
+    service: str, info_hashes: List[str], expiry_day: date | None = None
+) -> None:
+    """
+    Add the info hashes to the bucket of their expiry day. The bucket key
+    itself expires at the end of that day, so Redis drops the entries natively.
+    """
+    expiry_day = expiry_day or (
+        datetime.now(tz=timezone.utc).date() + timedelta(days=EXPIRY_DAYS)
+    )
+    expire_at = datetime.combine(
+        expiry_day + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc
+    )
+    async with REDIS_ASYNC_CLIENT.pipeline(transaction=False) as pipe:
+        for shard, shard_hashes in _group_by_shard(info_hashes).items():
+            cache_key = get_bucket_cache_key(service, expiry_day, shard)
+            pipe.sadd(cache_key, *shard_hashes)
+            pipe.expireat(cache_key, expire_at)
+        await pipe.execute()
+
+
+async def _lookup_in_hash(service: str, info_hashes: List[str]) -> set[str]:
+    cache_key = f"{CACHE_KEY_PREFIX}{service}"
+    current_time = int(datetime.now(tz=timezone.utc).timestamp())
+
+    # Get all timestamps in one operation
+    timestamps = await REDIS_ASYNC_CLIENT.hmget(cache_key, info_hashes)
+
+    cached_hashes = set()
+    expired_hashes = []
+    for info_hash, timestamp_bytes in zip(info_hashes, timestamps):
+        if timestamp_bytes is None:
+            continue
+        try:
+            if int(timestamp_bytes) > current_time:
+                cached_hashes.add(info_hash)
+                continue
+        except (ValueError, TypeError):
+            pass
+        expired_hashes.append(info_hash)
+
+    # Clean up expired entries if any found
+    if expired_hashes:
+        await REDIS_ASYNC_CLIENT.hdel(cache_key, *expired_hashes)
+    return cached_hashes
+
+
+async def _lookup_in_buckets(service: str, info_hashes: List[str]) -> set[str]:
+    """Check every live bucket of each info hash's shard in one pipeline."""
+    lookups = []
+    async with REDIS_ASYNC_CLIENT.pipeline(transaction=False) as pipe:
+        for shard, shard_hashes in _group_by_shard(info_hashes).items():
+            for expiry_day in get_live_expiry_days():
+                pipe.smismember(
+                    get_bucket_cache_key(service, expiry_day, shard), shard_hashes
+                )
+                lookups.append(shard_hashes)
+        responses = await pipe.execute()
+
+    cached_hashes = set()
+    for shard_hashes, memberships in zip(lookups, responses):
+        cached_hashes.update(
+            info_hash
+            for info_hash, is_member in zip(shard_hashes, memberships)
+            if is_member
+        )
+    return cached_hashes
+
+
 async def store_cached_info_hashes(
     streaming_provider: StreamingProvider,
     info_hashes: List[str],
     service_override: str | None = None,
+    submit_upstream: bool = True,
 ) -> None:
     """
     Store multiple cached info hashes efficiently and sync with MediaFusion Public Host.
@@ -40,6 +161,7 @@ async def store_cached_info_hashes(
         streaming_provider: The streaming provider object
         info_hashes: List of info hashes that are confirmed to be cached
         service_override: Optional service name override
+        submit_upstream: Whether to submit the hashes to MediaFusion
     """
     if not info_hashes:
         return
@@ -55,22 +177,19 @@ async def store_cached_info_hashes(
 
     try:
         # Store in local Redis
-        cache_key = f"{CACHE_KEY_PREFIX}{service}"
-        timestamp = int(
-            (datetime.now(tz=timezone.utc) + timedelta(days=EXPIRY_DAYS)).timestamp()
-        )
-
-        # Create mapping of info_hash to expiry timestamp
-        cache_data = {hash_: timestamp for hash_ in info_hashes}
+        if settings.debrid_cache_backend == "bucketed":
+            await _store_in_buckets(service, info_hashes)
+        else:
+            await _store_in_hash(service, info_hashes)
 
-        # Store all hashes with their expiry timestamps in one operation
-        await REDIS_ASYNC_CLIENT.hset(cache_key, mapping=cache_data)
+        if settings.enable_debrid_cache_filter:
+            await REDIS_ASYNC_CLIENT.publish(
+                CACHE_FILTER_CHANNEL, f"{service}|{','.join(info_hashes)}"
+            )
 
         # Submit to MediaFusion
-        if settings.sync_debrid_cache_streams:
-            await mediafusion_client.submit_cached_hashes(
-                streaming_provider, info_hashes
-            )
+        if settings.sync_debrid_cache_streams and submit_upstream:
+            mediafusion_client.queue_cached_hashes(streaming_provider, info_hashes)
 
     except Exception as e:
         logging.error(f"Error storing cached info hashes for {service}: {e}")
@@ -96,54 +215,106 @@ async def get_cached_status(
     service = get_cache_service_name(streaming_provider)
 
     try:
-        # First check local Redis cache
+        # Hashes the filter rules out are definitely not cached locally, so
+        # they skip Redis and go upstream while the candidates are looked up.
+        candidates = debrid_cache_filters.filter_candidates(service, info_hashes)
+        is_filtered = candidates is not None
+        if not is_filtered:
+            candidates = info_hashes
+        candidate_set = set(candidates)
+        definite_negatives = [
+            info_hash for info_hash in info_hashes if info_hash not in candidate_set
+        ]
+        check_upstream = settings.sync_debrid_cache_streams
+
+        lookup = (
+            _lookup_in_buckets
+            if settings.debrid_cache_backend == "bucketed"
+            else _lookup_in_hash
+        )
+        cached_hashes, upstream_results = await asyncio.gather(
+            lookup(service, candidates) if candidates else asyncio.sleep(0, set()),
+            (
+                mediafusion_client.fetch_cache_status(
+                    streaming_provider, definite_negatives
+                )
+                if check_upstream and definite_negatives
+                else asyncio.sleep(0, {})
+            ),
+        )
+        if is_filtered:
+            debrid_cache_filters.record_false_positives(
+                service, len(candidate_set - cached_hashes)
+            )
+
+        result = {info_hash: True for info_hash in cached_hashes}
+        result.update(upstream_results)
+
+        # Hashes not found in Redis or expired are checked on MediaFusion too
+        mediafusion_check_needed = [
+            info_hash for info_hash in candidates if info_hash not in cached_hashes
+        ]
+        if check_upstream and mediafusion_check_needed:
+            result.update(
+                await mediafusion_client.fetch_cache_status(
+                    streaming_provider, mediafusion_check_needed
+                )
+            )
+
+        # Anything unresolved is not cached
+        for hash_ in info_hashes:
+            result.setdefault(hash_, False)
+
+        return result
+
+    except Exception as e:
+        logging.error(f"Error getting cached status for {service}: {e}")
+        return {hash_: False for hash_ in info_hashes}
+
+
+async def migrate_service_cache_to_buckets(service: str) -> None:
+    """
+    Move the unexpired entries of a service's legacy hash into the expiry day
+    buckets and drop the hash.
+
+    Args:
+        service: The debrid service name
+    """
+    try:
         cache_key = f"{CACHE_KEY_PREFIX}{service}"
         current_time = int(datetime.now(tz=timezone.utc).timestamp())
+        cursor = 0
+        migrated_count = 0
 
-        # Get all timestamps in one operation
-        timestamps = await REDIS_ASYNC_CLIENT.hmget(cache_key, info_hashes)
+        while True:
+            cursor, data = await REDIS_ASYNC_CLIENT.hscan(cache_key, cursor, count=1000)
 
-        # Process results and identify which hashes need MediaFusion check
-        result = {}
-        expired_hashes = []
-        mediafusion_check_needed = []
+            hashes_per_day = defaultdict(list)
+            for hash_, timestamp_bytes in data.items():
+                try:
+                    expiry_time = int(timestamp_bytes)
+                except (ValueError, TypeError):
+                    continue
+                if expiry_time > current_time:
+                    expiry_day = datetime.fromtimestamp(
+                        expiry_time, tz=timezone.utc
+                    ).date()
+                    hashes_per_day[expiry_day].append(hash_.decode("utf-8"))
 
-        for info_hash, timestamp_bytes in zip(info_hashes, timestamps):
-            if timestamp_bytes is None:
-                mediafusion_check_needed.append(info_hash)
-                continue
+            for expiry_day, info_hashes in hashes_per_day.items():
+                await _store_in_buckets(service, info_hashes, expiry_day)
+                migrated_count += len(info_hashes)
 
-            try:
-                expiry_time = int(timestamp_bytes)
-                if expiry_time > current_time:
-                    result[info_hash] = True
-                else:
-                    expired_hashes.append(info_hash)
-                    mediafusion_check_needed.append(info_hash)
-            except (ValueError, TypeError):
-                expired_hashes.append(info_hash)
-                mediafusion_check_needed.append(info_hash)
-
-        # Clean up expired entries if any found
-        if expired_hashes:
-            await REDIS_ASYNC_CLIENT.hdel(cache_key, *expired_hashes)
-
-        # Check MediaFusion for any hashes not found in Redis or expired
-        if mediafusion_check_needed and settings.sync_debrid_cache_streams:
-            mediafusion_results = await mediafusion_client.fetch_cache_status(
-                streaming_provider, mediafusion_check_needed
-            )
-            result.update(mediafusion_results)
-        else:
-            # If MediaFusion isn't available, mark all uncached hashes as False
-            for hash_ in mediafusion_check_needed:
-                result[hash_] = False
+            if cursor == 0:
+                break
 
-        return result
+        await REDIS_ASYNC_CLIENT.delete(cache_key)
+        logging.info(
+            f"Migrated {migrated_count} cached entries of {service} to buckets"
+        )
 
     except Exception as e:
-        logging.error(f"Error getting cached status for {service}: {e}")
-        return {hash_: False for hash_ in info_hashes}
+        logging.error(f"Error migrating cache of {service} to buckets: {e}")
 
 
 async def cleanup_service_cache(service: str) -> None:
@@ -154,6 +325,11 @@ async def cleanup_service_cache(service: str) -> None:
     Args:
         service: The debrid service name
     """
+    if settings.debrid_cache_backend == "bucketed":
+        # Buckets expire on their own; only a leftover legacy hash needs work
+        await migrate_service_cache_to_buckets(service)
+        return
+
     try:
         cache_key = f"{CACHE_KEY_PREFIX}{service}"
         current_time = int(datetime.now(tz=timezone.utc).timestamp())
@@ -199,21 +375,229 @@ async def cleanup_expired_cache(**kwargs):
     Cleanup expired entries for all services.
     """
     try:
-        services = await REDIS_ASYNC_CLIENT.keys(f"{CACHE_KEY_PREFIX}*")
-        for service in services:
-            service_name = service.decode("utf-8").replace(CACHE_KEY_PREFIX, "")
+        # Services are known upfront, so their caches are not looked up with KEYS
+        for service_name in get_cache_service_names():
+            if not await REDIS_ASYNC_CLIENT.exists(f"{CACHE_KEY_PREFIX}{service_name}"):
+                continue
             logging.info(f"Cleaning up cache for {service_name}")
             await cleanup_service_cache(service_name)
     except Exception as e:
         logging.error(f"Error during cache cleanup: {e}")
 
 
+async def scan_cached_info_hashes(service: str) -> set[str]:
+    """Every info hash currently stored for a service in the local cache."""
+    current_time = int(datetime.now(tz=timezone.utc).timestamp())
+    info_hashes = set()
+    async for hash_, timestamp_bytes in REDIS_ASYNC_CLIENT.hscan_iter(
+        f"{CACHE_KEY_PREFIX}{service}", count=1000
+    ):
+        try:
+            if int(timestamp_bytes) > current_time:
+                info_hashes.add(hash_.decode("utf-8"))
+        except (ValueError, TypeError):
+            continue
+
+    if settings.debrid_cache_backend == "bucketed":
+        for expiry_day in get_live_expiry_days():
+            for shard in range(settings.debrid_cache_shards):
+                async for hash_ in REDIS_ASYNC_CLIENT.sscan_iter(
+                    get_bucket_cache_key(service, expiry_day, shard), count=1000
+                ):
+                    info_hashes.add(hash_.decode("utf-8"))
+    return info_hashes
+
+
+class DebridCacheFilters:
+    """
+    Per-service Bloom filters of the locally cached info hashes.
+
+    A filter is built from Redis on the first lookup of a service and kept
+    current through the pub/sub updates published by store_cached_info_hashes,
+    so filters are only consulted while this process listens to that channel.
+    """
+
+    def __init__(self):
+        self.filters: dict[str, BloomFilter] = {}
+        self.built_at: dict[str, float] = {}
+        self.lookups: dict[str, int] = defaultdict(int)
+        self.definite_negatives: dict[str, int] = defaultdict(int)
+        self.false_positives: dict[str, int] = defaultdict(int)
+        self.listening = False
+        self._rebuilds: dict[str, asyncio.Task] = {}
+        self._pending: dict[str, list[str]] = {}
+
+    def filter_candidates(
+        self, service: str, info_hashes: List[str]
+    ) -> list[str] | None:
+        """
+        Return the info hashes that may be cached, or None when no filter is
+        ready for the service and every hash must be looked up.
+        """
+        if not (settings.enable_debrid_cache_filter and self.listening):
+            return None
+        bloom = self.filters.get(service)
+        if (
+            bloom is None
+            or bloom.count > bloom.capacity
+            or time.monotonic() - self.built_at[service]
+            > settings.debrid_cache_filter_rebuild_interval
+        ):
+            self.schedule_rebuild(service)
+        if bloom is None:
+            return None
+
+        candidates = [info_hash for info_hash in info_hashes if info_hash in bloom]
+        self.lookups[service] += len(info_hashes)
+        self.definite_negatives[service] += len(info_hashes) - len(candidates)
+        return candidates
+
+    def record_false_positives(self, service: str, count: int):
+        self.false_positives[service] += count
+
+    def add(self, service: str, info_hashes: List[str]):
+        if bloom := self.filters.get(service):
+            bloom.update(info_hashes)
+        if (pending := self._pending.get(service)) is not None:
+            pending.extend(info_hashes)
+
+    def reset(self):
+        self.filters.clear()
+        self.built_at.clear()
+
+    def schedule_rebuild(self, service: str):
+        if service in self._rebuilds:
+            return
+        task = asyncio.create_task(self.rebuild(service))
+        self._rebuilds[service] = task
+        task.add_done_callback(lambda _: self._rebuilds.pop(service, None))
+
+    async def rebuild(self, service: str):
+        # Updates received while scanning are replayed into the new filter
+        self._pending[service] = []
+        try:
+            info_hashes = await scan_cached_info_hashes(service)
+            bloom = BloomFilter(
+                max(settings.debrid_cache_filter_capacity, 2 * len(info_hashes)),
+                settings.debrid_cache_filter_error_rate,
+            )
+            bloom.update(info_hashes)
+            bloom.update(self._pending[service])
+            if self.listening:
+                self.filters[service] = bloom
+                self.built_at[service] = time.monotonic()
+        except Exception as e:
+            logging.error(f"Error building debrid cache filter for {service}: {e}")
+        finally:
+            self._pending.pop(service, None)
+
+    def get_stats(self, service: str) -> dict | None:
+        bloom = self.filters.get(service)
+        if bloom is None:
+            return None
+        lookups = self.lookups[service]
+        negatives = self.definite_negatives[service] + self.false_positives[service]
+        return {
+            **bloom.stats(),
+            "lookups": lookups,
+            "definite_negatives": self.definite_negatives[service],
+            "false_positives": self.false_positives[service],
+            "hit_ratio": (
+                round(self.definite_negatives[service] / lookups, 4) if lookups else 0
+            ),
+            "observed_false_positive_rate": (
+                round(self.false_positives[service] / negatives, 6) if negatives else 0
+            ),
+        }
+
+
+debrid_cache_filters = DebridCacheFilters()
+
+
+async def listen_for_debrid_cache_filter_updates():
+    """
+    Long-running task that adds the info hashes stored by any worker to the
+    local filters. Filters are dropped while disconnected since updates may
+    have been missed; they are rebuilt on the next lookup.
+    """
+    while True:
+        pubsub = REDIS_ASYNC_CLIENT.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(CACHE_FILTER_CHANNEL)
+            debrid_cache_filters.listening = True
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                data = message["data"]
+                if isinstance(data, bytes):
+                    data = data.decode("utf-8")
+                service, _, info_hashes = data.partition("|")
+                debrid_cache_filters.add(service, info_hashes.split(","))
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            logging.error(f"Debrid cache filter listener error: {error}")
+            await asyncio.sleep(5)
+        finally:
+            debrid_cache_filters.listening = False
+            debrid_cache_filters.reset()
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+
+async def count_cached_info_hashes(service: str) -> int:
+    """
+    Number of cached entries stored for a service. With the bucketed backend a
+    hash refreshed on different days is counted once per bucket.
+    """
+    count = await REDIS_ASYNC_CLIENT.hlen(f"{CACHE_KEY_PREFIX}{service}")
+    if settings.debrid_cache_backend != "bucketed":
+        return count
+
+    async with REDIS_ASYNC_CLIENT.pipeline(transaction=False) as pipe:
+        for expiry_day in get_live_expiry_days():
+            for shard in range(settings.debrid_cache_shards):
+                pipe.scard(get_bucket_cache_key(service, expiry_day, shard))
+        return count + sum(await pipe.execute())
+
+
 class MediaFusionCacheClient:
-    """Client for interacting with MediaFusion cache service"""
+    """
+    Client for interacting with MediaFusion cache service.
+
+    Uses one pooled, keep-alive HTTP client for the process. Submits are
+    queued and sent in batches per service, and hashes MediaFusion just
+    reported as uncached are remembered briefly so they aren't asked again.
+    """
 
     def __init__(self):
         self.base_url = settings.mediafusion_url
         self.timeout = httpx.Timeout(30.0)  # 30 second timeout
+        self._client: httpx.AsyncClient | None = None
+        self._pending_submits: dict[str, set[str]] = defaultdict(set)
+        self._submit_tasks: set[asyncio.Task] = set()
+        self.uncached_hashes = LocalTTLCache(
+            maxsize=settings.mediafusion_negative_cache_size,
+            ttl=settings.mediafusion_negative_cache_ttl,
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                # HTTP/2 needs the optional h2 package
+                http2=importlib.util.find_spec("h2") is not None,
+                limits=httpx.Limits(
+                    max_connections=20,
+                    max_keepalive_connections=10,
+                    keepalive_expiry=60,
+                ),
+            )
+        return self._client
 
     async def fetch_cache_status(
         self, provider: StreamingProvider, info_hashes: List[str]
@@ -231,41 +615,85 @@ class MediaFusionCacheClient:
         if not info_hashes or not settings.mediafusion_url:
             return {}
 
+        cached_status = {
+            hash_: False
+            for hash_ in info_hashes
+            if (provider.service, hash_) in self.uncached_hashes
+        }
+        info_hashes = [hash_ for hash_ in info_hashes if hash_ not in cached_status]
+        if not info_hashes:
+            return cached_status
+
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    urljoin(self.base_url, "/streaming_provider/cache/status"),
-                    json={
-                        "service": provider.service,
-                        "info_hashes": info_hashes,
-                    },
+            response = await self.client.post(
+                "/streaming_provider/cache/status",
+                json={
+                    "service": provider.service,
+                    "info_hashes": info_hashes,
+                },
+            )
+            response.raise_for_status()
+            data = response.json()
+
+            # Store any cached hashes we learn about
+            cached_hashes = []
+            for hash_, is_cached in data["cached_status"].items():
+                if is_cached:
+                    cached_hashes.append(hash_)
+                else:
+                    self.uncached_hashes.set((provider.service, hash_), True)
+            if cached_hashes:
+                await store_cached_info_hashes(
+                    provider, cached_hashes, submit_upstream=False
                 )
-                response.raise_for_status()
-                data = response.json()
-
-                # Store any cached hashes we learn about
-                cached_hashes = [
-                    hash_
-                    for hash_, is_cached in data["cached_status"].items()
-                    if is_cached
-                ]
-                if cached_hashes:
-                    await store_cached_info_hashes(provider, cached_hashes)
 
-                return data["cached_status"]
+            cached_status.update(data["cached_status"])
+            return cached_status
 
         except Exception as e:
             logging.error(f"Error fetching cache status from MediaFusion: {str(e)}")
-            return {}
+            return cached_status
 
-    async def submit_cached_hashes(
-        self, provider: StreamingProvider, info_hashes: List[str]
-    ) -> bool:
+    def queue_cached_hashes(self, provider: StreamingProvider, info_hashes: List[str]):
+        """
+        Queue cached info hashes for the next batched submit to MediaFusion.
+        The batch is sent after `mediafusion_submit_batch_interval` ms or as
+        soon as `mediafusion_submit_batch_size` hashes are pending.
+        """
+        if not info_hashes or not settings.mediafusion_url:
+            return
+
+        for hash_ in info_hashes:
+            self.uncached_hashes.pop((provider.service, hash_))
+        pending = self._pending_submits[provider.service]
+        is_new_batch = not pending
+        pending.update(info_hashes)
+
+        if len(pending) >= settings.mediafusion_submit_batch_size:
+            task = asyncio.create_task(self.flush_submits(provider.service))
+        elif is_new_batch:
+            task = asyncio.create_task(self._flush_after_interval(provider.service))
+        else:
+            return
+        self._submit_tasks.add(task)
+        task.add_done_callback(self._submit_tasks.discard)
+
+    async def _flush_after_interval(self, service: str):
+        await asyncio.sleep(settings.mediafusion_submit_batch_interval / 1000)
+        await self.flush_submits(service)
+
+    async def flush_submits(self, service: str) -> bool:
+        info_hashes = self._pending_submits.pop(service, None)
+        if not info_hashes:
+            return True
+        return await self.submit_cached_hashes(service, list(info_hashes))
+
+    async def submit_cached_hashes(self, service: str, info_hashes: List[str]) -> bool:
         """
         Submit cached info hashes to MediaFusion.
 
         Args:
-            provider: Streaming provider details
+            service: Streaming provider service name
             info_hashes: List of cached info hashes to submit
 
         Returns:
@@ -275,21 +703,28 @@ class MediaFusionCacheClient:
             return True
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    urljoin(self.base_url, "/streaming_provider/cache/submit"),
-                    json={
-                        "service": provider.service,
-                        "info_hashes": info_hashes,
-                    },
-                )
-                response.raise_for_status()
-                return True
+            response = await self.client.post(
+                "/streaming_provider/cache/submit",
+                json={
+                    "service": service,
+                    "info_hashes": info_hashes,
+                },
+            )
+            response.raise_for_status()
+            return True
 
         except Exception as e:
             logging.error(f"Error submitting cache status to MediaFusion: {str(e)}")
             return False
 
+    async def aclose(self):
+        """Send the pending submits and close the pooled client."""
+        for service in list(self._pending_submits):
+            await self.flush_submits(service)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
 
 # Global client instance
 mediafusion_client = MediaFusionCacheClient()
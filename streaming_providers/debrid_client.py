@@ -1,45 +1,131 @@
 import asyncio
+import logging
 import traceback
 from abc import abstractmethod
+from collections import defaultdict
 from base64 import b64encode, b64decode
 from contextlib import AsyncContextDecorator
 from typing import Optional, Dict, Union
 
 import aiohttp
-from aiohttp import ClientResponse, ClientTimeout, ContentTypeError, FormData
+from aiohttp import (
+    ClientResponse,
+    ClientTimeout,
+    ContentTypeError,
+    FormData,
+    TraceConfig,
+)
 from aiohttp_socks import ProxyConnector
 
 from db.config import settings
 from streaming_providers.exceptions import ProviderException
+from streaming_providers.request_scheduler import acquire_request_slot
+from streaming_providers.torrent_poller import torrent_status_poller
+
+
+class DebridSessionPool:
+    """
+    Process-wide keep-alive sessions, one per provider, shared by every client
+    instance. Auth headers are sent per request so a session never carries
+    any user's credentials.
+    """
+
+    def __init__(self):
+        self._sessions: dict[
+            str, tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession]
+        ] = {}
+        self._created_connections: dict[str, int] = defaultdict(int)
+        self._reused_connections: dict[str, int] = defaultdict(int)
+
+    def _trace_config(self, provider: str) -> TraceConfig:
+        trace_config = TraceConfig()
+
+        async def on_connection_create_end(*_):
+            self._created_connections[provider] += 1
+
+        async def on_connection_reuseconn(*_):
+            self._reused_connections[provider] += 1
+
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    def get_session(self, provider: str) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session_loop, session = self._sessions.get(provider, (None, None))
+        if session is None or session.closed or session_loop is not loop:
+            if settings.requests_proxy_url:
+                connector = ProxyConnector.from_url(
+                    settings.requests_proxy_url,
+                    limit_per_host=settings.debrid_connection_pool_size,
+                    keepalive_timeout=60,
+                )
+            else:
+                connector = aiohttp.TCPConnector(
+                    ttl_dns_cache=300,
+                    limit_per_host=settings.debrid_connection_pool_size,
+                    keepalive_timeout=60,
+                )
+            session = aiohttp.ClientSession(
+                timeout=ClientTimeout(total=15),  # Stremio timeout is 20s
+                connector=connector,
+                # Responses of one account must not set cookies for the others
+                cookie_jar=aiohttp.DummyCookieJar(),
+                trace_configs=[self._trace_config(provider)],
+            )
+            self._sessions[provider] = (loop, session)
+        return session
+
+    async def close_all(self):
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        for _, session in sessions:
+            if not session.closed:
+                await session.close()
+
+    def stats(self) -> dict:
+        stats = {}
+        for provider in self._sessions:
+            created = self._created_connections[provider]
+            reused = self._reused_connections[provider]
+            stats[provider] = {
+                "created_connections": created,
+                "reused_connections": reused,
+                "reuse_ratio": (
+                    round(reused / (created + reused), 4) if created + reused else 0
+                ),
+            }
+        return stats
+
+
+debrid_session_pool = DebridSessionPool()
 
 
 class DebridClient(AsyncContextDecorator):
+    # (requests, period in seconds) allowed per account, None to use the
+    # debrid_default_rate_limit setting
+    RATE_LIMIT: Optional[tuple[int, float]] = None
+    HAS_BATCH_STATUS = False
+
     def __init__(self, token: Optional[str] = None):
         self.token = token
         self.is_private_token = False
         self.headers: Dict[str, str] = {}
-        self._session: Optional[aiohttp.ClientSession] = None
-        self._timeout = ClientTimeout(total=15)  # Stremio timeout is 20s
+
+    @property
+    def rate_limit(self) -> Optional[tuple[int, float]]:
+        if self.RATE_LIMIT:
+            return self.RATE_LIMIT
+        if settings.debrid_default_rate_limit:
+            return settings.debrid_default_rate_limit, 60
+        return None
 
     @property
     def session(self) -> aiohttp.ClientSession:
-        if self._session is None:
-            connector = aiohttp.TCPConnector(ttl_dns_cache=300)
-            if settings.requests_proxy_url:
-                connector = ProxyConnector.from_url(settings.requests_proxy_url)
-            self._session = aiohttp.ClientSession(
-                timeout=self._timeout, connector=connector
-            )
-        return self._session
+        return debrid_session_pool.get_session(type(self).__name__)
 
     async def __aenter__(self):
-        try:
-            await self.initialize_headers()
-        except ProviderException as error:
-            if self._session:
-                await self._session.close()
-                self._session = None
-            raise error
+        await self.initialize_headers()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -52,10 +138,6 @@ class DebridClient(AsyncContextDecorator):
             except ProviderException:
                 pass
 
-        if self._session:
-            await self._session.close()
-            self._session = None
-
     async def _make_request(
         self,
         method: str,
@@ -68,6 +150,10 @@ class DebridClient(AsyncContextDecorator):
         is_http_response: bool = False,
         retry_count: int = 0,
     ) -> dict | list | str:
+        if self.rate_limit and self.token and retry_count == 0:
+            await acquire_request_slot(
+                type(self).__name__.lower(), self.token, self.rate_limit
+            )
         try:
             async with self.session.request(
                 method, url, data=data, json=json, params=params, headers=self.headers
@@ -187,21 +273,45 @@ class DebridClient(AsyncContextDecorator):
         retry_interval: int,
         torrent_info: Optional[dict] = None,
     ) -> dict:
-        """Wait for the torrent to reach a particular status."""
+        """
+        Wait for the torrent to reach a particular status. Waits longer than
+        a single check go through the shared per-account poller.
+        """
         # if torrent_info is available, check the status from it
         if torrent_info:
             if torrent_info["status"] == target_status:
                 return torrent_info
 
-        for _ in range(max_retries):
-            torrent_info = await self.get_torrent_info(torrent_id)
-            if torrent_info["status"] == target_status:
-                return torrent_info
-            await asyncio.sleep(retry_interval)
-        raise ProviderException(
-            f"Torrent did not reach {target_status} status.",
-            "torrent_not_downloaded.mp4",
+        timeout = max_retries * retry_interval
+        if timeout <= 0:
+            for _ in range(max_retries):
+                torrent_info = await self.get_torrent_info(torrent_id)
+                if torrent_info["status"] == target_status:
+                    return torrent_info
+            raise ProviderException(
+                f"Torrent did not reach {target_status} status.",
+                "torrent_not_downloaded.mp4",
+            )
+
+        torrent_info = await torrent_status_poller.wait_for_status(
+            self, torrent_id, target_status, timeout, poll_interval=retry_interval
+        )
+        if self.HAS_BATCH_STATUS:
+            # Batched status entries are summaries, fetch the full info once
+            return await self.get_torrent_info(torrent_id)
+        return torrent_info
+
+    async def get_torrent_statuses(self, torrent_ids: list[str]) -> dict[str, dict]:
+        """
+        Status of several torrents keyed by torrent id. Providers with a list
+        endpoint override this to use one call and set HAS_BATCH_STATUS. The
+        entry of a torrent whose status couldn't be fetched is the exception.
+        """
+        torrent_infos = await asyncio.gather(
+            *[self.get_torrent_info(torrent_id) for torrent_id in torrent_ids],
+            return_exceptions=True,
         )
+        return dict(zip(torrent_ids, torrent_infos))
 
     @abstractmethod
     async def get_torrent_info(self, torrent_id: str) -> dict:
@@ -220,3 +330,48 @@ class DebridClient(AsyncContextDecorator):
             # Assume as private token
             return None
         return code
+
+
+class BatchedAvailabilityMixin:
+    """
+    Instant availability for providers whose endpoint takes a bounded number
+    of info hashes per call. Mixed into a DebridClient before it.
+    """
+
+    # Most info hashes one instant availability call accepts
+    AVAILABILITY_BATCH_SIZE: int
+
+    async def get_cached_info_hashes(
+        self, info_hashes: list[str], **kwargs
+    ) -> set[str]:
+        """
+        The info hashes cached on the provider. Hashes are checked in chunks of
+        AVAILABILITY_BATCH_SIZE sent in parallel; a failed chunk counts as
+        uncached.
+        """
+        chunks = [
+            info_hashes[index : index + self.AVAILABILITY_BATCH_SIZE]
+            for index in range(0, len(info_hashes), self.AVAILABILITY_BATCH_SIZE)
+        ]
+        results = await asyncio.gather(
+            *[self._get_cached_info_hashes_chunk(chunk, **kwargs) for chunk in chunks],
+            return_exceptions=True,
+        )
+        cached_hashes = set()
+        for result in results:
+            if isinstance(result, ProviderException):
+                logging.error(
+                    f"Failed to get cached status from {type(self).__name__} "
+                    f"for a chunk: {result.message}"
+                )
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                cached_hashes.update(result)
+        return cached_hashes
+
+    @abstractmethod
+    async def _get_cached_info_hashes_chunk(
+        self, info_hashes: list[str], **kwargs
+    ) -> set[str]:
+        """Cached subset of at most AVAILABILITY_BATCH_SIZE info hashes."""
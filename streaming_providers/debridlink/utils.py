@@ -4,6 +4,7 @@ from typing import Optional
 from db.models import TorrentStreams
 from db.schemas import UserData
 from streaming_providers.debridlink.client import DebridLink
+from streaming_providers.downloaded_snapshot import filter_downloaded_info_hashes
 from streaming_providers.exceptions import ProviderException
 from streaming_providers.parser import (
     select_file_index_from_torrent,
@@ -91,8 +92,12 @@ async def update_dl_cache_status(
     """Updates the cache status of streams based on DebridLink's instant availability."""
 
     try:
-        downloaded_hashes = set(
-            await fetch_downloaded_info_hashes_from_dl(user_data, **kwargs)
+        downloaded_hashes = await filter_downloaded_info_hashes(
+            user_data,
+            kwargs.pop("user_ip", None),
+            [stream.id for stream in streams],
+            fetch_downloaded_info_hashes_from_dl,
+            **kwargs,
         )
         if not downloaded_hashes:
             return
@@ -105,13 +110,13 @@ async def update_dl_cache_status(
 
 async def fetch_downloaded_info_hashes_from_dl(
     user_data: UserData, **kwargs
-) -> list[str]:
+) -> list[str] | None:
     """Fetches the info_hashes of all torrents downloaded in the DebridLink account."""
     try:
         async with DebridLink(token=user_data.streaming_provider.token) as dl_client:
             available_torrents = await dl_client.get_user_torrent_list()
             if "error" in available_torrents:
-                return []
+                return None
             return [
                 torrent["hashString"]
                 for torrent in available_torrents["value"]
@@ -119,7 +124,7 @@ async def fetch_downloaded_info_hashes_from_dl(
             ]
 
     except ProviderException:
-        return []
+        return None
 
 
 async def delete_all_torrents_from_dl(user_data: UserData, **kwargs):
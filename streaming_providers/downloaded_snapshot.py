@@ -0,0 +1,188 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Iterable
+
+from db.config import settings
+from db.redis_database import REDIS_ASYNC_CLIENT
+from db.schemas import StreamingProvider, UserData
+from utils.crypto import get_text_hash
+from utils.singleflight import SingleFlight
+
+DOWNLOADED_SNAPSHOT_PREFIX = "downloaded_snapshot:"
+# Kept in every snapshot so the one of an empty account still exists in Redis
+SNAPSHOT_SENTINEL = "_"
+
+# Fetch functions return None when the account could not be listed
+FetchDownloadedFunction = Callable[..., Awaitable[list[str] | None]]
+
+_snapshot_fetches = SingleFlight(name="downloaded_snapshot")
+# Adds to a snapshot only while it exists, so a partial one is never created
+_add_if_exists = REDIS_ASYNC_CLIENT.register_script(
+    "if redis.call('EXISTS', KEYS[1]) == 1 then "
+    "return redis.call('SADD', KEYS[1], unpack(ARGV)) end return 0"
+)
+_refresh_tasks: set[asyncio.Task] = set()
+
+
+def get_downloaded_snapshot_key(streaming_provider: StreamingProvider) -> str:
+    """
+    Redis key of the downloaded info hashes snapshot of a provider account.
+    The account is identified by a hash of its credentials.
+    """
+    credentials = streaming_provider.model_dump_json(
+        include={
+            "service",
+            "stremthru_store_name",
+            "url",
+            "token",
+            "email",
+            "password",
+            "qbittorrent_config",
+        }
+    )
+    return (
+        f"{DOWNLOADED_SNAPSHOT_PREFIX}{streaming_provider.service}:"
+        f"{get_text_hash(credentials, full_hash=True)}"
+    )
+
+
+async def _refresh_snapshot(
+    snapshot_key: str,
+    fetch_function: FetchDownloadedFunction,
+    user_data: UserData,
+    user_ip: str | None,
+    **kwargs,
+) -> list[str]:
+    info_hashes = await fetch_function(user_data=user_data, user_ip=user_ip, **kwargs)
+    if info_hashes is None:
+        # Failed fetches are not stored, the stored snapshot is kept if any
+        return []
+    async with REDIS_ASYNC_CLIENT.pipeline(transaction=True) as pipe:
+        pipe.delete(snapshot_key)
+        pipe.sadd(snapshot_key, SNAPSHOT_SENTINEL, *info_hashes)
+        pipe.expire(snapshot_key, settings.downloaded_snapshot_max_age)
+        pipe.set(f"{snapshot_key}:fresh", 1, ex=settings.downloaded_snapshot_ttl)
+        await pipe.execute()
+    return info_hashes
+
+
+async def _refresh_in_background(
+    snapshot_key: str,
+    fetch_function: FetchDownloadedFunction,
+    user_data: UserData,
+    user_ip: str | None,
+    **kwargs,
+):
+    try:
+        await _snapshot_fetches.do(
+            snapshot_key,
+            lambda: _refresh_snapshot(
+                snapshot_key, fetch_function, user_data, user_ip, **kwargs
+            ),
+        )
+    except Exception as error:
+        logging.error(f"Failed to refresh downloaded snapshot: {error}")
+    finally:
+        await REDIS_ASYNC_CLIENT.delete(f"{snapshot_key}:refreshing")
+
+
+async def _ensure_snapshot(
+    snapshot_key: str,
+    fetch_function: FetchDownloadedFunction,
+    user_data: UserData,
+    user_ip: str | None,
+    **kwargs,
+) -> list[str] | None:
+    """
+    Make sure a snapshot is available. Returns the fetched info hashes when the
+    snapshot had to be fetched inline, or None when the stored one can be used.
+    A stale snapshot is served as is and refreshed in the background.
+    """
+    exists, is_fresh = await asyncio.gather(
+        REDIS_ASYNC_CLIENT.exists(snapshot_key),
+        REDIS_ASYNC_CLIENT.exists(f"{snapshot_key}:fresh"),
+    )
+    if not exists:
+        return await _snapshot_fetches.do(
+            snapshot_key,
+            lambda: _refresh_snapshot(
+                snapshot_key, fetch_function, user_data, user_ip, **kwargs
+            ),
+        )
+
+    if not is_fresh and await REDIS_ASYNC_CLIENT.set(
+        f"{snapshot_key}:refreshing", 1, nx=True, ex=60
+    ):
+        task = asyncio.create_task(
+            _refresh_in_background(
+                snapshot_key, fetch_function, user_data, user_ip, **kwargs
+            )
+        )
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+    return None
+
+
+async def get_downloaded_info_hashes(
+    user_data: UserData,
+    user_ip: str | None,
+    fetch_function: FetchDownloadedFunction,
+    **kwargs,
+) -> list[str]:
+    """All downloaded info hashes of the user's account, served from the snapshot."""
+    snapshot_key = get_downloaded_snapshot_key(user_data.streaming_provider)
+    fetched = await _ensure_snapshot(
+        snapshot_key, fetch_function, user_data, user_ip, **kwargs
+    )
+    if fetched is not None:
+        return fetched
+    return [
+        info_hash.decode("utf-8")
+        for info_hash in await REDIS_ASYNC_CLIENT.smembers(snapshot_key)
+        if info_hash != SNAPSHOT_SENTINEL.encode()
+    ]
+
+
+async def filter_downloaded_info_hashes(
+    user_data: UserData,
+    user_ip: str | None,
+    info_hashes: list[str],
+    fetch_function: FetchDownloadedFunction,
+    **kwargs,
+) -> set[str]:
+    """The subset of `info_hashes` downloaded in the user's account."""
+    if not info_hashes:
+        return set()
+    snapshot_key = get_downloaded_snapshot_key(user_data.streaming_provider)
+    fetched = await _ensure_snapshot(
+        snapshot_key, fetch_function, user_data, user_ip, **kwargs
+    )
+    if fetched is not None:
+        return set(info_hashes).intersection(fetched)
+    memberships = await REDIS_ASYNC_CLIENT.smismember(snapshot_key, info_hashes)
+    return {
+        info_hash for info_hash, is_member in zip(info_hashes, memberships) if is_member
+    }
+
+
+async def add_to_downloaded_snapshot(
+    streaming_provider: StreamingProvider, info_hashes: Iterable[str]
+):
+    """Record torrents we just added to the account in its existing snapshot."""
+    info_hashes = list(info_hashes)
+    if not info_hashes:
+        return
+    snapshot_key = get_downloaded_snapshot_key(streaming_provider)
+    try:
+        await _add_if_exists(keys=[snapshot_key], args=info_hashes)
+    except Exception as error:
+        logging.error(f"Failed to update downloaded snapshot: {error}")
+
+
+async def invalidate_downloaded_snapshot(streaming_provider: StreamingProvider):
+    """Drop the snapshot of an account whose torrents were removed."""
+    snapshot_key = get_downloaded_snapshot_key(streaming_provider)
+    try:
+        await REDIS_ASYNC_CLIENT.delete(snapshot_key, f"{snapshot_key}:fresh")
+    except Exception as error:
+        logging.error(f"Failed to invalidate downloaded snapshot: {error}")
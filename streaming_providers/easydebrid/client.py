@@ -1,11 +1,12 @@
 from typing import Optional
 
-from streaming_providers.debrid_client import DebridClient
+from streaming_providers.debrid_client import BatchedAvailabilityMixin, DebridClient
 from streaming_providers.exceptions import ProviderException
 
 
-class EasyDebrid(DebridClient):
+class EasyDebrid(BatchedAvailabilityMixin, DebridClient):
     BASE_URL = "https://easydebrid.com/api/v1"
+    AVAILABILITY_BATCH_SIZE = 50
 
     def __init__(self, token: Optional[str] = None, user_ip: Optional[str] = None):
         self.user_ip = user_ip
@@ -51,6 +52,20 @@ class EasyDebrid(DebridClient):
         )
         return response.get("cached", [])
 
+    async def _get_cached_info_hashes_chunk(
+        self, info_hashes: list[str], **kwargs
+    ) -> set[str]:
+        instant_availability_data = await self.get_torrent_instant_availability(
+            [f"magnet:?xt=urn:btih:{info_hash}" for info_hash in info_hashes]
+        )
+        return {
+            info_hash
+            for info_hash, instant_availability in zip(
+                info_hashes, instant_availability_data
+            )
+            if instant_availability
+        }
+
     async def create_download_link(self, magnet):
         response = await self._make_request(
             "POST",
@@ -1,6 +1,5 @@
-import asyncio
 import logging
-from typing import Any, Dict, List, Optional, Iterator
+from typing import Any, Dict, List, Optional
 
 from db.models import TorrentStreams
 from db.schemas import UserData
@@ -44,43 +43,22 @@ async def get_video_url_from_easydebrid(
         return torrent_info["files"][file_index]["url"]
 
 
-def divide_chunks(lst: List[Any], n: int) -> Iterator[List[Any]]:
-    """Yield successive n-sized chunks from lst."""
-    for i in range(0, len(lst), n):
-        yield lst[i : i + n]
-
-
-async def update_chunk_cache_status(
-    easydebrid_client: EasyDebrid, streams_chunk: List[TorrentStreams]
-) -> None:
-    """Update cache status for a chunk of streams."""
-    try:
-        instant_availability_data = (
-            await easydebrid_client.get_torrent_instant_availability(
-                [f"magnet:?xt=urn:btih:{stream.id}" for stream in streams_chunk]
-            )
-        )
-        for stream, instant_availability in zip(
-            streams_chunk, instant_availability_data
-        ):
-            stream.cached = instant_availability
-    except ProviderException as e:
-        logging.error(f"Failed to get cached status from easydebrid for a chunk: {e}")
-
-
 async def update_easydebrid_cache_status(
     streams: List[TorrentStreams], user_data: UserData, user_ip: str, **kwargs: Any
 ) -> None:
     """Updates the cache status of streams based on Easydebrid's instant availability."""
-    async with EasyDebrid(
-        token=user_data.streaming_provider.token,
-        user_ip=user_ip,
-    ) as easydebrid_client:
-        chunks = list(divide_chunks(streams, 50))
-        update_tasks = [
-            update_chunk_cache_status(easydebrid_client, chunk) for chunk in chunks
-        ]
-        await asyncio.gather(*update_tasks)
+    try:
+        async with EasyDebrid(
+            token=user_data.streaming_provider.token,
+            user_ip=user_ip,
+        ) as easydebrid_client:
+            cached_hashes = await easydebrid_client.get_cached_info_hashes(
+                [stream.id for stream in streams]
+            )
+            for stream in streams:
+                stream.cached = stream.id in cached_hashes
+    except ProviderException as e:
+        logging.error(f"Failed to get cached status from easydebrid: {e}")
 
 
 async def validate_easydebrid_credentials(
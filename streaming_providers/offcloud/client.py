@@ -5,15 +5,16 @@ from typing import Optional, List
 import aiohttp
 
 from db.models import TorrentStreams
-from streaming_providers.debrid_client import DebridClient
+from streaming_providers.debrid_client import BatchedAvailabilityMixin, DebridClient
 from streaming_providers.exceptions import ProviderException
 from streaming_providers.parser import (
     select_file_index_from_torrent,
 )
 
 
-class OffCloud(DebridClient):
+class OffCloud(BatchedAvailabilityMixin, DebridClient):
     BASE_URL = "https://offcloud.com"
+    AVAILABILITY_BATCH_SIZE = 100
 
     async def initialize_headers(self):
         pass
@@ -93,6 +94,18 @@ class OffCloud(DebridClient):
         )
         return response.get("cachedItems", {})
 
+    async def _get_cached_info_hashes_chunk(
+        self, info_hashes: list[str], **kwargs
+    ) -> set[str]:
+        instant_availability_data = await self.get_torrent_instant_availability(
+            info_hashes
+        )
+        return {
+            info_hash
+            for info_hash in info_hashes
+            if info_hash in instant_availability_data
+        }
+
     async def get_available_torrent(self, info_hash: str) -> Optional[dict]:
         available_torrents = await self.get_user_torrent_list()
         return next(
@@ -1,4 +1,5 @@
 import asyncio
+import logging
 from typing import List, Optional
 
 from db.models import TorrentStreams
@@ -69,22 +70,18 @@ async def update_oc_cache_status(
     """Updates the cache status of streams based on OffCloud's instant availability."""
     try:
         async with OffCloud(token=user_data.streaming_provider.token) as oc_client:
-            instant_availability_data = (
-                await oc_client.get_torrent_instant_availability(
-                    [stream.id for stream in streams]
-                )
+            cached_hashes = await oc_client.get_cached_info_hashes(
+                [stream.id for stream in streams]
             )
-            if not instant_availability_data:
-                return
             for stream in streams:
-                stream.cached = stream.id in instant_availability_data
-    except ProviderException:
-        pass
+                stream.cached = stream.id in cached_hashes
+    except ProviderException as e:
+        logging.error(f"Failed to get cached status from offcloud: {e}")
 
 
 async def fetch_downloaded_info_hashes_from_oc(
     user_data: UserData, **kwargs
-) -> List[str]:
+) -> List[str] | None:
     """Fetches the info_hashes of all torrents downloaded in the OffCloud account."""
     try:
         async with OffCloud(token=user_data.streaming_provider.token) as oc_client:
@@ -95,7 +92,7 @@ async def fetch_downloaded_info_hashes_from_oc(
                 if "btih:" in torrent["originalLink"]
             ]
     except ProviderException:
-        return []
+        return None
 
 
 async def delete_all_torrents_from_oc(user_data: UserData, **kwargs):
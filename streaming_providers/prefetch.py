@@ -0,0 +1,114 @@
+import asyncio
+import logging
+
+from fastapi import BackgroundTasks
+
+from db.config import settings
+from db.models import TorrentStreams
+from db.redis_database import REDIS_ASYNC_CLIENT
+from db.schemas import UserData
+from streaming_providers.exceptions import ProviderException
+from streaming_providers.request_scheduler import RequestPriority, request_priority
+
+_prefetch_tasks: set[asyncio.Task] = set()
+_prefetch_semaphore: asyncio.Semaphore | None = None
+
+
+async def prefetch_playback_url(
+    stream: TorrentStreams,
+    user_data: UserData,
+    secret_str: str,
+    user_ip: str | None,
+    season: int | None,
+    episode: int | None,
+):
+    """
+    Resolve the direct URL of a stream the way the playback endpoint does and
+    cache it under the same key, so that a later click is a cache hit.
+    """
+    from streaming_providers.cache_helpers import store_cached_info_hashes
+    from streaming_providers.downloaded_snapshot import add_to_downloaded_snapshot
+    from streaming_providers.routes import (
+        PLAYBACK_REDIS_SINGLE_FLIGHT,
+        cache_stream_url,
+        generate_cache_key,
+        get_or_create_video_url,
+    )
+
+    cached_stream_url_key = generate_cache_key(
+        user_ip, secret_str, stream.id, season, episode
+    )
+    if await REDIS_ASYNC_CLIENT.exists(cached_stream_url_key):
+        return
+
+    async def resolve_video_url() -> str:
+        background_tasks = BackgroundTasks()
+        with request_priority(RequestPriority.BACKGROUND):
+            video_url = await get_or_create_video_url(
+                stream,
+                user_data,
+                stream.id,
+                season,
+                episode,
+                None,
+                user_ip,
+                background_tasks,
+            )
+        await store_cached_info_hashes(user_data.streaming_provider, [stream.id])
+        await add_to_downloaded_snapshot(user_data.streaming_provider, [stream.id])
+        await cache_stream_url(cached_stream_url_key, video_url)
+        await background_tasks()
+        return video_url
+
+    # Lead the playback single-flight so a click during the prefetch follows
+    # it. Failures are not published, the click then resolves the URL itself.
+    try:
+        await PLAYBACK_REDIS_SINGLE_FLIGHT.lead_if_idle(
+            cached_stream_url_key, resolve_video_url, encode=str.encode
+        )
+    except ProviderException as error:
+        logging.debug(f"Playback prefetch failed for {stream.id}: {error.message}")
+    except Exception as error:
+        logging.error(f"Playback prefetch failed for {stream.id}: {error}")
+
+
+async def _prefetch_with_limit(*args):
+    global _prefetch_semaphore
+    if _prefetch_semaphore is None:
+        _prefetch_semaphore = asyncio.Semaphore(
+            settings.playback_prefetch_max_concurrency
+        )
+    async with _prefetch_semaphore:
+        await prefetch_playback_url(*args)
+
+
+def schedule_playback_prefetch(
+    streams: list[TorrentStreams],
+    user_data: UserData,
+    secret_str: str,
+    user_ip: str | None,
+    season: int | None,
+    episode: int | None,
+    is_series: bool,
+):
+    """
+    Prefetch the playback URLs of the top `playback_prefetch_count` cached
+    streams in the background. `streams` must be in the order they are shown.
+    """
+    if not settings.playback_prefetch_count or not user_data.streaming_provider:
+        return
+
+    cached_streams = [stream for stream in streams if stream.cached]
+    for stream in cached_streams[: settings.playback_prefetch_count]:
+        # Playback URLs only carry season and episode for matched episodes
+        if is_series and stream.get_episodes(season, episode):
+            stream_season, stream_episode = season, episode
+        else:
+            stream_season = stream_episode = None
+        task = asyncio.create_task(
+            _prefetch_with_limit(
+                stream, user_data, secret_str, user_ip, stream_season, stream_episode
+            )
+        )
+        _prefetch_tasks.add(task)
+        task.add_done_callback(_prefetch_tasks.discard)
@@ -5,11 +5,11 @@ from uuid import uuid4
 import aiohttp
 
 from db.config import settings
-from streaming_providers.debrid_client import DebridClient
+from streaming_providers.debrid_client import BatchedAvailabilityMixin, DebridClient
 from streaming_providers.exceptions import ProviderException
 
 
-class Premiumize(DebridClient):
+class Premiumize(BatchedAvailabilityMixin, DebridClient):
     BASE_URL = "https://www.premiumize.me/api"
     OAUTH_TOKEN_URL = "https://www.premiumize.me/token"
     OAUTH_URL = "https://www.premiumize.me/authorize"
@@ -17,6 +17,7 @@ class Premiumize(DebridClient):
 
     OAUTH_CLIENT_ID = settings.premiumize_oauth_client_id
     OAUTH_CLIENT_SECRET = settings.premiumize_oauth_client_secret
+    AVAILABILITY_BATCH_SIZE = 100
 
     def __init__(self, token: Optional[str] = None, user_ip: Optional[str] = None):
         self.user_ip = user_ip
@@ -145,6 +146,20 @@ class Premiumize(DebridClient):
             )
         return results
 
+    async def _get_cached_info_hashes_chunk(
+        self, info_hashes: list[str], **kwargs
+    ) -> set[str]:
+        instant_availability_data = await self.get_torrent_instant_availability(
+            info_hashes
+        )
+        return {
+            info_hash
+            for info_hash, cached_status in zip(
+                info_hashes, instant_availability_data.get("response", [])
+            )
+            if cached_status
+        }
+
     async def disable_access_token(self):
         pass
 
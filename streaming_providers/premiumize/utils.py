@@ -1,4 +1,5 @@
 import asyncio
+import logging
 from os.path import basename
 from typing import Any, Optional
 
@@ -136,29 +137,24 @@ async def update_pm_cache_status(
 
     try:
         async with Premiumize(token=user_data.streaming_provider.token) as pm_client:
-            instant_availability_data = (
-                await pm_client.get_torrent_instant_availability(
-                    [stream.id for stream in streams]
-                )
+            cached_hashes = await pm_client.get_cached_info_hashes(
+                [stream.id for stream in streams]
             )
-            for stream, cached_status in zip(
-                streams, instant_availability_data.get("response")
-            ):
-                stream.cached = cached_status
-
-    except ProviderException:
-        pass
+            for stream in streams:
+                stream.cached = stream.id in cached_hashes
+    except ProviderException as e:
+        logging.error(f"Failed to get cached status from premiumize: {e}")
 
 
 async def fetch_downloaded_info_hashes_from_premiumize(
     user_data: UserData, **kwargs
-) -> list[str]:
+) -> list[str] | None:
     """Fetches the info_hashes of all torrents downloaded in the Premiumize account."""
     try:
         async with Premiumize(token=user_data.streaming_provider.token) as pm_client:
             available_folders = await pm_client.get_folder_list()
             if "content" not in available_folders:
-                return []
+                return None
             return [
                 folder["name"]
                 for folder in available_folders["content"]
@@ -166,7 +162,7 @@ async def fetch_downloaded_info_hashes_from_premiumize(
             ]
 
     except ProviderException:
-        return []
+        return None
 
 
 async def delete_all_torrents_from_pm(user_data: UserData, **kwargs):
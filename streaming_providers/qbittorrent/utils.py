@@ -371,7 +371,7 @@ async def update_qbittorrent_cache_status(
         stream.cached = torrents_dict.get(stream.id, 0) == 1
 
 
-async def fetch_info_hashes_from_webdav(user_data: UserData, **kwargs) -> list[str]:
+async def fetch_info_hashes_from_webdav(user_data: UserData, **kwargs) -> list[str] | None:
     """Fetches the info_hashes from directories in the WebDAV server that are named after the torrent's info hashes."""
     try:
         async with initialize_webdav(user_data) as webdav:
@@ -379,7 +379,7 @@ async def fetch_info_hashes_from_webdav(user_data: UserData, **kwargs) -> list[s
                 user_data.streaming_provider.qbittorrent_config.webdav_downloads_path
             )
     except ProviderException:
-        return []
+        return None
 
     # Filter out directory names that match the length of an info hash (40 chars) plus the trailing slash
     info_hashes = [
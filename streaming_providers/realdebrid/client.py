@@ -8,6 +8,8 @@ from streaming_providers.exceptions import ProviderException
 
 class RealDebrid(DebridClient):
     BASE_URL = "https://api.real-debrid.com/rest/1.0"
+    RATE_LIMIT = (250, 60)
+    HAS_BATCH_STATUS = True
     OAUTH_URL = "https://api.real-debrid.com/oauth/v2"
     OPENSOURCE_CLIENT_ID = "X245A4XAIBGVM"
 
@@ -153,6 +155,21 @@ class RealDebrid(DebridClient):
             "GET", f"{self.BASE_URL}/torrents/info/{torrent_id}"
         )
 
+    async def get_torrent_statuses(self, torrent_ids: list[str]) -> dict[str, dict]:
+        # The torrent list holds the most recent torrents, older ones are
+        # looked up one by one.
+        torrents = {
+            torrent["id"]: torrent
+            for torrent in await self.get_user_torrent_list()
+            if torrent["id"] in torrent_ids
+        }
+        missing_ids = [
+            torrent_id for torrent_id in torrent_ids if torrent_id not in torrents
+        ]
+        if missing_ids:
+            torrents.update(await super().get_torrent_statuses(missing_ids))
+        return torrents
+
     async def disable_access_token(self):
         return await self._make_request(
             "GET",
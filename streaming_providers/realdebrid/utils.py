@@ -1,13 +1,23 @@
 import asyncio
+import logging
+from datetime import timedelta
 from typing import Optional
 
+import dramatiq
+
 from db.models import TorrentStreams
 from db.schemas import UserData
+from streaming_providers.downloaded_snapshot import (
+    filter_downloaded_info_hashes,
+    invalidate_downloaded_snapshot,
+)
 from streaming_providers.exceptions import ProviderException
 from streaming_providers.parser import (
     select_file_index_from_torrent,
 )
 from streaming_providers.realdebrid.client import RealDebrid
+from streaming_providers.request_scheduler import RequestPriority, request_priority
+from utils.crypto import crypto_utils
 
 
 async def create_download_link(
@@ -167,8 +177,12 @@ async def update_rd_cache_status(
     """Updates the cache status of streams based on user's downloaded torrents in RealDebrid."""
 
     try:
-        downloaded_hashes = set(
-            await fetch_downloaded_info_hashes_from_rd(user_data, user_ip, **kwargs)
+        downloaded_hashes = await filter_downloaded_info_hashes(
+            user_data,
+            user_ip,
+            [stream.id for stream in streams],
+            fetch_downloaded_info_hashes_from_rd,
+            **kwargs,
         )
         if not downloaded_hashes:
             return
@@ -181,7 +195,7 @@ async def update_rd_cache_status(
 
 async def fetch_downloaded_info_hashes_from_rd(
     user_data: UserData, user_ip: str, **kwargs
-) -> list[str]:
+) -> list[str] | None:
     """Fetches the info_hashes of all torrents downloaded in the RealDebrid account."""
     try:
         async with RealDebrid(
@@ -195,24 +209,53 @@ async def fetch_downloaded_info_hashes_from_rd(
             ]
 
     except ProviderException:
-        return []
+        return None
 
 
 async def delete_all_watchlist_rd(user_data: UserData, user_ip: str, **kwargs):
-    """Deletes all torrents from the RealDebrid watchlist."""
+    """
+    Queues the deletion of all torrents from the RealDebrid watchlist. RealDebrid
+    deletes torrents one by one, which takes longer than a Stremio request.
+    """
+    delete_all_watchlist_rd_job.send(
+        encoded_user_data=crypto_utils.encode_user_data(user_data), user_ip=user_ip
+    )
+
+
+@dramatiq.actor(
+    time_limit=15 * 60 * 1000,  # 15 minutes
+    priority=5,
+    max_retries=5,
+    min_backoff=timedelta(minutes=1),
+    max_backoff=timedelta(minutes=10),
+)
+async def delete_all_watchlist_rd_job(encoded_user_data: str, user_ip: str, **kwargs):
+    """
+    Deletes all torrents from the RealDebrid watchlist. Torrents that failed to
+    be deleted are left to the retries, which list the remaining ones again.
+    """
+    user_data = crypto_utils.decode_user_data(encoded_user_data)
     async with RealDebrid(
         token=user_data.streaming_provider.token, user_ip=user_ip
     ) as rd_client:
-        torrents = await rd_client.get_user_torrent_list()
-        semaphore = asyncio.Semaphore(3)
-
-        async def delete_torrent(torrent_id):
-            async with semaphore:
-                await rd_client.delete_torrent(torrent_id)
+        # Paced by the account's rate limit, behind playback and cache checks
+        with request_priority(RequestPriority.BACKGROUND):
+            torrents = await rd_client.get_user_torrent_list()
+            results = await asyncio.gather(
+                *[rd_client.delete_torrent(torrent["id"]) for torrent in torrents],
+                return_exceptions=True,
+            )
+    await invalidate_downloaded_snapshot(user_data.streaming_provider)
 
-        await asyncio.gather(
-            *[delete_torrent(torrent["id"]) for torrent in torrents],
-            return_exceptions=True,
+    failures = [result for result in results if isinstance(result, Exception)]
+    if failures:
+        logging.warning(
+            f"Failed to delete {len(failures)} of {len(torrents)} RealDebrid "
+            f"torrents: {failures[0]}"
+        )
+        raise ProviderException(
+            f"Failed to delete {len(failures)} RealDebrid torrents",
+            "api_error.mp4",
         )
 
 
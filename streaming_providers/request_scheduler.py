@@ -0,0 +1,111 @@
+import asyncio
+import contextlib
+from contextvars import ContextVar
+from enum import IntEnum
+
+from prometheus_client import Histogram
+
+from db.redis_database import REDIS_ASYNC_CLIENT
+from streaming_providers.exceptions import ProviderException
+from utils.crypto import get_text_hash
+
+RATE_LIMIT_KEY_PREFIX = "debrid_rate_limit:"
+
+
+class RequestPriority(IntEnum):
+    PLAYBACK = 0
+    CACHE_CHECK = 1
+    BACKGROUND = 2  # watchlist, deletes and prefetches
+
+
+# Share of the bucket a priority class must leave for the classes above it,
+# and how long it may wait for a token before giving up.
+PRIORITY_RESERVES = {
+    RequestPriority.PLAYBACK: 0.0,
+    RequestPriority.CACHE_CHECK: 0.2,
+    RequestPriority.BACKGROUND: 0.5,
+}
+PRIORITY_MAX_WAITS = {
+    RequestPriority.PLAYBACK: 10.0,
+    RequestPriority.CACHE_CHECK: 3.0,
+    RequestPriority.BACKGROUND: 60.0,
+}
+
+debrid_request_priority: ContextVar[RequestPriority] = ContextVar(
+    "debrid_request_priority", default=RequestPriority.CACHE_CHECK
+)
+
+debrid_queue_wait_histogram = Histogram(
+    "debrid_request_queue_wait_seconds",
+    "Time debrid API requests waited for a rate limit token",
+    labelnames=["service", "priority"],
+    buckets=(0.005, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+# Token bucket refilled continuously using the Redis clock, so every pod sees
+# the same state. Takes a token only if `reserve` tokens remain afterwards and
+# otherwise returns the milliseconds until that will be possible.
+_take_token = REDIS_ASYNC_CLIENT.register_script("""
+    local capacity = tonumber(ARGV[1])
+    local refill_per_ms = tonumber(ARGV[2])
+    local reserve = tonumber(ARGV[3])
+    local time = redis.call('TIME')
+    local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill_per_ms)
+    local wait = 0
+    if tokens - 1 >= reserve then
+        tokens = tokens - 1
+    else
+        wait = math.ceil((reserve + 1 - tokens) / refill_per_ms)
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / refill_per_ms) + 1000)
+    return wait
+    """)
+
+
+@contextlib.contextmanager
+def request_priority(priority: RequestPriority):
+    """Run the debrid requests made inside the block with the given priority."""
+    token = debrid_request_priority.set(priority)
+    try:
+        yield
+    finally:
+        debrid_request_priority.reset(token)
+
+
+async def acquire_request_slot(
+    service: str, account: str, rate_limit: tuple[int, float]
+):
+    """
+    Wait for a token of the (service, account) bucket. `rate_limit` is the
+    number of requests allowed per period in seconds.
+    """
+    priority = debrid_request_priority.get()
+    capacity, period = rate_limit
+    reserve = capacity * PRIORITY_RESERVES[priority]
+    key = f"{RATE_LIMIT_KEY_PREFIX}{service}:{get_text_hash(account, full_hash=True)}"
+    loop = asyncio.get_running_loop()
+    started_at = loop.time()
+    deadline = started_at + PRIORITY_MAX_WAITS[priority]
+
+    try:
+        while True:
+            wait_ms = await _take_token(
+                keys=[key], args=[capacity, capacity / (period * 1000), reserve]
+            )
+            if not wait_ms:
+                return
+            if loop.time() + wait_ms / 1000 > deadline:
+                raise ProviderException(
+                    f"{service} rate limit reached, try again later",
+                    "too_many_requests.mp4",
+                )
+            await asyncio.sleep(wait_ms / 1000)
+    finally:
+        debrid_queue_wait_histogram.labels(
+            service=service, priority=priority.name.lower()
+        ).observe(loop.time() - started_at)
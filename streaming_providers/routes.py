@@ -28,18 +28,33 @@ from streaming_providers.cache_helpers import (
     get_cached_status,
 )
 from streaming_providers.debridlink.api import router as debridlink_router
+from streaming_providers.downloaded_snapshot import (
+    add_to_downloaded_snapshot,
+    invalidate_downloaded_snapshot,
+)
 from streaming_providers.exceptions import ProviderException
 from streaming_providers.premiumize.api import router as premiumize_router
 from streaming_providers.realdebrid.api import router as realdebrid_router
+from streaming_providers.request_scheduler import RequestPriority, request_priority
 from streaming_providers.seedr.api import router as seedr_router
 from utils import crypto, torrent, wrappers, const
 from utils.const import CONTENT_TYPE_HEADERS_MAPPING
-from utils.lock import acquire_redis_lock, release_redis_lock
 from utils.network import get_user_public_ip, get_user_data, encode_mediaflow_proxy_url
+from utils.singleflight import RedisSingleFlight, SingleFlight
 from db.redis_database import REDIS_ASYNC_CLIENT
 
 # Seconds until when the Video URLs are cached
 URL_CACHE_EXP = 3600
+# Seconds a request waits for a concurrent request resolving the same URL
+PLAYBACK_WAIT_TIMEOUT = 60
+
+# Concurrent playback requests for the same URL (Stremio sends HEAD and GET
+# together) share one resolution: within the process through SingleFlight and
+# across pods through RedisSingleFlight.
+PLAYBACK_SINGLE_FLIGHT = SingleFlight(name="playback")
+PLAYBACK_REDIS_SINGLE_FLIGHT = RedisSingleFlight(
+    name="playback", lease_ttl=PLAYBACK_WAIT_TIMEOUT, result_ttl=30
+)
 
 router = APIRouter()
 
@@ -234,14 +249,13 @@ async def streaming_provider_endpoint(
     response: Response,
     request: Request,
     user_data: Annotated[schemas.UserData, Depends(get_user_data)],
-    background_tasks: BackgroundTasks,
     season: int = None,
     episode: int = None,
     filename: str = None,
 ):
     """
     Handles streaming provider requests, using caching for performance and
-    locking mechanisms to prevent duplicate tasks.
+    single-flight coalescing to prevent duplicate tasks.
     """
     response.headers.update(const.NO_CACHE_HEADERS)
     info_hash = info_hash.lower()
@@ -264,36 +278,49 @@ async def streaming_provider_endpoint(
     # Fetch stream from DB
     stream = await fetch_stream_or_404(info_hash)
 
-    # Acquire Redis lock to prevent duplicate download tasks
-    acquired, lock = await acquire_redis_lock(
-        f"{cached_stream_url_key}_locked", timeout=60, block=True
-    )
-    if not acquired:
-        raise HTTPException(status_code=429, detail="Too many requests.")
-
-    redirect_status_code = 307
+    async def resolve_video_url() -> str:
+        # The run is shared by several requests, so it doesn't use the
+        # background tasks of the one that started it
+        resolve_background_tasks = BackgroundTasks()
+        with request_priority(RequestPriority.PLAYBACK):
+            video_url = await get_or_create_video_url(
+                stream,
+                user_data,
+                info_hash,
+                season,
+                episode,
+                filename,
+                user_ip,
+                resolve_background_tasks,
+            )
+        await store_cached_info_hashes(user_data.streaming_provider, [info_hash])
+        await add_to_downloaded_snapshot(user_data.streaming_provider, [info_hash])
+        await cache_stream_url(cached_stream_url_key, video_url)
+        await resolve_background_tasks()
+        return video_url
 
+    # Followers await the leader's URL instead of resolving it again. Errors
+    # are not published, a follower of a failed leader resolves the URL itself.
     try:
-        video_url = await get_or_create_video_url(
-            stream,
-            user_data,
-            info_hash,
-            season,
-            episode,
-            filename,
-            user_ip,
-            background_tasks,
+        video_url = await PLAYBACK_SINGLE_FLIGHT.do(
+            cached_stream_url_key,
+            lambda: PLAYBACK_REDIS_SINGLE_FLIGHT.do(
+                cached_stream_url_key,
+                resolve_video_url,
+                encode=str.encode,
+                decode=bytes.decode,
+                wait_timeout=PLAYBACK_WAIT_TIMEOUT,
+            ),
         )
-        await store_cached_info_hashes(user_data.streaming_provider, [info_hash])
-        await cache_stream_url(cached_stream_url_key, video_url)
-        video_url = apply_mediaflow_proxy_if_needed(video_url, user_data)
-        redirect_status_code = 302
     except ProviderException as error:
         video_url = handle_provider_exception(error, info_hash)
+        redirect_status_code = 307
     except Exception as e:
         video_url = handle_generic_exception(e, info_hash)
-    finally:
-        await release_redis_lock(lock)
+        redirect_status_code = 307
+    else:
+        video_url = apply_mediaflow_proxy_if_needed(video_url, user_data)
+        redirect_status_code = 302
 
     return RedirectResponse(
         url=video_url, headers=response.headers, status_code=redirect_status_code
@@ -330,7 +357,9 @@ async def delete_all_watchlist(
         )
 
     try:
-        await delete_all_watchlist_function(**kwargs)
+        with request_priority(RequestPriority.BACKGROUND):
+            await delete_all_watchlist_function(**kwargs)
+        await invalidate_downloaded_snapshot(user_data.streaming_provider)
         video_url = f"{settings.host_url}/static/exceptions/watchlist_deleted.mp4"
 
     except ProviderException as error:
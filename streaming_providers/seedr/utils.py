@@ -12,6 +12,7 @@ from aioseedrcc.exception import SeedrException
 
 from db.models import TorrentStreams
 from db.schemas import UserData
+from streaming_providers.downloaded_snapshot import filter_downloaded_info_hashes
 from streaming_providers.exceptions import ProviderException
 from streaming_providers.parser import select_file_index_from_torrent
 
@@ -254,6 +255,17 @@ async def update_seedr_cache_status(
 ) -> None:
     """Update cache status for multiple streams."""
     try:
+        # Only torrents present in the account can be cached
+        downloaded_hashes = await filter_downloaded_info_hashes(
+            user_data,
+            kwargs.pop("user_ip", None),
+            [stream.id for stream in streams],
+            fetch_downloaded_info_hashes_from_seedr,
+            **kwargs,
+        )
+        if not downloaded_hashes:
+            return
+
         async with get_seedr_client(user_data) as seedr:
             contents = await seedr.list_contents()
 
@@ -269,7 +281,7 @@ async def update_seedr_cache_status(
 
             # Update stream cache status
             for stream in streams:
-                if stream.id in folder_map:
+                if stream.id in downloaded_hashes and stream.id in folder_map:
                     folder_content = await seedr.list_contents(folder_map[stream.id])
                     if folder_content["folders"]:
                         stream.cached = True
@@ -279,7 +291,7 @@ async def update_seedr_cache_status(
 
 async def fetch_downloaded_info_hashes_from_seedr(
     user_data: UserData, **kwargs
-) -> List[str]:
+) -> List[str] | None:
     """Fetch the info_hashes of all downloaded torrents in the user's account."""
     try:
         async with get_seedr_client(user_data) as seedr:
@@ -290,7 +302,7 @@ async def fetch_downloaded_info_hashes_from_seedr(
                 if len(folder["name"]) in (40, 32)
             ]
     except ProviderException:
-        return []
+        return None
 
 
 async def delete_all_torrents_from_seedr(user_data: UserData, **kwargs) -> None:
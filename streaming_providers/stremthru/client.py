@@ -1,7 +1,7 @@
 from typing import Any, Optional
 from urllib.parse import urljoin
 
-from streaming_providers.debrid_client import DebridClient
+from streaming_providers.debrid_client import BatchedAvailabilityMixin, DebridClient
 from streaming_providers.exceptions import ProviderException
 
 
@@ -13,8 +13,10 @@ class StremThruError(Exception):
         self.store_name = error.get("store_name", "")
 
 
-class StremThru(DebridClient):
+class StremThru(BatchedAvailabilityMixin, DebridClient):
     AGENT = "mediafusion"
+    # Hashes are sent in the query string, keep the URL short
+    AVAILABILITY_BATCH_SIZE = 100
     auth: str | dict
 
     def __init__(self, url: str, token: str, **kwargs):
@@ -27,6 +29,8 @@ class StremThru(DebridClient):
             }
         else:
             self.auth = token
+        # Store that answered the last instant availability check
+        self.store_name: str | None = None
         super().__init__(token)
 
     async def initialize_headers(self):
@@ -130,6 +134,21 @@ class StremThru(DebridClient):
             is_http_response=is_http_response,
         )
 
+    async def _get_cached_info_hashes_chunk(
+        self, info_hashes: list[str], stremio_video_id: str = None, **kwargs
+    ) -> set[str]:
+        res = await self.get_torrent_instant_availability(
+            info_hashes,
+            stremio_video_id=stremio_video_id,
+            is_http_response=True,
+        )
+        self.store_name = res.headers.get("X-StremThru-Store-Name", self.store_name)
+        return {
+            torrent.get("hash")
+            for torrent in res.body.get("data", {}).get("items", [])
+            if torrent["status"] == "cached"
+        }
+
     async def get_available_torrent(self, info_hash) -> dict[str, Any] | None:
         available_torrents = await self.get_user_torrent_list()
         for torrent in available_torrents["items"]:
@@ -1,4 +1,5 @@
 import asyncio
+import logging
 
 from db.models import TorrentStreams
 from db.schemas import UserData
@@ -85,27 +86,19 @@ async def update_st_cache_status(
 
     try:
         async with _get_client(user_data) as st_client:
-            res = await st_client.get_torrent_instant_availability(
-                [stream.id for stream in streams],
-                stremio_video_id=stremio_video_id,
-                is_http_response=True,
+            cached_hashes = await st_client.get_cached_info_hashes(
+                [stream.id for stream in streams], stremio_video_id=stremio_video_id
             )
-            instant_items = res.body.get("data", {}).get("items", [])
             for stream in streams:
-                stream.cached = any(
-                    torrent["status"] == "cached"
-                    for torrent in instant_items
-                    if torrent.get("hash") == stream.id
-                )
-            store_name = res.headers.get("X-StremThru-Store-Name", None)
-            return store_name
-    except ProviderException:
-        pass
+                stream.cached = stream.id in cached_hashes
+            return st_client.store_name
+    except ProviderException as e:
+        logging.error(f"Failed to get cached status from stremthru: {e}")
 
 
 async def fetch_downloaded_info_hashes_from_st(
     user_data: UserData, **kwargs
-) -> list[str]:
+) -> list[str] | None:
     """Fetches the info_hashes of all torrents downloaded in the StremThru account."""
     try:
         async with _get_client(user_data) as st_client:
@@ -113,7 +106,7 @@ async def fetch_downloaded_info_hashes_from_st(
             return [torrent["hash"] for torrent in available_torrents["items"]]
 
     except ProviderException:
-        return []
+        return None
 
 
 async def delete_all_torrents_from_st(user_data: UserData, **kwargs):
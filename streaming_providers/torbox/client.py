@@ -2,12 +2,15 @@ from typing import Any, Optional
 
 import aiohttp
 
-from streaming_providers.debrid_client import DebridClient
+from streaming_providers.debrid_client import BatchedAvailabilityMixin, DebridClient
 from streaming_providers.exceptions import ProviderException
 
 
-class Torbox(DebridClient):
+class Torbox(BatchedAvailabilityMixin, DebridClient):
     BASE_URL = "https://api.torbox.app/v1/api"
+    RATE_LIMIT = (300, 60)
+    # Torbox allows only 100 torrents per cache check
+    AVAILABILITY_BATCH_SIZE = 80
 
     async def initialize_headers(self):
         self.headers = {"Authorization": f"Bearer {self.token}"}
@@ -121,6 +124,18 @@ class Torbox(DebridClient):
         )
         return response.get("data", [])
 
+    async def _get_cached_info_hashes_chunk(
+        self, info_hashes: list[str], **kwargs
+    ) -> set[str]:
+        instant_availability_data = (
+            await self.get_torrent_instant_availability(info_hashes) or []
+        )
+        return {
+            info_hash
+            for info_hash in info_hashes
+            if info_hash in instant_availability_data
+        }
+
     async def get_available_torrent(self, info_hash) -> dict[str, Any] | None:
         response = await self.get_user_torrent_list()
         torrent_list = response.get("data", [])
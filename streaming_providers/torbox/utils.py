@@ -1,6 +1,5 @@
-import asyncio
 import logging
-from typing import Any, Dict, List, Optional, Iterator
+from typing import Any, Dict, List, Optional
 
 from db.models import TorrentStreams
 from db.schemas import UserData
@@ -73,57 +72,34 @@ async def get_video_url_from_torbox(
     )
 
 
-def divide_chunks(lst: List[Any], n: int) -> Iterator[List[Any]]:
-    """Yield successive n-sized chunks from lst."""
-    for i in range(0, len(lst), n):
-        yield lst[i : i + n]
-
-
-async def update_chunk_cache_status(
-    torbox_client: Torbox, streams_chunk: List[TorrentStreams]
-) -> None:
-    """Update cache status for a chunk of streams."""
-    try:
-        instant_availability_data = (
-            await torbox_client.get_torrent_instant_availability(
-                [stream.id for stream in streams_chunk]
-            )
-            or []
-        )
-        if not instant_availability_data:
-            return
-        for stream in streams_chunk:
-            stream.cached = bool(stream.id in instant_availability_data)
-    except ProviderException as e:
-        logging.error(f"Failed to get cached status from torbox for a chunk: {e}")
-
-
 async def update_torbox_cache_status(
     streams: List[TorrentStreams], user_data: UserData, **kwargs: Any
 ) -> None:
     """Updates the cache status of streams based on Torbox's instant availability."""
-    async with Torbox(token=user_data.streaming_provider.token) as torbox_client:
-        # Torbox allows only 100 torrents to be passed for cache status, send 80 at a time.
-        chunks = list(divide_chunks(streams, 80))
-        update_tasks = [
-            update_chunk_cache_status(torbox_client, chunk) for chunk in chunks
-        ]
-        await asyncio.gather(*update_tasks)
+    try:
+        async with Torbox(token=user_data.streaming_provider.token) as torbox_client:
+            cached_hashes = await torbox_client.get_cached_info_hashes(
+                [stream.id for stream in streams]
+            )
+            for stream in streams:
+                stream.cached = stream.id in cached_hashes
+    except ProviderException as e:
+        logging.error(f"Failed to get cached status from torbox: {e}")
 
 
 async def fetch_downloaded_info_hashes_from_torbox(
     user_data: UserData, **kwargs: Any
-) -> List[str]:
+) -> List[str] | None:
     """Fetches the info_hashes of all torrents downloaded in the Torbox account."""
     try:
         async with Torbox(token=user_data.streaming_provider.token) as torbox_client:
             available_torrents = await torbox_client.get_user_torrent_list()
-            if not available_torrents.get("data"):
-                return []
+            if available_torrents.get("data") is None:
+                return None
             return [torrent["hash"] for torrent in available_torrents["data"]]
 
     except ProviderException:
-        return []
+        return None
 
 
 async def select_file_id_from_torrent(
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import TYPE_CHECKING, Union
+
+from streaming_providers.exceptions import ProviderException
+
+if TYPE_CHECKING:
+    from streaming_providers.debrid_client import DebridClient
+
+MIN_POLL_INTERVAL = 1.0
+MAX_POLL_INTERVAL = 10.0
+POLL_BACKOFF = 1.5
+
+
+class AccountTorrentPoller:
+    """
+    Polls the status of every torrent awaited on one provider account with a
+    single batched call per tick, backing off from the shortest retry interval
+    of the waiting requests while nothing changes, and wakes them through
+    futures.
+    """
+
+    def __init__(self, on_idle):
+        self.waiters: dict[str, list[tuple[Union[str, int], asyncio.Future]]] = (
+            defaultdict(list)
+        )
+        self.clients: list["DebridClient"] = []
+        self.poll_intervals: list[float] = []
+        self.interval = MIN_POLL_INTERVAL
+        self._wake_up = asyncio.Event()
+        self._on_idle = on_idle
+        self._task: asyncio.Task | None = None
+
+    @property
+    def base_interval(self) -> float:
+        return max(MIN_POLL_INTERVAL, min(self.poll_intervals, default=0))
+
+    def add(self, client, torrent_id, target_status, future, poll_interval):
+        self.waiters[torrent_id].append((target_status, future))
+        self.clients.append(client)
+        self.poll_intervals.append(poll_interval)
+        # A new torrent is most likely to change soon, poll it right away
+        self.interval = self.base_interval
+        self._wake_up.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def remove(self, client, torrent_id, future, poll_interval):
+        waiters = self.waiters.get(torrent_id, [])
+        waiters[:] = [waiter for waiter in waiters if waiter[1] is not future]
+        if not waiters:
+            self.waiters.pop(torrent_id, None)
+        self.clients.remove(client)
+        self.poll_intervals.remove(poll_interval)
+
+    async def _run(self):
+        try:
+            while self.waiters:
+                await self._poll_once()
+                self._wake_up.clear()
+                try:
+                    await asyncio.wait_for(self._wake_up.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    self.interval = min(
+                        max(MAX_POLL_INTERVAL, self.base_interval),
+                        self.interval * POLL_BACKOFF,
+                    )
+        finally:
+            self._on_idle(self)
+
+    async def _poll_once(self):
+        # Any waiting request's client can be used, they share the account
+        client = self.clients[-1]
+        try:
+            statuses = await client.get_torrent_statuses(list(self.waiters))
+        except ProviderException as error:
+            for waiters in self.waiters.values():
+                for _, future in waiters:
+                    if not future.done():
+                        future.set_exception(error)
+            return
+        except Exception as error:
+            logging.error(f"Torrent status poll failed: {error}")
+            return
+
+        for torrent_id, torrent_info in statuses.items():
+            for target_status, future in self.waiters.get(torrent_id, []):
+                if future.done():
+                    continue
+                if isinstance(torrent_info, ProviderException):
+                    # Only the waits on this torrent fail, e.g. it was deleted
+                    future.set_exception(torrent_info)
+                elif isinstance(torrent_info, Exception):
+                    logging.error(
+                        f"Torrent status poll failed for {torrent_id}: {torrent_info}"
+                    )
+                elif torrent_info.get("status") == target_status:
+                    future.set_result(torrent_info)
+
+
+class TorrentStatusPoller:
+    """Registry of the per-account pollers of this process."""
+
+    def __init__(self):
+        self._pollers: dict[tuple[str, str], AccountTorrentPoller] = {}
+
+    async def wait_for_status(
+        self,
+        client: "DebridClient",
+        torrent_id: str,
+        target_status: Union[str, int],
+        timeout: float,
+        poll_interval: float,
+    ) -> dict:
+        key = (type(client).__name__, client.token)
+        poller = self._pollers.get(key)
+        if poller is None:
+            poller = AccountTorrentPoller(on_idle=lambda idle: self._discard(key, idle))
+            self._pollers[key] = poller
+
+        future = asyncio.get_running_loop().create_future()
+        poller.add(client, torrent_id, target_status, future, poll_interval)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise ProviderException(
+                f"Torrent did not reach {target_status} status.",
+                "torrent_not_downloaded.mp4",
+            )
+        finally:
+            poller.remove(client, torrent_id, future, poll_interval)
+
+    def _discard(self, key, poller):
+        if self._pollers.get(key) is poller and not poller.waiters:
+            del self._pollers[key]
+
+
+torrent_status_poller = TorrentStatusPoller()
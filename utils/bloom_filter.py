@@ -0,0 +1,62 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    In-process Bloom filter over strings.
+
+    `in` returns False only for items that were never added; a True may be a
+    false positive with roughly `error_rate` probability once `capacity` items
+    were added. Bit positions come from double hashing one blake2b digest.
+    """
+
+    __slots__ = ("capacity", "error_rate", "size", "hash_count", "count", "_bits")
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        if capacity <= 0 or not 0 < error_rate < 1:
+            raise ValueError("Capacity must be positive and error rate in (0, 1)")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for index in range(self.hash_count):
+            yield (first + index * second) % self.size
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def estimated_false_positive_rate(self) -> float:
+        return (
+            1 - math.exp(-self.hash_count * self.count / self.size)
+        ) ** self.hash_count
+
+    def stats(self) -> dict:
+        return {
+            "items": self.count,
+            "capacity": self.capacity,
+            "size_bytes": len(self._bits),
+            "hash_count": self.hash_count,
+            "false_positive_rate": round(self.estimated_false_positive_rate(), 6),
+        }
@@ -0,0 +1,81 @@
+import zlib
+from typing import Callable, Type, TypeVar
+
+from pydantic import BaseModel
+
+from db.config import settings
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Encoded values start with a zero byte, which a legacy JSON entry never does,
+# followed by one byte identifying the codec used for the payload.
+CACHE_CODEC_MARKER = b"\x00"
+
+# codec id -> (name, encode, decode); each pair converts JSON bytes to the
+# stored payload and back.
+CACHE_CODECS: dict[
+    int, tuple[str, Callable[[bytes], bytes], Callable[[bytes], bytes]]
+] = {}
+
+
+def register_cache_codec(
+    codec_id: int,
+    name: str,
+    encode: Callable[[bytes], bytes],
+    decode: Callable[[bytes], bytes],
+):
+    if not 0 < codec_id < 256:
+        raise ValueError("Codec id must fit in one byte")
+    CACHE_CODECS[codec_id] = (name, encode, decode)
+
+
+register_cache_codec(1, "json", lambda data: data, lambda data: data)
+register_cache_codec(
+    2,
+    "zlib",
+    lambda data: zlib.compress(data, settings.cache_compression_level),
+    zlib.decompress,
+)
+
+CACHE_CODEC_IDS = {name: codec_id for codec_id, (name, _, _) in CACHE_CODECS.items()}
+
+
+def encode_cache_value(payload: str | bytes) -> bytes:
+    """
+    Wrap a JSON payload in the versioned cache envelope using the configured
+    codec. Small payloads are stored uncompressed.
+    """
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    codec_id = CACHE_CODEC_IDS[settings.cache_codec]
+    if len(payload) < settings.cache_compression_min_size:
+        codec_id = CACHE_CODEC_IDS["json"]
+    _, encode, _ = CACHE_CODECS[codec_id]
+    return CACHE_CODEC_MARKER + bytes([codec_id]) + encode(payload)
+
+
+def decode_cache_value(data: bytes | str) -> bytes | str:
+    """
+    Return the JSON payload of a cached value. Entries written before the
+    envelope existed are plain JSON and are returned unchanged. Raises
+    ValueError for an entry that can't be decoded.
+    """
+    if not isinstance(data, bytes) or not data.startswith(CACHE_CODEC_MARKER):
+        return data
+    codec = CACHE_CODECS.get(data[1]) if len(data) > 1 else None
+    if codec is None:
+        raise ValueError("Unknown cache codec")
+    _, _, decode = codec
+    try:
+        return decode(data[2:])
+    except zlib.error as error:
+        raise ValueError(f"Corrupt cache value: {error}") from error
+
+
+def dump_cached_model(model: BaseModel, **dump_kwargs) -> bytes:
+    return encode_cache_value(model.model_dump_json(**dump_kwargs))
+
+
+def load_cached_model(model_class: Type[ModelT], data: bytes | str) -> ModelT:
+    """Raises ValueError, including pydantic's ValidationError, on bad entries."""
+    return model_class.model_validate_json(decode_cache_value(data))
@@ -2,31 +2,45 @@ import asyncio
 import functools
 import json
 import logging
-import math
 import re
-from datetime import datetime, timezone
 from os.path import basename
-from typing import Optional, List, Any
+from typing import Optional, List
 from urllib.parse import quote, urlparse
 
 from thefuzz import fuzz
 
 from db.config import settings
-from db.enums import TorrentType
 from db.models import TorrentStreams, TVStreams
-from db.schemas import Stream, UserData, SortingOption
+from db.schemas import Stream, StreamBehaviorHints, UserData
+from db.stream_cache import (
+    get_rendered_streams,
+    get_rendered_streams_field,
+    set_rendered_streams,
+)
 from streaming_providers import mapper
 from streaming_providers.cache_helpers import (
     get_cached_status,
     store_cached_info_hashes,
 )
-from utils import const
+from streaming_providers.downloaded_snapshot import get_downloaded_info_hashes
+from streaming_providers.prefetch import schedule_playback_prefetch
+from streaming_providers.request_scheduler import RequestPriority, request_priority
 from utils.config import config_manager
+from utils.crypto import get_text_hash
 from utils.const import STREAMING_PROVIDERS_SHORT_NAMES, CERTIFICATION_MAPPING
 from utils.network import encode_mediaflow_proxy_url
 from utils.runtime_const import TRACKERS, MANIFEST_TEMPLATE, ADULT_PARSER
+from utils.stream_display import (
+    convert_bytes_to_readable,
+    format_binge_group,
+    format_torrent_title,
+)
+from utils.stream_table import StreamTable, StreamCacheProbe
 from utils.validation_helper import validate_m3u8_or_mpd_url_with_cache
 
+# Bump when render_stream_templates output changes to orphan old cache entries
+STREAM_RENDER_VERSION = 2
+
 
 async def filter_and_sort_streams(
     streams: list[TorrentStreams],
@@ -34,21 +48,8 @@ async def filter_and_sort_streams(
     stremio_video_id: str,
     user_ip: str | None = None,
 ) -> tuple[list[TorrentStreams], dict]:
-    # Convert to sets for faster lookups
-    selected_resolutions_set = set(user_data.selected_resolutions)
-    quality_filter_set = set(
-        quality
-        for group in user_data.quality_filter
-        for quality in const.QUALITY_GROUPS[group]
-    )
-    language_filter_set = set(user_data.language_sorting)
-
-    valid_resolutions = const.SUPPORTED_RESOLUTIONS
-    valid_qualities = const.SUPPORTED_QUALITIES
-    valid_languages = const.SUPPORTED_LANGUAGES
-
-    # Step 1: Filter streams and add normalized attributes
-    filtered_streams = []
+    # Step 1: Build the columnar view and filter over indices
+    stream_table = StreamTable(streams)
     filtered_reasons = {
         "Requires Streaming Provider": 0,
         "Requires Private Tracker Support": 0,
@@ -59,63 +60,17 @@ async def filter_and_sort_streams(
         "Strict 18+ Keyword Filter": 0,
         "No Cached Streams": 0,
     }
+    filtered_indices = stream_table.filter_indices(
+        user_data, filtered_reasons, is_contain_18_plus_keywords
+    )
 
-    for stream in streams:
-        # Skip private torrents if streaming provider is not supported
-        if stream.torrent_type != TorrentType.PUBLIC:
-            if not user_data.streaming_provider:
-                filtered_reasons["Requires Streaming Provider"] += 1
-                continue
-            if (
-                stream.torrent_type != TorrentType.WEB_SEED
-                and user_data.streaming_provider.service
-                not in const.SUPPORTED_PRIVATE_TRACKER_STREAMING_PROVIDERS
-            ):
-                filtered_reasons["Requires Private Tracker Support"] += 1
-                continue
-        # Create a copy of the stream model to avoid modifying the original
-        stream = stream.model_copy()
-        # Add normalized attributes as dynamic properties
-        stream.filtered_resolution = (
-            stream.resolution if stream.resolution in valid_resolutions else None
-        )
-        stream.filtered_quality = (
-            stream.quality if stream.quality in valid_qualities else None
-        )
-        stream.filtered_languages = [
-            lang for lang in stream.languages if lang in valid_languages
-        ] or [None]
-        stream.cached = False
-
-        if stream.filtered_resolution not in selected_resolutions_set:
-            filtered_reasons["Resolution Not Selected"] += 1
-            continue
-
-        if stream.size > user_data.max_size:
-            filtered_reasons["Size Limit Exceeded"] += 1
-            continue
-
-        if stream.filtered_quality not in quality_filter_set:
-            filtered_reasons["Quality Not Selected"] += 1
-            continue
-
-        if not any(lang in language_filter_set for lang in stream.filtered_languages):
-            filtered_reasons["Language Not Selected"] += 1
-            continue
-
-        if is_contain_18_plus_keywords(stream.torrent_name):
-            filtered_reasons["Strict 18+ Keyword Filter"] += 1
-            continue
-
-        filtered_streams.append(stream)
-
-    if not filtered_streams:
-        return filtered_streams, filtered_reasons
+    if not filtered_indices:
+        return [], filtered_reasons
 
     # Step 2: Update cache status based on provider
     if user_data.streaming_provider:
         service = user_data.streaming_provider.service
-        info_hashes = [stream.id for stream in filtered_streams]
+        info_hashes = [stream_table.ids[index] for index in filtered_indices]
 
         # First check Redis cache
         cached_statuses = await get_cached_status(
@@ -123,29 +78,31 @@ async def filter_and_sort_streams(
         )
 
         # Update streams with cached status from Redis
-        uncached_streams = []
-        for stream in filtered_streams:
-            if cached_statuses.get(stream.id, False):
-                stream.cached = True
+        uncached_probes = {}
+        for index in filtered_indices:
+            info_hash = stream_table.ids[index]
+            if cached_statuses.get(info_hash, False):
+                stream_table.cached[index] = True
             else:
-                stream.cached = False
-                uncached_streams.append(stream)
+                uncached_probes[index] = StreamCacheProbe(info_hash)
 
         # For streams not found in Redis cache, use provider's cache check
-        if uncached_streams:
+        if uncached_probes:
             cache_update_function = mapper.CACHE_UPDATE_FUNCTIONS.get(service)
             if cache_update_function:
                 try:
                     service_name = await cache_update_function(
-                        streams=uncached_streams,
+                        streams=list(uncached_probes.values()),
                         user_data=user_data,
                         user_ip=user_ip,
                         stremio_video_id=stremio_video_id,
                     )
                     # Store only the cached ones in Redis
-                    cached_info_hashes = [
-                        stream.id for stream in uncached_streams if stream.cached
-                    ]
+                    cached_info_hashes = []
+                    for index, probe in uncached_probes.items():
+                        if probe.cached:
+                            stream_table.cached[index] = True
+                            cached_info_hashes.append(probe.id)
                     if cached_info_hashes:
                         await store_cached_info_hashes(
                             user_data.streaming_provider,
@@ -158,85 +115,178 @@ async def filter_and_sort_streams(
                     )
 
         if user_data.streaming_provider.only_show_cached_streams:
-            cached_filtered_streams = [
-                stream for stream in filtered_streams if stream.cached
+            cached_indices = [
+                index for index in filtered_indices if stream_table.cached[index]
             ]
-            if not cached_filtered_streams:
-                filtered_reasons["No Cached Streams"] = len(filtered_streams)
-                return filtered_streams, filtered_reasons
-            filtered_streams = cached_filtered_streams
-
-    # Step 3: Dynamically sort streams based on user preferences
-    def dynamic_sort_key(torrent_stream: TorrentStreams) -> tuple:
-        def key_value(sorting_option: SortingOption) -> Any:
-            key = sorting_option.key
-            multiplier = 1 if sorting_option.direction == "asc" else -1
-
-            match key:
-                case "cached":
-                    return multiplier * (1 if torrent_stream.cached else 0)
-                case "resolution":
-                    return multiplier * const.RESOLUTION_RANKING.get(
-                        torrent_stream.filtered_resolution, 0
-                    )
-                case "quality":
-                    return multiplier * const.QUALITY_RANKING.get(
-                        torrent_stream.filtered_quality, 0
-                    )
-                case "size":
-                    return multiplier * torrent_stream.size
-                case "seeders":
-                    return multiplier * (torrent_stream.seeders or 0)
-                case "created_at":
-                    created_at = torrent_stream.created_at
-                    if isinstance(created_at, datetime):
-                        if created_at.tzinfo is None:
-                            created_at = created_at.replace(tzinfo=timezone.utc)
-                        return multiplier * created_at.timestamp()
-                    elif isinstance(created_at, (int, float)):
-                        return multiplier * created_at
-                    else:
-                        return (
-                            multiplier
-                            * datetime.min.replace(tzinfo=timezone.utc).timestamp()
-                        )
-                case "language":
-                    return multiplier * -min(
-                        (
-                            user_data.language_sorting.index(lang)
-                            for lang in torrent_stream.filtered_languages
-                            if lang in language_filter_set
-                        ),
-                        default=len(user_data.language_sorting),
-                    )
-                case _ if key in torrent_stream.model_fields_set:
-                    value = getattr(torrent_stream, key, 0)
-                    return multiplier * (value if value is not None else 0)
-                case _:
-                    return 0
-
-        return tuple(key_value(option) for option in user_data.torrent_sorting_priority)
+            if not cached_indices:
+                filtered_reasons["No Cached Streams"] = len(filtered_indices)
+                return stream_table.materialize(filtered_indices), filtered_reasons
+            filtered_indices = cached_indices
 
+    # Step 3: Sort the indices based on user preferences
     try:
-        # Sort streams based on the dynamic key
-        dynamically_sorted_streams = sorted(filtered_streams, key=dynamic_sort_key)
-
+        sorted_indices = stream_table.sort_indices(filtered_indices, user_data)
     except Exception:
         logging.exception(
-            f"torrent_sorting_priority: {user_data.torrent_sorting_priority}: sort data: {[dynamic_sort_key(stream) for stream in filtered_streams]}"
+            f"torrent_sorting_priority: {user_data.torrent_sorting_priority}"
         )
-        dynamically_sorted_streams = filtered_streams
+        sorted_indices = filtered_indices
 
-    # Step 4: Limit streams per resolution based on user preference, after dynamic sorting
-    limited_streams = []
-    streams_count_per_resolution = {}
-    for stream in dynamically_sorted_streams:
-        count = streams_count_per_resolution.get(stream.filtered_resolution, 0)
-        if count < user_data.max_streams_per_resolution:
-            limited_streams.append(stream)
-            streams_count_per_resolution[stream.filtered_resolution] = count + 1
+    # Step 4: Limit streams per resolution, then materialize only the top rows
+    limited_indices = stream_table.limit_per_resolution(
+        sorted_indices, user_data.max_streams_per_resolution
+    )
+    return stream_table.materialize(limited_indices), filtered_reasons
 
-    return limited_streams, filtered_reasons
+
+def get_stream_render_fingerprint(user_data: UserData) -> str:
+    """
+    Fingerprint of the UserData fields that change how a single stream is
+    rendered. Filtering, sorting and the cached status depend on the user's
+    debrid account, so they are applied per request and not part of it.
+    """
+    streaming_provider = user_data.streaming_provider
+    render_profile = [
+        STREAM_RENDER_VERSION,
+        streaming_provider.service if streaming_provider else None,
+        bool(
+            streaming_provider
+            and user_data.mediaflow_config
+            and user_data.mediaflow_config.proxy_debrid_streams
+        ),
+        user_data.show_full_torrent_name,
+        user_data.show_language_country_flag,
+    ]
+    return get_text_hash(json.dumps(render_profile))
+
+
+def render_stream_templates(
+    stream_data: TorrentStreams,
+    season: int | None,
+    episode: int | None,
+    is_series: bool,
+    show_full_torrent_name: bool,
+    show_language_country_flag: bool,
+    has_streaming_provider: bool,
+) -> list[dict]:
+    """
+    Render the user independent parts of a stream's Stremio entries. The
+    addon name, cached status and secret_str playback URL are filled in by
+    `build_stream` at response time.
+    """
+    episode_variants = (
+        stream_data.get_episodes(season, episode) if is_series else [None]
+    )
+
+    display_fields = stream_data.get_display_fields()
+    languages = (
+        display_fields.language_flags
+        if show_language_country_flag
+        else display_fields.languages
+    )
+
+    templates = []
+    for episode_data in episode_variants:
+        if episode_data:
+            file_name = episode_data.filename
+            file_index = episode_data.file_index
+        else:
+            file_name = stream_data.filename
+            file_index = stream_data.file_index
+
+        # make sure file_name is basename
+        file_name = basename(file_name) if file_name else None
+
+        if not show_full_torrent_name:
+            torrent_name = None
+        elif episode_data and episode_data.filename:
+            torrent_name = format_torrent_title(
+                f"{stream_data.torrent_name} ┈➤ {episode_data.filename}"
+            )
+        else:
+            torrent_name = display_fields.torrent_title
+
+        seeders_info = (
+            f"👤 {stream_data.seeders}" if stream_data.seeders is not None else None
+        )
+        if episode_data and episode_data.size:
+            file_size = episode_data.size
+            size_info = (
+                f"{convert_bytes_to_readable(file_size)} / {display_fields.size}"
+            )
+        else:
+            file_size = stream_data.size
+            size_info = display_fields.size
+
+        description = "\n".join(
+            filter(
+                None,
+                [
+                    (
+                        torrent_name
+                        if show_full_torrent_name
+                        else display_fields.quality_detail
+                    ),
+                    " ".join(filter(None, [size_info, seeders_info])),
+                    languages,
+                    display_fields.source,
+                ],
+            )
+        )
+
+        template = {
+            "resolution": display_fields.resolution,
+            "description": description,
+            "behaviorHints": {
+                "bingeGroup": format_binge_group(
+                    display_fields.quality_detail, display_fields.resolution
+                ),
+                "filename": file_name or stream_data.torrent_name,
+                "videoSize": file_size,
+            },
+        }
+
+        if has_streaming_provider:
+            # Path below /streaming_provider/{secret_str}/playback/
+            playback_path = stream_data.id
+            if episode_data:
+                playback_path += f"/{season}/{episode}"
+            if file_name:
+                playback_path += f"/{quote(file_name)}"
+            template["playback_path"] = playback_path
+        else:
+            template["infoHash"] = stream_data.id
+            template["fileIdx"] = file_index
+            template["sources"] = [
+                f"tracker:{tracker}"
+                for tracker in (stream_data.announce_list or TRACKERS)
+            ] + [f"dht:{stream_data.id}"]
+
+        templates.append(template)
+
+    return templates
+
+
+def build_stream(
+    template: dict, addon_name: str, cached: bool, playback_url_prefix: str
+) -> Stream:
+    """
+    Fill the per-user pieces into a rendered template. The template was
+    produced by this module, so the pydantic validation is skipped.
+    """
+    streaming_provider_status = "⚡️" if cached else "⏳"
+    stream = Stream.model_construct(
+        name=f"{addon_name} {template['resolution']} {streaming_provider_status}",
+        description=template["description"],
+        behaviorHints=StreamBehaviorHints.model_construct(**template["behaviorHints"]),
+    )
+    if "playback_path" in template:
+        stream.url = f"{playback_url_prefix}{template['playback_path']}"
+    else:
+        stream.infoHash = template["infoHash"]
+        stream.fileIdx = template["fileIdx"]
+        stream.sources = template["sources"]
+    return stream
 
 
 async def parse_stream_data(
@@ -258,9 +308,8 @@ async def parse_stream_data(
     )
     addon_name = f"{settings.addon_name} {streaming_provider_name}"
 
-    stremio_video_id = (
-        f"{streams[0].meta_id}:{season}:{episode}" if is_series else streams[0].meta_id
-    )
+    meta_id = streams[0].meta_id
+    stremio_video_id = f"{meta_id}:{season}:{episode}" if is_series else meta_id
     streams, filtered_reasons = await filter_and_sort_streams(
         streams, user_data, stremio_video_id, user_ip
     )
@@ -281,13 +330,12 @@ async def parse_stream_data(
         ]
 
     # Precompute constant values
-    show_full_torrent_name = user_data.show_full_torrent_name
     has_streaming_provider = user_data.streaming_provider is not None
     download_via_browser = (
         has_streaming_provider and user_data.streaming_provider.download_via_browser
     )
 
-    base_proxy_url_template = ""
+    playback_url_prefix = ""
     if has_streaming_provider:
         if (
             user_data.mediaflow_config
@@ -295,130 +343,53 @@ async def parse_stream_data(
         ):
             addon_name += " 🕵🏼‍♂️"
 
-        base_proxy_url_template = (
-            f"{settings.host_url}/streaming_provider/{secret_str}/playback/{{}}"
+        playback_url_prefix = (
+            f"{settings.host_url}/streaming_provider/{secret_str}/playback/"
         )
 
+    # Rendered templates are shared by every user with the same render profile
+    # and dropped together with the title's stream cache.
+    render_field = get_rendered_streams_field(
+        get_stream_render_fingerprint(user_data),
+        season if is_series else None,
+        episode if is_series else None,
+    )
+    rendered_streams = await get_rendered_streams(meta_id, render_field)
+    has_new_renders = False
+
     stream_list = []
     for stream_data in streams:
-        episode_variants = (
-            stream_data.get_episodes(season, episode) if is_series else [None]
-        )
-        if is_series and not episode_variants:
-            continue
-
-        for episode_data in episode_variants:
-            if episode_data:
-                file_name = episode_data.filename
-                file_index = episode_data.file_index
-            else:
-                file_name = stream_data.filename
-                file_index = stream_data.file_index
-
-            # make sure file_name is basename
-            file_name = basename(file_name) if file_name else None
-
-            if show_full_torrent_name:
-                torrent_name = (
-                    f"{stream_data.torrent_name} ┈➤ {episode_data.filename}"
-                    if episode_data and episode_data.filename
-                    else stream_data.torrent_name
-                )
-                torrent_name = "📂 " + torrent_name.replace(".torrent", "").replace(
-                    ".", " "
-                )
-            else:
-                torrent_name = None
-
-            # Compute quality_detail
-            quality_detail = " ".join(
-                filter(
-                    None,
-                    [
-                        f"🎨 {'|'.join(stream_data.hdr)}" if stream_data.hdr else None,
-                        f"📺 {stream_data.quality}" if stream_data.quality else None,
-                        f"🎞️ {stream_data.codec}" if stream_data.codec else None,
-                        (
-                            f"🎵 {'|'.join(stream_data.audio)}"
-                            if stream_data.audio
-                            else None
-                        ),
-                    ],
-                )
+        templates = rendered_streams.get(stream_data.id)
+        if templates is None:
+            templates = render_stream_templates(
+                stream_data,
+                season,
+                episode,
+                is_series,
+                user_data.show_full_torrent_name,
+                user_data.show_language_country_flag,
+                has_streaming_provider,
             )
+            rendered_streams[stream_data.id] = templates
+            has_new_renders = True
 
-            resolution = (
-                stream_data.resolution.upper() if stream_data.resolution else "N/A"
-            )
-            streaming_provider_status = "⚡️" if stream_data.cached else "⏳"
-            seeders_info = (
-                f"👤 {stream_data.seeders}" if stream_data.seeders is not None else None
-            )
-            if episode_data and episode_data.size:
-                file_size = episode_data.size
-                size_info = f"{convert_bytes_to_readable(file_size)} / {convert_bytes_to_readable(stream_data.size)}"
-            else:
-                file_size = stream_data.size
-                size_info = convert_bytes_to_readable(file_size)
-
-            if user_data.show_language_country_flag:
-                languages = filter(
-                    None,
-                    set(
-                        [
-                            const.LANGUAGE_COUNTRY_FLAGS.get(lang)
-                            for lang in stream_data.languages
-                        ]
-                    ),
-                )
-            else:
-                languages = stream_data.languages
-
-            languages = f"🌐 {' + '.join(languages)}" if stream_data.languages else None
-            source_info = f"🔗 {stream_data.source}"
-            if stream_data.uploader:
-                source_info += f" 🧑‍💻 {stream_data.uploader}"
-
-            description = "\n".join(
-                filter(
-                    None,
-                    [
-                        torrent_name if show_full_torrent_name else quality_detail,
-                        " ".join(filter(None, [size_info, seeders_info])),
-                        languages,
-                        source_info,
-                    ],
+        for template in templates:
+            stream_list.append(
+                build_stream(
+                    template, addon_name, stream_data.cached, playback_url_prefix
                 )
             )
 
-            stream_details = {
-                "name": f"{addon_name} {resolution} {streaming_provider_status}",
-                "description": description,
-                "behaviorHints": {
-                    "bingeGroup": f"{settings.addon_name.replace(' ', '-')}-{quality_detail}-{resolution}",
-                    "filename": file_name or stream_data.torrent_name,
-                    "videoSize": file_size,
-                },
-            }
-
-            if has_streaming_provider:
-                stream_details["url"] = base_proxy_url_template.format(stream_data.id)
-                if episode_data:
-                    stream_details["url"] += f"/{season}/{episode}"
-                if file_name:
-                    stream_details["url"] += f"/{quote(file_name)}"
-            else:
-                stream_details["infoHash"] = stream_data.id
-                stream_details["fileIdx"] = file_index
-                stream_details["sources"] = [
-                    f"tracker:{tracker}"
-                    for tracker in (stream_data.announce_list or TRACKERS)
-                ] + [f"dht:{stream_data.id}"]
+    if has_new_renders:
+        await set_rendered_streams(meta_id, render_field, rendered_streams)
 
-            stream_list.append(Stream(**stream_details))
+    if has_streaming_provider:
+        schedule_playback_prefetch(
+            streams, user_data, secret_str, user_ip, season, episode, is_series
+        )
 
     if stream_list and download_via_browser:
-        download_url = f"{settings.host_url}/download/{secret_str}/{'series' if is_series else 'movie'}/{streams[0].meta_id}"
+        download_url = f"{settings.host_url}/download/{secret_str}/{'series' if is_series else 'movie'}/{meta_id}"
         if is_series:
             download_url += f"/{season}/{episode}"
         stream_list.append(
@@ -432,20 +403,6 @@ async def parse_stream_data(
     return stream_list
 
 
-@functools.lru_cache(maxsize=1024)
-def convert_bytes_to_readable(size_bytes: int) -> str:
-    """
-    Convert a size in bytes into a more human-readable format.
-    """
-    if not size_bytes:
-        return ""
-    size_name = ("B", "KB", "MB", "GB", "TB", "PB", "EB", "ZB", "YB")
-    i = int(math.floor(math.log(size_bytes, 1024)))
-    p = math.pow(1024, i)
-    s = round(size_bytes / p, 2)
-    return f"💾 {s} {size_name[i]}"
-
-
 @functools.lru_cache(maxsize=1024)
 def convert_size_to_bytes(size_str: str) -> int:
     """Convert size string to bytes."""
@@ -605,14 +562,14 @@ def create_exception_stream(
 async def fetch_downloaded_info_hashes(
     user_data: UserData, user_ip: str | None
 ) -> list[str]:
-    kwargs = dict(user_data=user_data, user_ip=user_ip)
     if fetch_downloaded_info_hashes_function := mapper.FETCH_DOWNLOADED_INFO_HASHES_FUNCTIONS.get(
         user_data.streaming_provider.service
     ):
         try:
-            downloaded_info_hashes = await fetch_downloaded_info_hashes_function(
-                **kwargs
-            )
+            with request_priority(RequestPriority.BACKGROUND):
+                downloaded_info_hashes = await get_downloaded_info_hashes(
+                    user_data, user_ip, fetch_downloaded_info_hashes_function
+                )
             return downloaded_info_hashes
         except Exception as error:
             logging.exception(
@@ -12,9 +12,21 @@ from db.models import MediaFusionMetaData
 from scrapers.imdb_data import get_imdb_rating
 from utils import const
 from db.redis_database import REDIS_ASYNC_CLIENT
+from utils.singleflight import SingleFlight
 
 font_cache = {}
 executor = ThreadPoolExecutor(max_workers=4)
+POSTER_CACHE_TTL = 604800  # 7 days
+
+_poster_renders = SingleFlight(name="poster")
+_poster_prefetch_tasks: set[asyncio.Task] = set()
+# Cache keys of the posters scheduled for a prefetch in this worker
+_scheduled_poster_keys: set[str] = set()
+_poster_prefetch_semaphore: asyncio.Semaphore | None = None
+
+
+def get_poster_cache_key(catalog_type: str, meta_id: str) -> str:
+    return f"{catalog_type}_{meta_id}.jpg"
 
 
 async def fetch_poster_image(url: str) -> bytes:
@@ -85,6 +97,68 @@ async def create_poster(mediafusion_data: MediaFusionMetaData) -> BytesIO:
     return byte_io
 
 
+async def _render_and_cache_poster(
+    cache_key: str, mediafusion_data: MediaFusionMetaData
+) -> bytes:
+    image_bytes = (await create_poster(mediafusion_data)).getvalue()
+    await REDIS_ASYNC_CLIENT.set(cache_key, image_bytes, ex=POSTER_CACHE_TTL)
+    return image_bytes
+
+
+async def render_poster(
+    catalog_type: str, mediafusion_data: MediaFusionMetaData
+) -> bytes:
+    """
+    Create the poster of a title and cache it. Concurrent renders of the same
+    poster in this process, e.g. a request during a prefetch, share one run.
+    """
+    cache_key = get_poster_cache_key(catalog_type, mediafusion_data.id)
+    return await _poster_renders.do(
+        cache_key, lambda: _render_and_cache_poster(cache_key, mediafusion_data)
+    )
+
+
+async def _prefetch_poster(catalog_type: str, mediafusion_data: MediaFusionMetaData):
+    global _poster_prefetch_semaphore
+    if _poster_prefetch_semaphore is None:
+        _poster_prefetch_semaphore = asyncio.Semaphore(
+            settings.poster_prefetch_max_concurrency
+        )
+    cache_key = get_poster_cache_key(catalog_type, mediafusion_data.id)
+    try:
+        async with _poster_prefetch_semaphore:
+            # Cached by a poster request while this prefetch was queued
+            if await REDIS_ASYNC_CLIENT.exists(cache_key):
+                return
+            await render_poster(catalog_type, mediafusion_data)
+    except Exception as error:
+        # The poster endpoint retries and flags broken posters itself
+        logging.debug(f"Poster prefetch failed for {mediafusion_data.id}: {error}")
+    finally:
+        _scheduled_poster_keys.discard(cache_key)
+
+
+def is_poster_prefetch_scheduled(catalog_type: str, meta_id: str) -> bool:
+    return get_poster_cache_key(catalog_type, meta_id) in _scheduled_poster_keys
+
+
+def schedule_poster_prefetch(
+    catalog_type: str, media_data_list: list[MediaFusionMetaData]
+):
+    """Render the given posters in the background, a few at a time."""
+    for mediafusion_data in media_data_list:
+        if mediafusion_data.is_poster_working is False or not mediafusion_data.poster:
+            continue
+        if is_poster_prefetch_scheduled(catalog_type, mediafusion_data.id):
+            continue
+        _scheduled_poster_keys.add(
+            get_poster_cache_key(catalog_type, mediafusion_data.id)
+        )
+        task = asyncio.create_task(_prefetch_poster(catalog_type, mediafusion_data))
+        _poster_prefetch_tasks.add(task)
+        task.add_done_callback(_poster_prefetch_tasks.discard)
+
+
 def add_elements_to_poster(
     image: Image.Image, imdb_rating: float = None
 ) -> Image.Image:
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from prometheus_client import Histogram
+
+from db.redis_database import REDIS_ASYNC_CLIENT
+from utils.lock import acquire_redis_lock, release_redis_lock
+
+T = TypeVar("T")
+
+single_flight_wait_histogram = Histogram(
+    "single_flight_wait_seconds",
+    "Time callers waited for the result of another caller's in-flight call",
+    labelnames=["name", "scope"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+
+class SingleFlight:
+    """
+    Per-process request coalescing.
+
+    Concurrent callers using the same key share a single in-flight call. The
+    work runs in its own task, so a leader whose request is cancelled (client
+    disconnect) doesn't cancel the work for the callers waiting on it.
+    """
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._calls: dict[str, asyncio.Task] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is not None:
+            with single_flight_wait_histogram.labels(
+                name=self.name, scope="local"
+            ).time():
+                return await asyncio.shield(task)
+
+        task = asyncio.create_task(func(), name=f"singleflight:{key}")
+        self._calls[key] = task
+        task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+
+class RedisSingleFlight:
+    """
+    Cross-pod request coalescing backed by Redis.
+
+    The first caller takes a short-lived non-blocking lock and runs the work; the
+    encoded result is stored under a result key and announced on a pub/sub
+    channel. Other callers subscribe and receive the leader's result instead
+    of polling a lock. If the leader fails or the wait times out, followers
+    fall back to `on_timeout` (or run the work themselves when it is None).
+    """
+
+    def __init__(
+        self, name: str = "default", lease_ttl: int = 60, result_ttl: int = 30
+    ):
+        self.name = name
+        self.lease_ttl = lease_ttl
+        self.result_ttl = result_ttl
+
+    @staticmethod
+    def _keys(key: str) -> tuple[str, str]:
+        return f"{key}_singleflight", f"{key}_singleflight_result"
+
+    async def do(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[T]],
+        encode: Callable[[T], bytes | str],
+        decode: Callable[[bytes], T],
+        wait_timeout: float,
+        on_timeout: Optional[Callable[[], Awaitable[T]]] = None,
+    ) -> T:
+        lease_key, result_key = self._keys(key)
+
+        acquired, lease = await acquire_redis_lock(
+            lease_key, timeout=self.lease_ttl, block=False
+        )
+        if acquired:
+            return await self._lead(lease, result_key, func, encode)
+
+        with single_flight_wait_histogram.labels(name=self.name, scope="redis").time():
+            result = await self._follow(lease_key, result_key, decode, wait_timeout)
+        if result is not None:
+            return result
+
+        logging.warning("Single-flight wait for %s did not yield a result", key)
+        return await (on_timeout or func)()
+
+    async def lead_if_idle(
+        self,
+        key: str,
+        func: Callable[[], Awaitable[T]],
+        encode: Callable[[T], bytes | str],
+    ) -> tuple[bool, Optional[T]]:
+        """
+        Run `func` as the leader for `key` unless another caller already is.
+        Returns whether it ran and its result. Callers that start while it runs
+        follow it through `do`.
+        """
+        lease_key, result_key = self._keys(key)
+        acquired, lease = await acquire_redis_lock(
+            lease_key, timeout=self.lease_ttl, block=False
+        )
+        if not acquired:
+            return False, None
+        return True, await self._lead(lease, result_key, func, encode)
+
+    async def _lead(
+        self,
+        lease,
+        result_key: str,
+        func: Callable[[], Awaitable[T]],
+        encode: Callable[[T], bytes | str],
+    ) -> T:
+        published = False
+        try:
+            # A result left by an earlier run must not be served to the
+            # followers of this one
+            await REDIS_ASYNC_CLIENT.delete(result_key)
+            result = await func()
+            try:
+                await REDIS_ASYNC_CLIENT.set(
+                    result_key, encode(result), ex=self.result_ttl
+                )
+                await REDIS_ASYNC_CLIENT.publish(result_key, b"done")
+                published = True
+            except Exception as error:
+                logging.error(f"Failed to publish single-flight result: {error}")
+            return result
+        finally:
+            if not published:
+                # Wake followers so they stop waiting on a failed leader
+                await REDIS_ASYNC_CLIENT.publish(result_key, b"failed")
+            await release_redis_lock(lease)
+
+    async def _follow(
+        self,
+        lease_key: str,
+        result_key: str,
+        decode: Callable[[bytes], Any],
+        wait_timeout: float,
+    ) -> Any:
+        pubsub = REDIS_ASYNC_CLIENT.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(result_key)
+            # The leader may have finished before we subscribed
+            if cached := await REDIS_ASYNC_CLIENT.get(result_key):
+                return decode(cached)
+            if not await REDIS_ASYNC_CLIENT.exists(lease_key):
+                return None
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + wait_timeout
+            while (remaining := deadline - loop.time()) > 0:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=remaining
+                )
+                if message is None:
+                    continue
+                if message["data"] != b"done":
+                    return None
+                if cached := await REDIS_ASYNC_CLIENT.get(result_key):
+                    return decode(cached)
+                return None
+            return None
+        finally:
+            try:
+                await pubsub.unsubscribe(result_key)
+                await pubsub.aclose()
+            except Exception:
+                pass
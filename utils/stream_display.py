@@ -0,0 +1,70 @@
+import functools
+import math
+
+from db.config import settings
+from utils import const
+
+
+@functools.lru_cache(maxsize=1024)
+def convert_bytes_to_readable(size_bytes: int) -> str:
+    """
+    Convert a size in bytes into a more human-readable format.
+    """
+    if not size_bytes:
+        return ""
+    size_name = ("B", "KB", "MB", "GB", "TB", "PB", "EB", "ZB", "YB")
+    i = int(math.floor(math.log(size_bytes, 1024)))
+    p = math.pow(1024, i)
+    s = round(size_bytes / p, 2)
+    return f"💾 {s} {size_name[i]}"
+
+
+def format_torrent_title(torrent_name: str) -> str:
+    return "📂 " + torrent_name.replace(".torrent", "").replace(".", " ")
+
+
+def build_stream_display_fields(stream) -> dict:
+    """
+    Pre-format the description segments of a stream that only depend on the
+    stream document itself. Seeders are left out as they change frequently,
+    and the binge group as it depends on the addon settings.
+    """
+    quality_detail = " ".join(
+        filter(
+            None,
+            [
+                f"🎨 {'|'.join(stream.hdr)}" if stream.hdr else None,
+                f"📺 {stream.quality}" if stream.quality else None,
+                f"🎞️ {stream.codec}" if stream.codec else None,
+                f"🎵 {'|'.join(stream.audio)}" if stream.audio else None,
+            ],
+        )
+    )
+    resolution = stream.resolution.upper() if stream.resolution else "N/A"
+
+    languages = language_flags = None
+    if stream.languages:
+        languages = f"🌐 {' + '.join(stream.languages)}"
+        flags = dict.fromkeys(
+            const.LANGUAGE_COUNTRY_FLAGS.get(lang) for lang in stream.languages
+        )
+        language_flags = f"🌐 {' + '.join(flag for flag in flags if flag)}"
+
+    source = f"🔗 {stream.source}"
+    if stream.uploader:
+        source += f" 🧑‍💻 {stream.uploader}"
+
+    return {
+        "torrent_title": format_torrent_title(stream.torrent_name),
+        "quality_detail": quality_detail,
+        "resolution": resolution,
+        "size": convert_bytes_to_readable(stream.size),
+        "languages": languages,
+        "language_flags": language_flags,
+        "source": source,
+    }
+
+
+def format_binge_group(quality_detail: str, resolution: str) -> str:
+    """Binge group of a stream, prefixed by this instance's addon name."""
+    return f"{settings.addon_name.replace(' ', '-')}-{quality_detail}-{resolution}"
@@ -0,0 +1,244 @@
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from db.enums import TorrentType
+from db.models import TorrentStreams
+from db.schemas import UserData, SortingOption
+from utils import const
+
+# Bit position of every supported language (including None) in a stream's language mask
+LANGUAGE_BITS = {lang: 1 << index for index, lang in enumerate(const.LANGUAGES_FILTERS)}
+MIN_TIMESTAMP = datetime.min.replace(tzinfo=timezone.utc).timestamp()
+
+
+class StreamCacheProbe:
+    """
+    Minimal stand-in for a TorrentStreams object passed to the provider cache
+    update functions, which only read `id` and write `cached`.
+    """
+
+    __slots__ = ("id", "cached")
+
+    def __init__(self, info_hash: str):
+        self.id = info_hash
+        self.cached = False
+
+
+def _created_at_timestamp(created_at: Any) -> float:
+    if isinstance(created_at, datetime):
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return created_at.timestamp()
+    elif isinstance(created_at, (int, float)):
+        return created_at
+    return MIN_TIMESTAMP
+
+
+class StreamTable:
+    """
+    Struct-of-arrays view over a title's streams.
+
+    Every column is a plain list indexed by stream position, so filtering and
+    sorting work on integer indices and no per-stream pydantic copies are made
+    until the final top-N rows are materialized.
+    """
+
+    __slots__ = (
+        "streams",
+        "ids",
+        "torrent_types",
+        "resolutions",
+        "qualities",
+        "sizes",
+        "seeders",
+        "created_at",
+        "language_masks",
+        "cached",
+    )
+
+    def __init__(self, streams: list[TorrentStreams]):
+        valid_resolutions = const.SUPPORTED_RESOLUTIONS
+        valid_qualities = const.SUPPORTED_QUALITIES
+
+        self.streams = streams
+        self.ids = [stream.id for stream in streams]
+        self.torrent_types = [stream.torrent_type for stream in streams]
+        self.resolutions = [
+            stream.resolution if stream.resolution in valid_resolutions else None
+            for stream in streams
+        ]
+        self.qualities = [
+            stream.quality if stream.quality in valid_qualities else None
+            for stream in streams
+        ]
+        self.sizes = [stream.size for stream in streams]
+        self.seeders = [stream.seeders or 0 for stream in streams]
+        self.created_at = [
+            _created_at_timestamp(stream.created_at) for stream in streams
+        ]
+        self.language_masks = []
+        for stream in streams:
+            mask = 0
+            for lang in stream.languages:
+                mask |= LANGUAGE_BITS.get(lang, 0)
+            self.language_masks.append(mask or LANGUAGE_BITS[None])
+        self.cached = [False] * len(streams)
+
+    def __len__(self) -> int:
+        return len(self.streams)
+
+    def filter_indices(
+        self,
+        user_data: UserData,
+        filtered_reasons: dict[str, int],
+        is_adult_title: Callable[[str], bool],
+    ) -> list[int]:
+        """
+        Return the indices of streams that pass the user's filters, counting
+        the first failing reason for every rejected stream.
+        """
+        selected_resolutions = set(user_data.selected_resolutions)
+        quality_filter = set(
+            quality
+            for group in user_data.quality_filter
+            for quality in const.QUALITY_GROUPS[group]
+        )
+        language_filter_mask = 0
+        for lang in user_data.language_sorting:
+            language_filter_mask |= LANGUAGE_BITS.get(lang, 0)
+
+        streaming_provider = user_data.streaming_provider
+        supports_private_trackers = (
+            streaming_provider is not None
+            and streaming_provider.service
+            in const.SUPPORTED_PRIVATE_TRACKER_STREAMING_PROVIDERS
+        )
+        max_size = user_data.max_size
+
+        indices = []
+        for index in range(len(self.streams)):
+            torrent_type = self.torrent_types[index]
+            if torrent_type != TorrentType.PUBLIC:
+                if streaming_provider is None:
+                    filtered_reasons["Requires Streaming Provider"] += 1
+                    continue
+                if (
+                    torrent_type != TorrentType.WEB_SEED
+                    and not supports_private_trackers
+                ):
+                    filtered_reasons["Requires Private Tracker Support"] += 1
+                    continue
+
+            if self.resolutions[index] not in selected_resolutions:
+                filtered_reasons["Resolution Not Selected"] += 1
+                continue
+
+            if self.sizes[index] > max_size:
+                filtered_reasons["Size Limit Exceeded"] += 1
+                continue
+
+            if self.qualities[index] not in quality_filter:
+                filtered_reasons["Quality Not Selected"] += 1
+                continue
+
+            if not self.language_masks[index] & language_filter_mask:
+                filtered_reasons["Language Not Selected"] += 1
+                continue
+
+            if is_adult_title(self.streams[index].torrent_name):
+                filtered_reasons["Strict 18+ Keyword Filter"] += 1
+                continue
+
+            indices.append(index)
+
+        return indices
+
+    def _sort_column(
+        self, indices: list[int], option: SortingOption, user_data: UserData
+    ) -> dict[int, Any]:
+        multiplier = 1 if option.direction == "asc" else -1
+
+        match option.key:
+            case "cached":
+                return {i: multiplier * self.cached[i] for i in indices}
+            case "resolution":
+                ranking = const.RESOLUTION_RANKING
+                return {
+                    i: multiplier * ranking.get(self.resolutions[i], 0) for i in indices
+                }
+            case "quality":
+                ranking = const.QUALITY_RANKING
+                return {
+                    i: multiplier * ranking.get(self.qualities[i], 0) for i in indices
+                }
+            case "size":
+                return {i: multiplier * self.sizes[i] for i in indices}
+            case "seeders":
+                return {i: multiplier * self.seeders[i] for i in indices}
+            case "created_at":
+                return {i: multiplier * self.created_at[i] for i in indices}
+            case "language":
+                ranked_bits = [
+                    (position, LANGUAGE_BITS.get(lang, 0))
+                    for position, lang in enumerate(user_data.language_sorting)
+                ]
+                default_rank = len(user_data.language_sorting)
+                return {
+                    i: multiplier
+                    * -next(
+                        (
+                            position
+                            for position, bit in ranked_bits
+                            if self.language_masks[i] & bit
+                        ),
+                        default_rank,
+                    )
+                    for i in indices
+                }
+            case key:
+                column = {}
+                for i in indices:
+                    stream = self.streams[i]
+                    value = (
+                        getattr(stream, key, 0) if key in stream.model_fields_set else 0
+                    )
+                    column[i] = multiplier * (value if value is not None else 0)
+                return column
+
+    def sort_indices(self, indices: list[int], user_data: UserData) -> list[int]:
+        """
+        Lexicographic sort of the indices by the user's sorting priority.
+        Runs one stable sort per option from the least to the most significant,
+        each keyed by a precomputed column lookup.
+        """
+        sorted_indices = list(indices)
+        for option in reversed(user_data.torrent_sorting_priority):
+            column = self._sort_column(sorted_indices, option, user_data)
+            sorted_indices.sort(key=column.__getitem__)
+        return sorted_indices
+
+    def limit_per_resolution(self, indices: list[int], limit: int) -> list[int]:
+        limited_indices = []
+        counts_per_resolution = {}
+        for index in indices:
+            resolution = self.resolutions[index]
+            count = counts_per_resolution.get(resolution, 0)
+            if count < limit:
+                limited_indices.append(index)
+                counts_per_resolution[resolution] = count + 1
+        return limited_indices
+
+    def materialize(self, indices: list[int]) -> list[TorrentStreams]:
+        """Copy only the selected rows into TorrentStreams with the derived attributes."""
+        valid_languages = const.SUPPORTED_LANGUAGES
+        materialized = []
+        for index in indices:
+            stream = self.streams[index].model_copy()
+            stream.filtered_resolution = self.resolutions[index]
+            stream.filtered_quality = self.qualities[index]
+            stream.filtered_languages = [
+                lang for lang in stream.languages if lang in valid_languages
+            ] or [None]
+            stream.cached = self.cached[index]
+            materialized.append(stream)
+        return materialized
@@ -9,6 +9,7 @@ from fastapi.security import APIKeyHeader
 
 from db import schemas
 from db.config import settings
+from db.enums import NudityStatus
 from utils import const
 from utils.network import is_private_ip
 from db.redis_database import REDIS_ASYNC_CLIENT
@@ -252,10 +253,32 @@ def is_video_file(filename: str) -> bool:
 
 
 def get_filter_certification_values(user_data: schemas.UserData) -> list[str]:
-    certification_values = []
+    certification_values = set()
     for category in user_data.certification_filter:
-        certification_values.extend(const.CERTIFICATION_MAPPING.get(category, []))
-    return certification_values
+        certification_values.update(const.CERTIFICATION_MAPPING.get(category, []))
+    return sorted(certification_values)
+
+
+def get_parental_profile(user_data: schemas.UserData) -> str:
+    """
+    Canonical name of the user's parental filters. Filter sets selecting the
+    same titles get the same profile, whatever their order or redundant values.
+    """
+    if "Disable" in user_data.nudity_filter:
+        nudity_profile = "off"
+    else:
+        nudity_profile = ".".join(
+            status for status in NudityStatus if status in user_data.nudity_filter
+        )
+    if "Disable" in user_data.certification_filter:
+        certification_profile = "off"
+    else:
+        certification_profile = ".".join(
+            category
+            for category in ["Unknown", *const.CERTIFICATION_MAPPING]
+            if category in user_data.certification_filter
+        )
+    return f"n-{nudity_profile}_c-{certification_profile}"
 
 
 def validate_parent_guide_nudity(metadata, user_data: schemas.UserData) -> bool: